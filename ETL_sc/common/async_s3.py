@@ -0,0 +1,263 @@
+"""
+Asyncio connector accessing S3 - for a high fan-out of requests without a thread per request
+
+The requests run on the event loop (aiobotocore), up to max_concurrency at once (asyncio.Semaphore).
+The CPU-bound parsing and writing of DataFrames runs in an executor, so that the event loop keeps the
+requests flowing while files are parsed. Retries of throttled requests are done by botocore (standard mode).
+
+The connector has the surface of S3BucketConnector for listing, reading and writing, as coroutines:
+
+    async with AsyncS3BucketConnector(access_key, secret_key, endpoint_url, bucket_name) as s3_bucket:
+        keys = await s3_bucket.list_files_in_prefix('2021-04-16')
+        data_frames = await s3_bucket.read_csvs_as_dfs(keys)
+
+aiobotocore is an optional dependency, only needed for this connector.
+
+"""
+import asyncio
+import hashlib
+import logging
+import os
+from contextlib import AsyncExitStack
+from functools import partial
+from io import BytesIO
+
+try:
+    from aiobotocore.session import get_session # optional, only needed for AsyncS3BucketConnector
+except ImportError:
+    get_session = None
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from ETL_sc.common.connector import DataFrameFormats, S3ObjectInfo
+from ETL_sc.common.constants import DtypeProfile, S3ObjectMetadata
+
+
+class AsyncS3BucketConnector(DataFrameFormats):
+    """
+    Class for interacting with a specified AWS S3 bucket from asyncio code.
+    Used as async context manager, which opens and closes the client of the bucket.
+    """
+
+    read_cache = None
+
+    def __init__(self, access_key: str, secret_key: str, endpoint_url: str, bucket_name: str,
+                 max_concurrency: int = 64, max_attempts: int = 5, executor=None):
+        """
+        Constructor for AsyncS3BucketConnector
+
+        :param access_key: access key for accessing S3
+        :param secret_key: secret key for accessing S3
+        :param endpoint_url: endpoint url to S3
+        :param bucket_name: S3 bucket name to connect to
+        :param max_concurrency: maximum number of requests in flight
+        :param max_attempts: attempts per request, 1 disables retries
+        :param executor: executor for parsing and writing DataFrames (None = default executor of the loop)
+        """
+        if get_session is None:
+            raise ImportError('The aiobotocore package is needed for the asyncio S3 connector')
+        self._logger = logging.getLogger(__name__)
+        self.endpoint_url = endpoint_url
+        self.bucket_name = bucket_name
+        self.max_concurrency = max_concurrency
+        self.executor = executor
+        self.location = f'{endpoint_url}/{bucket_name}'
+        self._client_args = {
+            'service_name': 's3', 'endpoint_url': endpoint_url,
+            'aws_access_key_id': os.environ[access_key], 'aws_secret_access_key': os.environ[secret_key],
+            'config': Config(retries={'total_max_attempts': max_attempts, 'mode': 'standard'},
+                             max_pool_connections=max_concurrency)}
+        self._client = None
+        self._exit_stack = None
+        self._semaphore = None
+        self.no_such_key = None
+
+    async def __aenter__(self):
+        """Opens the client of the bucket"""
+        self._exit_stack = AsyncExitStack()
+        self._client = await self._exit_stack.enter_async_context(get_session().create_client(**self._client_args))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.no_such_key = self._client.exceptions.NoSuchKey
+        return self
+
+    async def __aexit__(self, *exc_info):
+        """Closes the client of the bucket"""
+        await self._exit_stack.aclose()
+        self._client = None
+
+    async def _run_in_executor(self, func, *args):
+        """Runs a CPU-bound function in the executor"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, partial(func, *args))
+
+    async def iter_objects_in_prefix(self, prefix: str):
+        """Iterates over the files/objects in the bucket with a specific prefix, together with their ETag and
+        size - page by page as they are listed
+
+        Args:
+            prefix (str): prefix on the S3 bucket that should be filtered with.
+
+        Yields:
+            S3ObjectInfo: files/objects containing the prefix in their key, sorted by key
+        """
+        kwargs = {'Bucket': self.bucket_name, 'Prefix': prefix}
+        while True:
+            async with self._semaphore:
+                page = await self._client.list_objects_v2(**kwargs)
+            for obj in page.get('Contents', []):
+                yield S3ObjectInfo(obj['Key'], obj['ETag'].strip('"'), obj['Size'])
+            if not page.get('IsTruncated'):
+                return
+            kwargs['ContinuationToken'] = page['NextContinuationToken']
+
+    async def list_objects_in_prefix(self, prefix: str):
+        """listing all files/objects in the bucket with a specific prefix, together with their ETag and size.
+
+        Args:
+            prefix (str): prefix on the S3 bucket that should be filtered with.
+
+        Returns:
+            list: list of S3ObjectInfo of all the files/objects containing the prefix in their key
+        """
+        return [obj async for obj in self.iter_objects_in_prefix(prefix)]
+
+    async def list_files_in_prefix(self, prefix: str):
+        """listing all files/objects in the bucket with a specific prefix.
+
+        Args:
+            prefix (str): prefix on the S3 bucket that should be filtered with.
+
+        Returns:
+            list: list of all the file/object names containing the prefix in their key
+        """
+        return [obj.key async for obj in self.iter_objects_in_prefix(prefix)]
+
+    async def _get_body(self, key: str):
+        """Get request of an object, including the read of the body"""
+        async with self._semaphore:
+            response = await self._client.get_object(Bucket=self.bucket_name, Key=key)
+            async with response['Body'] as stream:
+                return await stream.read()
+
+    async def read_bytes(self, key: str):
+        """Reading a file from the bucket as bytes
+
+        Args:
+            key (str): key of the file that should be read
+
+        Raises:
+            no_such_key: Raise when the key does not exist.
+
+        Returns:
+            bytes: content of the file
+        """
+        self._logger.info('Reading file %s/%s', self.location, key)
+        return await self._get_body(key)
+
+    async def read_csv_as_df(self, key: str, encoding: str = 'utf-8', sep = ',',
+                             dtype_profile: str = DtypeProfile.DEFAULT.value, compression: str = 'infer'):
+        """Reading the csv file from the bucket and returning the file as a dataframe, parsed in the executor.
+        Compressed csv files (gzip, zstd) are decompressed while parsing.
+
+        Args:
+            key (str): key of the file that should be read
+            encoding (str, optional): encoding of the data inside the csv file. Defaults to 'utf-8'.
+            sep (str, optional): seperator of the csv file. Defaults to ','.
+            dtype_profile (str, optional): dtype profile applied to the numeric columns, see DtypeProfile. Defaults to 'default'.
+            compression (str, optional): 'gzip', 'zstd', None or 'infer' (from the extension of key). Defaults to 'infer'.
+
+        Raises:
+            WrongFormatException: Raise when the dtype profile is not supported.
+
+        Returns:
+            data_frame: Pandas dataframe containing the data of the CSV file.
+        """
+        self._logger.info('Reading file %s/%s', self.location, key)
+        if compression == 'infer':
+            compression = self._csv_compression(key)
+        body = await self._get_body(key)
+        return await self._run_in_executor(self._csv_to_df, BytesIO(body), encoding, sep, dtype_profile, compression)
+
+    async def read_csvs_as_dfs(self, keys: list, **kwargs):
+        """Reading several csv files from the bucket concurrently (bounded by max_concurrency)
+
+        Args:
+            keys (list): keys of the files that should be read
+            kwargs: arguments passed to read_csv_as_df
+
+        Returns:
+            list: Pandas dataframes of the files, in the order of keys
+        """
+        return list(await asyncio.gather(*(self.read_csv_as_df(key, **kwargs) for key in keys)))
+
+    async def write_df_to_s3(self, data_frame, key: str, file_format: str, skip_unchanged: bool = False,
+                             compression_level: int = None, parquet_options: dict = None):
+        """Writing a pandas DF to the bucket, converted into .csv, .csv.gz, .csv.zst or .parquet in the executor
+
+        Args:
+            data_frame (pd.DataFrame): Dataframe that should be written to the bucket.
+            key (str): target key of the file to be saved into the bucket
+            file_format (str): format of the saved file. Either .csv, .csv.gz, .csv.zst or .parquet.
+            skip_unchanged (bool, optional): skip the upload if an object with the same content already exists under key. Defaults to False.
+            compression_level (int, optional): compression level of compressed csv files, None = library default. Defaults to None.
+            parquet_options (dict, optional): options of the parquet writer. Defaults to None.
+
+        Raises:
+            WrongFormatException: Raise when the file format is not supported.
+
+        Returns:
+            Boolean: True if the file is written (or unchanged), None if the dataframe is empty.
+        """
+        if data_frame.empty:
+            self._logger.info('The dataframe is empty! No file will be written!')
+            return None
+        body = await self._run_in_executor(self._df_to_bytes, data_frame, file_format, compression_level,
+                                           parquet_options)
+        return await self.write_bytes(key, body, skip_unchanged)
+
+    async def write_bytes(self, key: str, body: bytes, skip_unchanged: bool = False):
+        """Writing bytes as file to the bucket, the SHA-256 of the content is stored in the object metadata
+
+        Args:
+            key (str): target key of the file
+            body (bytes): content of the file
+            skip_unchanged (bool, optional): skip the upload if the existing object has the same content. Defaults to False.
+
+        Returns:
+            Boolean: indicates process is finished.
+        """
+        content_hash = hashlib.sha256(body).hexdigest()
+        if skip_unchanged and await self._is_unchanged(key, content_hash):
+            self._logger.info('File %s/%s is unchanged, upload skipped', self.location, key)
+            return True
+        self._logger.info('Writing file to %s/%s', self.location, key)
+        async with self._semaphore:
+            await self._client.put_object(Bucket=self.bucket_name, Key=key, Body=body,
+                                          Metadata={S3ObjectMetadata.CONTENT_SHA256.value: content_hash})
+        return True
+
+    async def _is_unchanged(self, key: str, content_hash: str):
+        """Compares the content hash with the content hash in the metadata of the existing object
+
+        Args:
+            key (str): key of the existing object
+            content_hash (str): SHA-256 of the content that should be written
+
+        Returns:
+            Boolean: True if an object with the same content exists under key
+        """
+        try:
+            async with self._semaphore:
+                head = await self._client.head_object(Bucket=self.bucket_name, Key=key)
+        except ClientError as error:
+            if error.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+        return head.get('Metadata', {}).get(S3ObjectMetadata.CONTENT_SHA256.value) == content_hash
+
+    def request_stats(self):
+        """Statistics of the requests to the bucket - the retries are done by botocore and not counted
+
+        Returns:
+            dict: empty
+        """
+        return {}
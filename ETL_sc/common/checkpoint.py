@@ -0,0 +1,82 @@
+"""
+Methods for file-level checkpoints
+
+A checkpoint holds the partial aggregate of one processed source file. If a run dies during the extraction,
+the restarted run only reads the source files without a checkpoint and takes the partial aggregates of the
+other files from their checkpoints. The checkpoints are removed after the report and the meta-file are written.
+
+Note: source files without any rows result in no checkpoint - these are just read again (they are tiny).
+
+"""
+import logging
+
+import pandas as pd
+
+from ETL_sc.common.connector import BucketConnector
+from ETL_sc.common.constants import S3FileTypes
+
+
+class FileCheckpoint():
+    """Class for working with the checkpoints of one run"""
+
+    def __init__(self, prefix: str, s3_bucket_conn: BucketConnector):
+        """
+        Constructor for FileCheckpoint
+
+        Args:
+            prefix (str): prefix of the checkpoint files of the run on the S3 bucket
+            s3_bucket_conn (S3BucketConnector): BucketConnector for the bucket with the checkpoints
+        """
+        self._logger = logging.getLogger(__name__)
+        self.prefix = prefix
+        self.s3_bucket_conn = s3_bucket_conn
+
+    def checkpoint_key(self, source_key: str):
+        """Key of the checkpoint file for a source file
+
+        Args:
+            source_key (str): key of the source file
+
+        Returns:
+            str: key of the checkpoint file
+        """
+        return f'{self.prefix}{source_key}.{S3FileTypes.PARQUET.value}'
+
+    def processed_keys(self):
+        """Source keys that already have a checkpoint
+
+        Returns:
+            set: set of the source keys
+        """
+        suffix = f'.{S3FileTypes.PARQUET.value}'
+        return {key[len(self.prefix):-len(suffix)] for key in self.s3_bucket_conn.list_files_in_prefix(self.prefix)
+                if key.endswith(suffix)}
+
+    def read(self, source_key: str):
+        """Reads the checkpointed partial aggregate of a source file
+
+        Args:
+            source_key (str): key of the source file
+
+        Returns:
+            pd.DataFrame: partial aggregate
+        """
+        return self.s3_bucket_conn.read_parquet_as_df(self.checkpoint_key(source_key))
+
+    def write(self, source_key: str, data_frame: pd.DataFrame):
+        """Writes the partial aggregate of a processed source file as checkpoint
+
+        Args:
+            source_key (str): key of the source file
+            data_frame (pd.DataFrame): partial aggregate
+        """
+        return self.s3_bucket_conn.write_df_to_s3(data_frame, self.checkpoint_key(source_key),
+                                                  S3FileTypes.PARQUET.value)
+
+    def clear(self):
+        """Removes all checkpoints of the run"""
+        keys = self.s3_bucket_conn.list_files_in_prefix(self.prefix)
+        if keys:
+            self.s3_bucket_conn.delete_files(keys)
+            self._logger.info('%s checkpoint files removed.', len(keys))
+        return True
@@ -0,0 +1,576 @@
+"""Storage backend interface - base class for the bucket connectors (S3, local directory)
+
+pandas and numpy are imported in the methods that read or write DataFrames, so that listing and raw reads
+(e.g. the planning of a run) do not pay for importing them.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO, BytesIO
+from typing import NamedTuple, TYPE_CHECKING
+
+try:
+    import zstandard # optional, only needed for writing csv.zst files (pyarrow reads them)
+except ImportError:
+    zstandard = None
+
+from ETL_sc.common.constants import S3FileTypes, DtypeProfile, CsvCompression
+from ETL_sc.common.custom_exceptions import WrongFormatException
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class S3ObjectInfo(NamedTuple):
+    """
+    Class for the listing information of a file/object
+
+    key: key of the object
+    etag: ETag of the object (changes when the object is rewritten)
+    size: size of the object in bytes
+    """
+    key: str
+    etag: str
+    size: int
+
+
+class DataFrameFormats():
+    """
+    Conversion between the file formats and DataFrames (csv parsing, dtype profiles, compression, writers),
+    shared by the bucket connectors - the classes using it set self._logger
+    """
+
+    def _csv_to_df(self, data, encoding: str = 'utf-8', sep: str = ',',
+                   dtype_profile: str = DtypeProfile.DEFAULT.value, compression: str = None):
+        """Helper function for read_csv_as_df(). Parses the content of a csv file and applies the dtype profile.
+
+        Args:
+            data: binary file-like object with the content of the file
+            encoding (str, optional): encoding of the data inside the csv file. Defaults to 'utf-8'.
+            sep (str, optional): seperator of the csv file. Defaults to ','.
+            dtype_profile (str, optional): dtype profile applied to the numeric columns, see DtypeProfile. Defaults to 'default'.
+            compression (str, optional): 'gzip', 'zstd' or None. Defaults to None.
+
+        Raises:
+            WrongFormatException: Raise when the dtype profile is not supported.
+
+        Returns:
+            data_frame: Pandas dataframe containing the data of the CSV file.
+        """
+        if dtype_profile not in (DtypeProfile.DEFAULT.value, DtypeProfile.COMPACT.value):
+            self._logger.info('The dtype profile %s is not supported', dtype_profile)
+            raise WrongFormatException
+        return self._parse_csv(data, sep, encoding, compression, dtype_profile == DtypeProfile.COMPACT.value)
+
+    @staticmethod
+    def string_dtype():
+        """Arrow-backed pandas string dtype - with NaN as missing value (the default string dtype of pandas 3)
+        where the pandas version supports it
+
+        Returns:
+            pd.StringDtype: string dtype
+        """
+        import numpy as np
+        import pandas as pd
+
+        try:
+            return pd.StringDtype('pyarrow', na_value=np.nan)
+        except TypeError:
+            return pd.StringDtype('pyarrow')
+
+    def _parse_csv(self, data, sep: str, encoding: str, compression: str, compact: bool = False):
+        """Helper function for self.read_csv_as_df(). Parses a csv file with the Arrow csv reader.
+        Arrow infers date and time types where pandas keeps the text - the columns inferred as such (in a
+        sample of the file, or else in the whole file) are read as strings. Empty fields are missing values
+        (NaN), also in text columns, and columns without any value become float64 columns, as with pandas.
+
+        pandas.read_csv gives the same dtypes (with pandas 3), but its C parser is about 2.5x slower and
+        its pyarrow engine applies dtype= only after the Arrow inference (times like '09:00' come back
+        as '09:00:00').
+
+        Compressed files are decompressed by Arrow block by block while parsing (the sample separately),
+        the whole decompressed file is not held in memory.
+
+        Args:
+            data: binary file-like object with the content of the file
+            sep (str): seperator of the csv file
+            encoding (str): encoding of the data inside the csv file
+            compression (str): 'gzip', 'zstd' or None
+            compact (bool, optional): integer columns whose values fit into int32 are converted to int32 (in
+                Arrow, before the conversion to pandas), floating point columns stay float64. Defaults to False.
+
+        Raises:
+            pd.errors.EmptyDataError: Raise when the file is empty (as pandas.read_csv).
+
+        Returns:
+            data_frame: Pandas dataframe containing the data of the CSV file.
+        """
+        import pandas as pd
+        import pyarrow as pa
+        from pyarrow import csv as pa_csv
+
+        if isinstance(data, pa.NativeFile):
+            # e.g. a memory-mapped local file, without a copy
+            buffer = data.read_buffer()
+        else:
+            buffer = pa.py_buffer(data.read())
+        if compression is not None:
+            def open_body():
+                return pa.CompressedInputStream(pa.BufferReader(buffer), compression)
+            sample = open_body().read(65536)
+        else:
+            def open_body():
+                return pa.BufferReader(buffer)
+            sample = buffer.slice(0, min(len(buffer), 65536)).to_pybytes()
+        if not sample:
+            raise pd.errors.EmptyDataError('No columns to parse from file')
+
+        def read(body, string_columns):
+            return pa_csv.read_csv(body,
+                                   read_options=pa_csv.ReadOptions(encoding=encoding),
+                                   parse_options=pa_csv.ParseOptions(delimiter=sep),
+                                   convert_options=pa_csv.ConvertOptions(
+                                       column_types=dict.fromkeys(string_columns, pa.string()),
+                                       strings_can_be_null=True))
+        def temporal_columns(schema):
+            return [field.name for field in schema if pa.types.is_temporal(field.type)]
+
+        string_columns = temporal_columns(
+            read(pa.BufferReader(pa.py_buffer(sample[:sample.rfind(b'\n') + 1] or sample)), []).schema)
+        table = read(open_body(), string_columns)
+        if temporal_columns(table.schema):
+            # dates or times only after the sample
+            table = read(open_body(), string_columns + temporal_columns(table.schema))
+        if table.num_rows > 0:
+            table = table.cast(pa.schema([field.with_type(pa.float64()) if pa.types.is_null(field.type) else field
+                                          for field in table.schema]))
+        if compact:
+            table = self._downcast_integers(table)
+        string_dtype = self.string_dtype()
+        return table.to_pandas(types_mapper={pa.string(): string_dtype, pa.large_string(): string_dtype,
+                                             pa.null(): string_dtype}.get)
+
+    def _downcast_integers(self, table):
+        """Helper function for self._parse_csv(). Converts int64 columns to int32 when the observed values fit
+        into int32. Floating point columns are not converted - float32 prices would round differently.
+
+        Args:
+            table (pa.Table): freshly parsed table
+
+        Returns:
+            pa.Table: table with the compact integer types
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        int32_range = (-2 ** 31, 2 ** 31 - 1)
+        fields = []
+        for field, column in zip(table.schema, table.columns):
+            if pa.types.is_int64(field.type) and table.num_rows > 0:
+                min_max = pc.min_max(column)
+                if min_max['min'].is_valid and int32_range[0] <= min_max['min'].as_py() \
+                    and min_max['max'].as_py() <= int32_range[1]:
+                    field = field.with_type(pa.int32())
+            fields.append(field)
+        schema = pa.schema(fields)
+        if schema.equals(table.schema):
+            return table
+        compact_table = table.cast(schema)
+        self._logger.debug('Compact dtypes saved %s bytes', table.nbytes - compact_table.nbytes)
+        return compact_table
+
+    @staticmethod
+    def _csv_compression(key: str):
+        """Compression method of a csv file by the extension of its key or file format
+
+        Args:
+            key (str): key or file format of the file
+
+        Returns:
+            str: 'gzip', 'zstd' or None for uncompressed files
+        """
+        extension = key.rsplit('.', 1)[-1]
+        return next((method.name.lower() for method in CsvCompression if method.value == extension), None)
+
+    def _check_compression(self, compression: str):
+        """Checks that the library of a compression method is available for writing (pandas needs the
+        zstandard package for zstd, reading is done by pyarrow)
+
+        Args:
+            compression (str): compression method
+
+        Raises:
+            WrongFormatException: Raise when zstd is used without the zstandard package installed.
+        """
+        if compression == CsvCompression.ZSTD.name.lower() and zstandard is None:
+            self._logger.info('The zstandard package is needed for writing zstd compressed csv files')
+            raise WrongFormatException
+
+    def _df_to_bytes(self, data_frame: pd.DataFrame, file_format: str, compression_level: int = None,
+                     parquet_options: dict = None):
+        """Helper function for write_df_to_s3(). Converts a dataframe into the content of a .csv, .csv.gz,
+        .csv.zst or .parquet file.
+
+        Args:
+            data_frame (pd.DataFrame): Dataframe that should be converted.
+            file_format (str): format of the file. Either .csv, .csv.gz, .csv.zst or .parquet.
+            compression_level (int, optional): compression level of compressed csv files, None = library default. Defaults to None.
+            parquet_options (dict, optional): options of the parquet writer (compression, row_group_size, use_dictionary, write_statistics). Defaults to None.
+
+        Raises:
+            WrongFormatException: Raise when the file format is not supported.
+
+        Returns:
+            bytes: content of the file
+        """
+        if file_format == S3FileTypes.CSV.value:
+            out_buffer = StringIO() #To handle data in memory - this is what pandas accepts (a buffer)
+            data_frame.to_csv(out_buffer, index=False)
+            return out_buffer.getvalue().encode('utf-8')
+        if file_format in (S3FileTypes.CSV_GZ.value, S3FileTypes.CSV_ZST.value):
+            compression = self._csv_compression(file_format)
+            self._check_compression(compression)
+            options = {'method': compression}
+            if compression == CsvCompression.GZIP.name.lower():
+                # fixed modification time in the gzip header, so that the content hash only depends on the data
+                options['mtime'] = 0
+                if compression_level is not None:
+                    options['compresslevel'] = compression_level
+            elif compression_level is not None:
+                options['level'] = compression_level
+            out_buffer = BytesIO()
+            data_frame.to_csv(out_buffer, index=False, compression=options)
+            return out_buffer.getvalue()
+        if file_format == S3FileTypes.PARQUET.value:
+            out_buffer = BytesIO()
+            data_frame.to_parquet(out_buffer, index=False, **(parquet_options or {}))
+            return out_buffer.getvalue()
+        self._logger.info('The file format %s is not supported supported to be written to S3', file_format)
+        raise WrongFormatException
+
+
+class BucketConnector(DataFrameFormats, ABC):
+    """
+    Base class for interacting with a bucket of a storage backend. Reading and writing of DataFrames
+    (formats, dtypes, content hashes) is implemented here, the backends implement the raw object access.
+
+    Attributes of the backends:
+        location (str): location of the bucket, used in the logs
+        no_such_key (Exception): exception class raised when reading a key that does not exist
+        max_concurrency (int): maximum number of files read concurrently by read_csvs_as_dfs
+
+    Attributes set when several jobs share the connector (see run.py):
+        io_pool (ThreadPoolExecutor): shared pool read_csvs_as_dfs reads the files with, instead of an own pool
+        read_cache (ReadCache): cache of the read objects, so that objects needed by several jobs are fetched once
+    """
+
+    location = ''
+    no_such_key = FileNotFoundError
+    max_concurrency = 1
+    io_pool = None
+    read_cache = None
+
+    def __init__(self):
+        """
+        Constructor for BucketConnector
+        """
+        self._logger = logging.getLogger(self.__module__)
+
+    @abstractmethod
+    def list_objects_in_prefix(self, prefix: str):
+        """listing all files/objects in the bucket with a specific prefix, together with their ETag and size.
+
+        Args:
+            prefix (str): prefix on the bucket that should be filtered with.
+
+        Returns:
+            list: list of S3ObjectInfo of all the files/objects containing the prefix in their key, sorted by key
+        """
+
+    @abstractmethod
+    def delete_files(self, keys: list):
+        """Deleting files/objects from the bucket
+
+        Args:
+            keys (list): keys of the files that should be deleted
+
+        Returns:
+            Boolean: indicates process is finished.
+        """
+
+    @abstractmethod
+    def _open(self, key: str):
+        """Opens an object for reading
+
+        Args:
+            key (str): key of the object
+
+        Raises:
+            no_such_key: Raise when the key does not exist.
+
+        Returns:
+            binary file-like object with the content of the object
+        """
+
+    @abstractmethod
+    def _write_bytes(self, key: str, body: bytes, content_hash: str):
+        """Writes an object
+
+        Args:
+            key (str): key of the object
+            body (bytes): content of the object
+            content_hash (str): SHA-256 of body
+        """
+
+    @abstractmethod
+    def _is_unchanged(self, key: str, body: bytes, content_hash: str):
+        """Compares the content with the existing object
+
+        Args:
+            key (str): key of the existing object
+            body (bytes): content that should be written
+            content_hash (str): SHA-256 of body
+
+        Returns:
+            Boolean: True if an object with the same content exists under key
+        """
+
+    @abstractmethod
+    def _read_with_etag(self, key: str):
+        """Reads an object together with the ETag for a conditional write (put_if_match)
+
+        Args:
+            key (str): key of the object
+
+        Raises:
+            no_such_key: Raise when the key does not exist.
+
+        Returns:
+            tuple: content (bytes) and ETag (str) of the object
+        """
+
+    @abstractmethod
+    def _write_conditional(self, key: str, body: bytes, etag: str = None):
+        """Writes an object atomically only if it does not exist (etag None) or still has the ETag etag
+
+        Args:
+            key (str): key of the object
+            body (bytes): content of the object
+            etag (str, optional): ETag the existing object must have. Defaults to None.
+
+        Returns:
+            str: ETag of the written object, None if the condition is not met
+        """
+
+    def _read(self, key: str):
+        """Opens an object for reading, through the read cache if there is one
+
+        Args:
+            key (str): key of the object
+
+        Returns:
+            binary file-like object with the content of the object
+        """
+        if self.read_cache is None:
+            return self._open(key)
+        def fetch():
+            with self._open(key) as data:
+                return data.read()
+        return BytesIO(self.read_cache.get(key, fetch))
+
+    def _read_arrow(self, key: str):
+        """Opens an object for parsing with Arrow (csv and parquet) - as _read, connectors with a way to
+        hand the content to Arrow without a copy override it
+
+        Args:
+            key (str): key of the object
+
+        Returns:
+            binary file-like object (or pyarrow NativeFile) with the content of the object
+        """
+        return self._read(key)
+
+    def list_files_in_prefix(self, prefix: str):
+        """listing all files/objects in the bucket with a specific prefix.
+
+        Args:
+            prefix (str): prefix on the bucket that should be filtered with.
+
+        Returns:
+            list: list of all the file/object names containing the prefix in their key
+        """
+        return [obj.key for obj in self.list_objects_in_prefix(prefix)]
+
+    def read_csv_as_df(self, key: str, encoding: str = 'utf-8', sep = ',', dtype_profile: str = DtypeProfile.DEFAULT.value,
+                       compression: str = 'infer'):
+        """Reading the csv file from the bucket and returning the file as a dataframe.
+        Compressed csv files (gzip, zstd) are decompressed while parsing.
+
+        The file is parsed by the Arrow csv reader: text columns are Arrow-backed strings (no Python object
+        per cell), numeric columns are inferred as by pandas (int64, float64, bool).
+
+        Args:
+            key (str): key of the file that should be read
+            encoding (str, optional): encoding of the data inside the csv file. Defaults to 'utf-8'.
+            sep (str, optional): seperator of the csv file. Defaults to ','.
+            dtype_profile (str, optional): dtype profile applied to the numeric columns, see DtypeProfile. Defaults to 'default'.
+            compression (str, optional): 'gzip', 'zstd', None or 'infer' (from the extension of key). Defaults to 'infer'.
+
+        Raises:
+            WrongFormatException: Raise when the dtype profile is not supported.
+
+        Returns:
+            data_frame: Pandas dataframe containing the data of the CSV file.
+        """
+        self._logger.info('Reading file %s/%s', self.location, key)
+
+        if compression == 'infer':
+            compression = self._csv_compression(key)
+        with self._read_arrow(key) as data:
+            return self._csv_to_df(data, encoding, sep, dtype_profile, compression)
+
+    def read_csvs_as_dfs(self, keys: list, **kwargs):
+        """Reading several csv files from the bucket, up to max_concurrency files at once
+        (or in the shared io_pool)
+
+        Args:
+            keys (list): keys of the files that should be read
+            kwargs: arguments passed to read_csv_as_df
+
+        Returns:
+            list: Pandas dataframes of the files, in the order of keys
+        """
+        if self.io_pool is not None:
+            return list(self.io_pool.map(lambda key: self.read_csv_as_df(key, **kwargs), keys))
+        if self.max_concurrency <= 1 or len(keys) <= 1:
+            return [self.read_csv_as_df(key, **kwargs) for key in keys]
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(keys))) as executor:
+            return list(executor.map(lambda key: self.read_csv_as_df(key, **kwargs), keys))
+
+    def request_stats(self):
+        """Statistics of the requests to the backend (requests, retries, throttles, timeouts),
+        empty for backends without retries
+
+        Returns:
+            dict: counts per statistic
+        """
+        return {}
+
+    def read_parquet_as_df(self, key: str):
+        """Reading the parquet file from the bucket and returning the file as a dataframe
+
+        Args:
+            key (str): key of the file that should be read
+
+        Returns:
+            data_frame: Pandas dataframe containing the data of the parquet file.
+        """
+        import pandas as pd
+
+        self._logger.info('Reading file %s/%s', self.location, key)
+        with self._read_arrow(key) as data:
+            return pd.read_parquet(data)
+
+    def write_df_to_s3(self, data_frame: pd.DataFrame, key: str, file_format: str, skip_unchanged: bool = False,
+                       compression_level: int = None, parquet_options: dict = None):
+        """Writing a pandas DF to the bucket, first converting it into .CSV or .Parquet before storing.
+        Supported formats: .csv, .csv.gz, .csv.zst, .parquet
+
+        Args:
+            data_frame (pd.DataFrame): Dataframe that should be written to the bucket.
+            key (str): target key of the file to be saved into the bucket
+            file_format (str): format of the saved file. Either .csv, .csv.gz, .csv.zst or .parquet.
+            skip_unchanged (bool, optional): skip the upload if an object with the same content already exists under key. Defaults to False.
+            compression_level (int, optional): compression level of compressed csv files, None = library default. Defaults to None.
+            parquet_options (dict, optional): options of the parquet writer (compression, row_group_size, use_dictionary, write_statistics). Defaults to None.
+
+        Raises:
+            WrongFormatException: Raise when the file format is not supported.
+
+        Returns:
+            Boolean: True if the file is written (or unchanged), None if the dataframe is empty.
+        """
+
+        if data_frame.empty:
+            self._logger.info('The dataframe is empty! No file will be written!')
+            return None
+        body = self._df_to_bytes(data_frame, file_format, compression_level, parquet_options)
+        return self.write_bytes(key, body, skip_unchanged)
+
+    def read_bytes(self, key: str):
+        """Reading a file from the bucket as bytes
+
+        Args:
+            key (str): key of the file that should be read
+
+        Raises:
+            no_such_key: Raise when the key does not exist.
+
+        Returns:
+            bytes: content of the file
+        """
+        self._logger.info('Reading file %s/%s', self.location, key)
+        with self._read(key) as data:
+            return data.read()
+
+    def write_bytes(self, key: str, body: bytes, skip_unchanged: bool = False):
+        """Writing bytes as file to the bucket
+
+        Args:
+            key (str): target key of the file
+            body (bytes): content of the file
+            skip_unchanged (bool, optional): skip the upload if the existing object has the same content. Defaults to False.
+
+        Returns:
+            Boolean: indicates process is finished.
+        """
+        content_hash = hashlib.sha256(body).hexdigest()
+        if skip_unchanged and self._is_unchanged(key, body, content_hash):
+            self._logger.info('File %s/%s is unchanged, upload skipped', self.location, key)
+            return True
+        self._logger.info('Writing file to %s/%s', self.location, key)
+        self._write_bytes(key, body, content_hash)
+        return True
+
+    def read_bytes_with_etag(self, key: str):
+        """Reading a file from the bucket as bytes, together with its ETag for put_if_match
+
+        Args:
+            key (str): key of the file that should be read
+
+        Raises:
+            no_such_key: Raise when the key does not exist.
+
+        Returns:
+            tuple: content (bytes) and ETag (str) of the file
+        """
+        return self._read_with_etag(key)
+
+    def put_if_absent(self, key: str, body: bytes):
+        """Writing bytes as file to the bucket only if no file exists under key
+
+        Args:
+            key (str): target key of the file
+            body (bytes): content of the file
+
+        Returns:
+            str: ETag of the written file, None if the file already exists
+        """
+        return self._write_conditional(key, body)
+
+    def put_if_match(self, key: str, body: bytes, etag: str):
+        """Writing bytes as file to the bucket only if the existing file still has the ETag etag
+        (i.e. nobody else wrote it since it was read with read_bytes_with_etag)
+
+        Args:
+            key (str): target key of the file
+            body (bytes): content of the file
+            etag (str): ETag of the file when it was read
+
+        Returns:
+            str: ETag of the written file, None if the file was changed or removed
+        """
+        return self._write_conditional(key, body, etag)
@@ -7,6 +7,33 @@ class S3FileTypes(Enum):
 
     CSV = 'csv'
     PARQUET = 'parquet'
+    CSV_GZ = 'csv.gz'
+    CSV_ZST = 'csv.zst'
+
+
+class CsvCompression(Enum):
+    """Compression methods (pandas names) of the compressed csv file types, by file extension"""
+
+    GZIP = 'gz'
+    ZSTD = 'zst'
+
+
+class S3ObjectMetadata(Enum):
+    """User metadata keys written by S3BucketConnector"""
+
+    CONTENT_SHA256 = 'content-sha256'
+
+
+class DtypeProfile(Enum):
+    """Dtype profiles supported by S3BucketConnector.read_csv_as_df
+
+    default: dtypes as inferred by pandas (float64, int64)
+    compact: int32 for integer columns whose values fit (else int64), chosen while parsing - floating point
+             columns stay float64, as float32 prices do not round to the same report values
+    """
+
+    DEFAULT = 'default'
+    COMPACT = 'compact'
 
 
 class MetaProcessFormat(Enum):
@@ -17,3 +44,49 @@ class MetaProcessFormat(Enum):
     META_FILE_DATE_COL = 'source_file_date'
     META_PROCESSED_COL = 'datetime_of_processing'
     META_FILE_FORMAT = 'csv'
+
+
+class DataFrameAttrs(Enum):
+    """Keys used in DataFrame.attrs to pass information about the extracted data from the
+    extract to the transform stage of the ETL job"""
+    SRC_TIME_ORDERED = 'src_time_ordered'
+
+
+class Report1Partials(Enum):
+    """Column names (besides the group keys and the target price and volume columns) of the
+    partial aggregates used for report 1, see report1_partials.py"""
+    FIRST_TIME = 'first_time'
+    LAST_TIME = 'last_time'
+
+
+class Leaderboard(Enum):
+    """Boards and column names of the per-day leaderboard of report 1, see leaderboard.py"""
+    GAINERS = 'gainers'
+    LOSERS = 'losers'
+    VOLUME_LEADERS = 'volume_leaders'
+    BOARD_COL = 'board'
+    RANK_COL = 'rank'
+    FILE_FORMAT = 'csv'
+
+
+class DayStateFormat(Enum):
+    """File names and format of the stored day state of the incremental mode, see day_state.py"""
+    MANIFEST_FILE = 'manifest.parquet'
+    PARTIALS_FILE = 'partials.parquet'
+    FILE_FORMAT = 'parquet'
+
+
+class RetryErrorCodes(Enum):
+    """S3 error codes of requests that are retried, see retry.py - throttling (the number of requests
+    in flight is lowered) and transient server side errors"""
+    THROTTLE = ('SlowDown', 'Throttling', 'ThrottlingException', 'RequestLimitExceeded', 'TooManyRequests', '503')
+    TIMEOUT = ('RequestTimeout', 'RequestTimeoutException', 'InternalError', 'ServiceUnavailable', '500')
+
+
+class PlanEstimates(Enum):
+    """Rough throughput figures used by the planner (planner.py) to estimate the wall time of a run"""
+    REQUEST_LATENCY = 0.03 # seconds until the first byte of a request
+    STREAM_THROUGHPUT = 40e6 # bytes per second of one download stream
+    PARSE_THROUGHPUT = 60e6 # bytes per second of csv parsing
+    LIST_PAGE_SIZE = 1000 # keys per listing request
+    TARGET_REQUESTS = 4 # meta-file read and write, target check and write
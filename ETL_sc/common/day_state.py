@@ -0,0 +1,134 @@
+"""
+Methods for the stored day state of the incremental mode
+
+Per source date the state consists of
+- the manifest: the source keys that are already processed, with their ETag and size
+- the partial aggregates (see report1_partials.py) merged over all processed source files of the date
+
+The partial aggregates are written before the manifest, so the manifest never lists files
+that are not part of the stored partial aggregates.
+
+A DayState instance keeps the states of the most recently used dates it has read or written in memory
+(e.g. for the long-running watch mode, which only touches the latest dates), so it assumes to be the only
+writer of the states under its prefix.
+
+"""
+import logging
+
+import pandas as pd
+
+from ETL_sc.common.connector import BucketConnector, S3ObjectInfo
+from ETL_sc.common.constants import DayStateFormat
+
+
+class DayState():
+    """Class for working with the stored day states"""
+
+    def __init__(self, prefix: str, s3_bucket_conn: BucketConnector, max_cached_dates: int = 4):
+        """
+        Constructor for DayState
+
+        Args:
+            prefix (str): prefix of the day states on the S3 bucket
+            s3_bucket_conn (S3BucketConnector): BucketConnector for the bucket with the day states
+            max_cached_dates (int, optional): number of dates whose states are kept in memory (least recently
+                used dates are evicted). Defaults to 4 (today, yesterday and their previous trading days).
+        """
+        self._logger = logging.getLogger(__name__)
+        self.prefix = prefix
+        self.s3_bucket_conn = s3_bucket_conn
+        self.max_cached_dates = max_cached_dates
+        self._manifests = {}
+        self._partials = {}
+        self._dates = None
+
+    def _cache(self, cache: dict, date: str, value=None):
+        """Stores (or, without value, marks as used) the state of a date in a cache and evicts the least
+        recently used dates beyond max_cached_dates
+
+        Args:
+            cache (dict): cache of the manifests or partial aggregates, in order of use
+            date (str): source date
+            value (optional): state of the date. Defaults to None (the cached state).
+
+        Returns:
+            the state of the date
+        """
+        value = cache.pop(date) if value is None else value
+        cache[date] = value
+        while len(cache) > self.max_cached_dates:
+            del cache[next(iter(cache))]
+        return value
+
+    def manifest_key(self, date: str):
+        """Key of the manifest of a date"""
+        return f'{self.prefix}{date}/{DayStateFormat.MANIFEST_FILE.value}'
+
+    def partials_key(self, date: str):
+        """Key of the partial aggregates of a date"""
+        return f'{self.prefix}{date}/{DayStateFormat.PARTIALS_FILE.value}'
+
+    def dates(self):
+        """Dates that have a stored state
+
+        Returns:
+            list: sorted list of the dates
+        """
+        if self._dates is None:
+            suffix = f'/{DayStateFormat.MANIFEST_FILE.value}'
+            self._dates = {key[len(self.prefix):-len(suffix)] for key in self.s3_bucket_conn.list_files_in_prefix(self.prefix)
+                           if key.endswith(suffix)}
+        return sorted(self._dates)
+
+    def read_manifest(self, date: str):
+        """Reads the manifest of a date
+
+        Args:
+            date (str): source date
+
+        Returns:
+            dict: source key -> S3ObjectInfo of the processed files, empty if there is no state
+        """
+        if date in self._manifests:
+            return dict(self._cache(self._manifests, date))
+        try:
+            df_manifest = self.s3_bucket_conn.read_parquet_as_df(self.manifest_key(date))
+            manifest = {row.key: S3ObjectInfo(row.key, row.etag, int(row.size))
+                        for row in df_manifest.itertuples(index=False)}
+        except self.s3_bucket_conn.no_such_key:
+            manifest = {}
+        return dict(self._cache(self._manifests, date, manifest))
+
+    def read_partials(self, date: str):
+        """Reads the partial aggregates of a date
+
+        Args:
+            date (str): source date
+
+        Returns:
+            pd.DataFrame: merged partial aggregates, empty if there is no state
+        """
+        if date in self._partials:
+            return self._cache(self._partials, date)
+        try:
+            partials = self.s3_bucket_conn.read_parquet_as_df(self.partials_key(date))
+        except self.s3_bucket_conn.no_such_key:
+            partials = pd.DataFrame()
+        return self._cache(self._partials, date, partials)
+
+    def write(self, date: str, partials: pd.DataFrame, manifest: dict):
+        """Writes the state of a date - first the partial aggregates, then the manifest
+
+        Args:
+            date (str): source date
+            partials (pd.DataFrame): merged partial aggregates of the date
+            manifest (dict): source key -> S3ObjectInfo of the processed files
+        """
+        self.s3_bucket_conn.write_df_to_s3(partials, self.partials_key(date), DayStateFormat.FILE_FORMAT.value)
+        df_manifest = pd.DataFrame(list(manifest.values()), columns=list(S3ObjectInfo._fields))
+        self.s3_bucket_conn.write_df_to_s3(df_manifest, self.manifest_key(date), DayStateFormat.FILE_FORMAT.value)
+        self._cache(self._partials, date, partials)
+        self._cache(self._manifests, date, dict(manifest))
+        if self._dates is not None:
+            self._dates.add(date)
+        return True
@@ -0,0 +1,222 @@
+"""Connector and methods accessing a local directory as bucket (e.g. a local mirror of the source bucket)"""
+
+import fcntl
+import hashlib
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from io import BytesIO
+
+from ETL_sc.common.connector import BucketConnector, S3ObjectInfo
+
+
+class LocalBucketConnector(BucketConnector):
+    """
+    Class for interacting with a local directory as bucket - the keys are paths relative to the root directory.
+    Files are memory-mapped for reading, writes go to a temporary file that is atomically renamed.
+    Conditional writes are serialized with a lock file per directory; their ETag is the MD5 of the content.
+    """
+
+    def __init__(self, root_dir: str):
+        """
+        Constructor for LocalBucketConnector
+
+        :param root_dir: root directory of the bucket
+        """
+        super().__init__()
+        self.root_dir = os.path.abspath(root_dir)
+        self.location = self.root_dir
+        self.no_such_key = FileNotFoundError
+
+    def _path(self, key: str):
+        """Path of the file of a key"""
+        return os.path.join(self.root_dir, *key.split('/'))
+
+    def list_objects_in_prefix(self, prefix: str):
+        """listing all files in the directory with a specific prefix, together with their ETag and size.
+        The ETag is derived from the modification time and the size of the file.
+
+        Args:
+            prefix (str): prefix that should be filtered with.
+
+        Returns:
+            list: list of S3ObjectInfo of all the files containing the prefix in their key, sorted by key
+        """
+        # only the entries of the directory of the prefix that start with the rest of the prefix are walked
+        # (e.g. only the directory of the date for a date prefix, not the whole bucket)
+        dir_key, _, name_prefix = prefix.rpartition('/')
+        try:
+            entries = [entry for entry in os.scandir(self._path(dir_key) if dir_key else self.root_dir)
+                       if entry.name.startswith(name_prefix)]
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+        objects = []
+        for entry in entries:
+            if entry.is_dir():
+                paths = [os.path.join(dir_path, file_name) for dir_path, _, file_names in os.walk(entry.path)
+                         for file_name in file_names]
+            else:
+                paths = [entry.path]
+            for path in paths:
+                if not os.path.basename(path).startswith('.tmp'):
+                    key = os.path.relpath(path, self.root_dir).replace(os.sep, '/')
+                    stat = os.stat(path)
+                    objects.append(S3ObjectInfo(key, f'{stat.st_mtime_ns:x}-{stat.st_size:x}', stat.st_size))
+        return sorted(objects)
+
+    def delete_files(self, keys: list):
+        """Deleting files from the directory
+
+        Args:
+            keys (list): keys of the files that should be deleted
+
+        Returns:
+            Boolean: indicates process is finished.
+        """
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+        return True
+
+    def _open(self, key: str):
+        """Memory-maps the file of a key for reading
+
+        Args:
+            key (str): key of the file
+
+        Raises:
+            FileNotFoundError: Raise when the key does not exist.
+
+        Returns:
+            mmap.mmap: read-only memory map of the file (BytesIO for empty files, these cannot be mapped)
+        """
+        with open(self._path(key), 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return BytesIO()
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _read_arrow(self, key: str):
+        """Opens the file of a key for parsing with Arrow - memory-mapped by Arrow, so that the parser reads
+        the mapped pages without a copy (through the read cache if there is one)
+
+        Args:
+            key (str): key of the file
+
+        Raises:
+            FileNotFoundError: Raise when the key does not exist.
+
+        Returns:
+            pa.MemoryMappedFile: read-only memory map of the file
+        """
+        if self.read_cache is not None:
+            return self._read(key)
+        import pyarrow as pa
+        return pa.memory_map(self._path(key))
+
+    def _write_bytes(self, key: str, body: bytes, content_hash: str):
+        """Writes the file of a key atomically - into a temporary file in the same directory which is renamed
+
+        Args:
+            key (str): key of the file
+            body (bytes): content of the file
+            content_hash (str): SHA-256 of body (not stored, the files are compared directly)
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        file_descriptor, tmp_path = tempfile.mkstemp(prefix='.tmp', dir=os.path.dirname(path))
+        try:
+            with os.fdopen(file_descriptor, 'wb') as file:
+                file.write(body)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    @contextmanager
+    def _dir_lock(self, path: str):
+        """Exclusive lock of the directory of path (for conditional writes), via a hidden lock file"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(os.path.join(os.path.dirname(path), '.tmp.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _read_with_etag(self, key: str):
+        """Reads the file of a key with the MD5 of its content as ETag
+
+        Args:
+            key (str): key of the file
+
+        Raises:
+            FileNotFoundError: Raise when the key does not exist.
+
+        Returns:
+            tuple: content (bytes) and ETag (str) of the file
+        """
+        with open(self._path(key), 'rb') as file:
+            body = file.read()
+        return body, hashlib.md5(body).hexdigest()
+
+    def _write_conditional(self, key: str, body: bytes, etag: str = None):
+        """Writes the file of a key only if it does not exist (etag None) or has the content MD5 etag.
+        A new file is hard-linked from a complete temporary file (fails if the file exists),
+        an existing one is replaced atomically.
+
+        Args:
+            key (str): key of the file
+            body (bytes): content of the file
+            etag (str, optional): MD5 of the content the existing file must have. Defaults to None.
+
+        Returns:
+            str: ETag of the written file, None if the condition is not met
+        """
+        path = self._path(key)
+        with self._dir_lock(path):
+            if etag is None:
+                file_descriptor, tmp_path = tempfile.mkstemp(prefix='.tmp', dir=os.path.dirname(path))
+                try:
+                    with os.fdopen(file_descriptor, 'wb') as file:
+                        file.write(body)
+                        file.flush()
+                        os.fsync(file.fileno())
+                    os.link(tmp_path, path)
+                except FileExistsError:
+                    return None
+                finally:
+                    os.remove(tmp_path)
+            else:
+                try:
+                    if self._read_with_etag(key)[1] != etag:
+                        return None
+                except FileNotFoundError:
+                    return None
+                self._write_bytes(key, body, '')
+        return hashlib.md5(body).hexdigest()
+
+    def _is_unchanged(self, key: str, body: bytes, content_hash: str):
+        """Compares the content with the existing file
+
+        Args:
+            key (str): key of the existing file
+            body (bytes): content that should be written
+            content_hash (str): SHA-256 of body
+
+        Returns:
+            Boolean: True if a file with the same content exists under key
+        """
+        try:
+            if os.path.getsize(self._path(key)) != len(body):
+                return False
+            with self._open(key) as data:
+                # the memory map is hashed without a copy, empty files are a BytesIO
+                content = data if isinstance(data, mmap.mmap) else data.getvalue()
+                return hashlib.sha256(content).hexdigest() == content_hash
+        except FileNotFoundError:
+            return False
@@ -5,11 +5,15 @@ The meta-file purpose is to hold checkpoint data of what day reports have been d
 Purpose is so that it can be used to keep track of already processed dates for auto-generating weekly
 reports, also without redundancy - dates that have already been done are not unnescarily processed again.
 
+The dates are planned without pandas (the meta-file is parsed with the csv module), pandas is only imported
+to update the meta-file.
+
 """
+import csv
 from datetime import datetime, timedelta
-from ETL_sc.common.s3 import S3BucketConnector
+from io import StringIO
+from ETL_sc.common.connector import BucketConnector
 from ETL_sc.common.constants import MetaProcessFormat
-import pandas as pd
 import collections
 from ETL_sc.common.custom_exceptions import *
 
@@ -17,14 +21,14 @@ class MetaProcess():
     """Class for woking with the meta file"""
 
     @staticmethod
-    def update_meta_file(extract_date_list: list, meta_key: str, s3_bucket_conn: S3BucketConnector):
+    def update_meta_file(extract_date_list: list, meta_key: str, s3_bucket_conn: BucketConnector):
         """
         Updating the meta-file with the processed Stock-data dates, and todays-date as prodcessed-date.
 
         Args:
             extract_date_list (list): A list of dates that are extracted from the source - these are meant to be processed and used to make-up the ETL stock-data report.
             meta_key (str): key/name of the meta-file on the S3 bucket
-            s3_bucket_conn (S3BucketConnector): S3BucketConnector for the bucket with the meta-file
+            s3_bucket_conn (S3BucketConnector): BucketConnector for the bucket with the meta-file
 
         Raises:
             WrongMetaFileException: Raise when the meta-file format is not correct.
@@ -33,6 +37,8 @@ class MetaProcess():
             Boolean: Return True if the update is successfull
         """
 
+        import pandas as pd
+
         #Preparing new data to add to meta_file
         #Creating an empty DataFrame using the meta-file column names.
         df_new = pd.DataFrame(columns=[
@@ -55,7 +61,7 @@ class MetaProcess():
                 #If meta file exists & in correct formar -> then union/appnend DataFrame of old and the new meta-data created.
                 df_all = pd.concat([df_old, df_new])
 
-        except s3_bucket_conn.session.client('s3').exceptions.NoSuchKey:
+        except s3_bucket_conn.no_such_key:
             # No meta-file exists -> then only the new data is used to create new meta-file
             df_all = df_new
 
@@ -64,7 +70,25 @@ class MetaProcess():
         return True
 
     @staticmethod
-    def return_date_list(first_date: str, meta_key: str, s3_bucket_meta: S3BucketConnector):
+    def return_meta_dates(meta_key: str, s3_bucket_meta: BucketConnector):
+        """
+        Reading the source dates in the meta-file (parsed with the csv module, without pandas)
+
+        Args:
+            meta_key (str): key of the meta_file on the S3 bucket
+            s3_bucket_meta (S3BucketConnector): BucketConnector for the bucket with the meta file
+
+        Raises:
+            no_such_key: Raise when the meta-file does not exist.
+
+        Returns:
+            set: set of the dates in the meta-file, as strings
+        """
+        meta_rows = csv.DictReader(StringIO(s3_bucket_meta.read_bytes(meta_key).decode('utf-8')))
+        return {row[MetaProcessFormat.META_FILE_DATE_COL.value] for row in meta_rows}
+
+    @staticmethod
+    def return_date_list(first_date: str, meta_key: str, s3_bucket_meta: BucketConnector):
         """
         Creating a list of dates (to be used to for extracting of correctly dated data into the ETL pipeline for transformation). List is based on the
         the input first_date and the already processed dates in the meta_file. Aim of algorithm is to avoid returning back a list of dates which contains
@@ -76,9 +100,9 @@ class MetaProcess():
         For intuitive overview of the logic of this algoirthm see: @/ETL_stock_project\proof-of-concept/Experimenting return_date_list
 
         Args:
-            first_date (str): The desired earliest date Stock data (Xetra) should be processed
+            first_date (str): The desired earliest date Stock data (of the venue) should be processed
             meta_key (str): key of the meta_file on the S3 bucket
-            s3_bucket_meta (S3BucketConnector): S3BucketConnector for the bucket with the meta file
+            s3_bucket_meta (S3BucketConnector): BucketConnector for the bucket with the meta file
 
         Returns:
             return_min_date (str): first date that should be processed (lower bound)
@@ -95,13 +119,9 @@ class MetaProcess():
 
         try: # If meta file exists in S3 bucket -> create return_date_list utilizing the content of the meta-file
 
-            #Reading meta-file
-            df_meta = s3_bucket_meta.read_csv_as_df(meta_key) #Would throw exception if non-existance of meta_file
-
-            #Create a set out of a list of datetime's taken from the 'source_date' column of df_meta
-            meta_dates_set = set(pd.to_datetime(
-                df_meta[MetaProcessFormat.META_FILE_DATE_COL.value]
-            ).dt.date)
+            #Reading meta-file and creating a set of datetime's taken from its 'source_date' column
+            meta_dates_set = {datetime.strptime(meta_date, MetaProcessFormat.META_FILE_DATE_FORMAT.value).date()
+                              for meta_date in MetaProcess.return_meta_dates(meta_key, s3_bucket_meta)} #Would throw exception if non-existance of meta_file
 
             #Creating a list of dates from first_date_minus1 until today
             dates_from_today_to_firstDayMinus1 = [first_date_minus1 + timedelta(days=x) for x in range(0, \
@@ -131,7 +151,7 @@ class MetaProcess():
                 return_min_date = datetime(2200,1,1).date()\
                     .strftime(MetaProcessFormat.META_FILE_DATE_FORMAT.value)
 
-        except s3_bucket_meta.session.client('s3').exceptions.NoSuchKey:
+        except s3_bucket_meta.no_such_key:
             #No meta-file found -> creating a date list from first_Date-1 day untiltoday
             return_min_date = first_date
             return_dates = [\
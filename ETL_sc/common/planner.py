@@ -0,0 +1,90 @@
+"""
+Methods for planning a run without running it (run.py --plan)
+
+The dates are planned from the meta-file as for a run, then the source is listed (once per month) and the
+number of objects, their size, the number of requests and a rough wall time are estimated from the
+configured concurrency and the figures in PlanEstimates. Neither pandas nor any source data is loaded.
+
+"""
+import logging
+import math
+from typing import NamedTuple
+
+from ETL_sc.common.connector import BucketConnector
+from ETL_sc.common.constants import PlanEstimates
+from ETL_sc.common.meta_process import MetaProcess
+
+
+class RunPlan(NamedTuple):
+    """
+    Class for the plan of a run
+
+    extract_date: first date of the report
+    dates: dates whose source files are read (including the day before extract_date)
+    objects: number of source objects
+    total_bytes: size of the source objects in bytes
+    requests: number of requests (listing, reads and target writes)
+    est_seconds: estimated wall time in seconds
+    """
+    extract_date: str
+    dates: list
+    objects: int
+    total_bytes: int
+    requests: int
+    est_seconds: float
+
+
+def plan_run(first_date: str, meta_key: str, s3_bucket_src: BucketConnector, s3_bucket_trg: BucketConnector):
+    """Plans a run - dates, source objects, requests and estimated wall time
+
+    Args:
+        first_date (str): first date that should be processed (src_first_extract_date)
+        meta_key (str): key of the meta-file in the target bucket
+        s3_bucket_src (BucketConnector): connector of the source bucket
+        s3_bucket_trg (BucketConnector): connector of the target bucket
+
+    Returns:
+        RunPlan: plan of the run
+    """
+    extract_date, dates = MetaProcess.return_date_list(first_date, meta_key, s3_bucket_trg)
+    if not dates:
+        return RunPlan(extract_date, [], 0, 0, 0, 0.0)
+    date_set = set(dates)
+    objects = []
+    list_requests = 0
+    for month in sorted({date[:7] for date in dates}):
+        listing = s3_bucket_src.list_objects_in_prefix(month)
+        list_requests += max(1, math.ceil(len(listing) / PlanEstimates.LIST_PAGE_SIZE.value))
+        objects.extend(obj for obj in listing if obj.key.split('/')[0] in date_set)
+
+    range_size = getattr(s3_bucket_src, 'range_size', 0)
+    get_requests = sum(math.ceil(obj.size / range_size) if range_size and obj.size > range_size else 1
+                       for obj in objects)
+    total_bytes = sum(obj.size for obj in objects)
+    concurrency = max(1, s3_bucket_src.max_concurrency)
+    latency = PlanEstimates.REQUEST_LATENCY.value
+    # listing is sequential, downloads run at the configured concurrency and overlap with parsing
+    download_seconds = (get_requests * latency + total_bytes / PlanEstimates.STREAM_THROUGHPUT.value) / concurrency
+    parse_seconds = total_bytes / PlanEstimates.PARSE_THROUGHPUT.value
+    est_seconds = (list_requests + PlanEstimates.TARGET_REQUESTS.value) * latency \
+        + max(download_seconds, parse_seconds)
+    return RunPlan(extract_date, dates, len(objects), total_bytes,
+                   list_requests + get_requests + PlanEstimates.TARGET_REQUESTS.value, est_seconds)
+
+
+def log_plan(plan: RunPlan, logger: logging.Logger = None, label: str = 'Plan'):
+    """Logs a plan
+
+    Args:
+        plan (RunPlan): plan of a run
+        logger (logging.Logger, optional): logger. Defaults to the logger of this module.
+        label (str, optional): label the log messages start with (e.g. the venue). Defaults to 'Plan'.
+    """
+    logger = logger or logging.getLogger(__name__)
+    if not plan.dates:
+        logger.info('%s: nothing to process, all dates are in the meta file.', label)
+        return
+    logger.info('%s: %s dates (%s to %s), report from %s', label, len(plan.dates), plan.dates[0], plan.dates[-1],
+                plan.extract_date)
+    logger.info('%s: %s source objects, %.1f MB, %s requests, about %.1f seconds', label,
+                plan.objects, plan.total_bytes / 1e6, plan.requests, plan.est_seconds)
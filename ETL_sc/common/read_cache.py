@@ -0,0 +1,80 @@
+"""
+Cache of the raw content of source objects shared by several jobs in one process
+
+Concurrent reads of the same key wait for the first fetch instead of fetching again, finished reads are kept
+up to max_bytes and evicted least recently used first. The cache assumes that the cached objects do not
+change while it is used (source files of past dates) - it is meant for the lifetime of one run.
+
+"""
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class ReadCache():
+    """Class for a bounded, thread-safe cache of object contents with de-duplication of concurrent reads"""
+
+    def __init__(self, max_bytes: int):
+        """
+        Constructor for ReadCache
+
+        Args:
+            max_bytes (int): maximum size of the cached contents in bytes
+        """
+        self._logger = logging.getLogger(__name__)
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._entries = OrderedDict()
+        self._size = 0
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, fetch):
+        """Content of a key - from the cache, from a concurrent fetch of the same key or fetched now
+
+        Args:
+            key (str): key of the object
+            fetch: function returning the content (bytes) of the object
+
+        Returns:
+            bytes: content of the object
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return self._entries[key]
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+                self.stats['misses'] += 1
+            else:
+                self.stats['hits'] += 1
+        if not owner:
+            return future.result()
+        try:
+            body = fetch()
+        except BaseException as error:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(error)
+            raise
+        with self._lock:
+            del self._in_flight[key]
+            if len(body) <= self.max_bytes:
+                self._entries[key] = body
+                self._size += len(body)
+                while self._size > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._size -= len(evicted)
+                    self.stats['evictions'] += 1
+        future.set_result(body)
+        return body
+
+    def clear(self):
+        """Removes all cached contents"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
@@ -0,0 +1,127 @@
+"""
+Adaptive concurrency control with retries for requests to S3
+
+The number of requests in flight is limited. When S3 throttles (SlowDown, 503) or requests time out, the limit
+is halved (at most once per second), after as many successful requests as the current limit it is raised by one
+again (additive increase, multiplicative decrease). Failed requests are retried with jittered exponential backoff.
+
+"""
+import logging
+import random
+import threading
+import time
+
+from botocore.exceptions import ClientError, ConnectionError as BotoConnectionError, \
+    ReadTimeoutError, ConnectTimeoutError
+
+from ETL_sc.common.constants import RetryErrorCodes
+
+
+class AdaptiveConcurrency():
+    """Class limiting and adapting the number of requests in flight, retrying failed requests"""
+
+    def __init__(self, max_concurrency: int, max_attempts: int = 5, base_delay: float = 0.1, max_delay: float = 10.0):
+        """
+        Constructor for AdaptiveConcurrency
+
+        Args:
+            max_concurrency (int): maximum number of requests in flight
+            max_attempts (int, optional): attempts per request (1 = no retries). Defaults to 5.
+            base_delay (float, optional): backoff of the first retry in seconds. Defaults to 0.1.
+            max_delay (float, optional): maximum backoff in seconds. Defaults to 10.0.
+        """
+        self._logger = logging.getLogger(__name__)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.limit = self.max_concurrency
+        self.stats = {'requests': 0, 'retries': 0, 'throttles': 0, 'timeouts': 0}
+        self._in_flight = 0
+        self._successes = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def call(self, func, *args, **kwargs):
+        """Calls func within the concurrency limit, retrying retryable errors
+
+        Args:
+            func: function doing the request
+            args, kwargs: arguments passed to func
+
+        Returns:
+            the return value of func
+        """
+        for attempt in range(self.max_attempts):
+            self._acquire()
+            congested = False
+            try:
+                return func(*args, **kwargs)
+            except Exception as error: # pylint: disable=broad-except
+                kind = self.classify(error)
+                if kind is None:
+                    raise
+                # also a throttle of the last attempt lowers the limit and is counted
+                congested = True
+                with self._condition:
+                    self.stats[kind] += 1
+                    if attempt == self.max_attempts - 1:
+                        raise
+                    self.stats['retries'] += 1
+            finally:
+                self._release(congested)
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+            self._logger.debug('Request failed (attempt %s), retrying in %.2f seconds.', attempt + 1, delay)
+            time.sleep(delay)
+        return None
+
+    @staticmethod
+    def classify(error: Exception):
+        """Classifies an error of a request
+
+        Args:
+            error (Exception): raised error
+
+        Returns:
+            str: 'throttles' or 'timeouts' for retryable errors, None otherwise
+        """
+        if isinstance(error, (ReadTimeoutError, ConnectTimeoutError, BotoConnectionError)):
+            return 'timeouts'
+        if isinstance(error, ClientError):
+            code = error.response.get('Error', {}).get('Code', '')
+            status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0)
+            if code in RetryErrorCodes.THROTTLE.value or status in (429, 503):
+                return 'throttles'
+            if code in RetryErrorCodes.TIMEOUT.value or status >= 500:
+                return 'timeouts'
+        return None
+
+    def _acquire(self):
+        """Waits until a request may be sent"""
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self._in_flight += 1
+            self.stats['requests'] += 1
+
+    def _release(self, congested: bool):
+        """Marks a request as finished and adapts the limit
+
+        Args:
+            congested (bool): True if the request was throttled or timed out
+        """
+        with self._condition:
+            self._in_flight -= 1
+            if congested:
+                self._successes = 0
+                now = time.monotonic()
+                if now - self._last_decrease >= 1.0 and self.limit > 1:
+                    self.limit = max(1, self.limit // 2)
+                    self._last_decrease = now
+                    self._logger.info('S3 is throttling, requests in flight lowered to %s.', self.limit)
+            else:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.max_concurrency:
+                    self.limit += 1
+                    self._successes = 0
+            self._condition.notify_all()
@@ -2,20 +2,27 @@
 
 from ETL_sc.common.custom_exceptions import *
 import os
-import logging
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 import boto3
-from io import StringIO, BytesIO
-import pandas as pd
-from ETL_sc.common.constants import S3FileTypes
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from io import BytesIO
+from ETL_sc.common.connector import BucketConnector, S3ObjectInfo
+from ETL_sc.common.constants import S3ObjectMetadata
+from ETL_sc.common.retry import AdaptiveConcurrency
 
-from botocore.vendored.six import StringIO
 
-class S3BucketConnector():
+class S3BucketConnector(BucketConnector):
     """
-    Class for interacting with a specified AWS S3 bucket
+    Class for interacting with a specified AWS S3 bucket.
+    All requests go through an AdaptiveConcurrency controller: throttled or timed out requests are retried
+    with jittered exponential backoff and the number of requests in flight adapts to the throttling.
+    Objects larger than range_size are downloaded in parallel byte ranges.
     """
 
-    def __init__(self, access_key: str, secret_key: str, endpoint_url: str, bucket_name: str):
+    def __init__(self, access_key: str, secret_key: str, endpoint_url: str, bucket_name: str,
+                 max_concurrency: int = 8, max_attempts: int = 5, range_size: int = 8 * 1024 * 1024):
         """
         Constructor for S3BucketConnector
 
@@ -23,86 +30,203 @@ class S3BucketConnector():
         :param secret_key: secret key for accessing S3
         :param endpoint_url: endpoint url to S3
         :param bucket_name: S3 bucket name to connect to
+        :param max_concurrency: maximum number of requests in flight (and files read concurrently)
+        :param max_attempts: attempts per request, 1 disables retries
+        :param range_size: size of the byte ranges of ranged downloads in bytes, 0 disables ranged downloads
         """
-        self._logger = logging.getLogger(__name__)
+        super().__init__()
         self.endpoint_url = endpoint_url
+        self.max_concurrency = max_concurrency
+        self.range_size = range_size
+        self.controller = AdaptiveConcurrency(max_concurrency, max_attempts)
+        # one pool for the range parts of all reads of the connector (also of the reads in a shared io_pool),
+        # so that concurrent ranged downloads share max_concurrency threads
+        self._range_pool = ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix='s3-range')
         self.session = boto3.Session(aws_access_key_id=os.environ[access_key],
                                      aws_secret_access_key=os.environ[secret_key])
+        # the retries of botocore are disabled, the controller retries and has to see the throttling
         self._s3 = self.session.resource(service_name='s3',
-                                         endpoint_url=endpoint_url) #single underline means protected variable, double underline means private variable. _s3 <- protected var data members of a class that can be accessed within the class and the classes derived from that class.
+                                         endpoint_url=endpoint_url,
+                                         config=Config(retries={'total_max_attempts': 1},
+                                                       max_pool_connections=max(10, max_concurrency))) #single underline means protected variable, double underline means private variable. _s3 <- protected var data members of a class that can be accessed within the class and the classes derived from that class.
+        # the client (unlike the resource) is thread-safe, it is used for the concurrent requests
+        self._client = self._s3.meta.client
         self._bucket = self._s3.Bucket(bucket_name)
+        self.location = f'{endpoint_url}/{bucket_name}'
+        self.no_such_key = self._s3.meta.client.exceptions.NoSuchKey
 
-    def list_files_in_prefix(self, prefix: str):
-        """listing all files/objects in an S3 bucket with a specific prefix.
+    def list_objects_in_prefix(self, prefix: str):
+        """listing all files/objects in an S3 bucket with a specific prefix, together with their ETag and size.
 
         Args:
             prefix (str): prefix on the S3 bucket that should be filtered with.
 
         Returns:
-            list: list of all the file/object names containing the prefix in their key
+            list: list of S3ObjectInfo of all the files/objects containing the prefix in their key
         """
-        files = [obj.key for obj in self._bucket.objects.filter(Prefix=prefix)]
-        return files #files names in reality
+        objects = []
+        kwargs = {'Bucket': self._bucket.name, 'Prefix': prefix}
+        while True:
+            page = self.controller.call(self._client.list_objects_v2, **kwargs)
+            objects.extend(S3ObjectInfo(obj['Key'], obj['ETag'].strip('"'), obj['Size'])
+                           for obj in page.get('Contents', []))
+            if not page.get('IsTruncated'):
+                return objects
+            kwargs['ContinuationToken'] = page['NextContinuationToken']
+
+    def delete_files(self, keys: list):
+        """Deleting files/objects from the S3 bucket (in batches of 1000 keys, the S3 limit per request)
 
-    def read_csv_as_df(self, key: str, encoding: str = 'utf-8', sep = ','):
-        """Reading the csv file from the S3 bucket and returning the file as a dataframe
+        Args:
+            keys (list): keys of the files that should be deleted
+
+        Returns:
+            Boolean: indicates process is finished.
+        """
+        for start in range(0, len(keys), 1000):
+            self.controller.call(self._client.delete_objects, Bucket=self._bucket.name, Delete={
+                'Objects': [{'Key': key} for key in keys[start:start + 1000]]
+            })
+        return True
+
+    def _open(self, key: str):
+        """Get the specified object using its key from the bucket, into memory.
+        The first byte range is requested; objects larger than that are completed by parallel ranged
+        requests (pinned to the ETag of the first response) into one preallocated buffer, which is
+        read in place without joining the parts.
+
+        Args:
+            key (str): key of the object
+
+        Returns:
+            BytesIO or pa.BufferReader: content of the object
+        """
+        if not self.range_size:
+            return BytesIO(self.controller.call(self._get_body, key))
+        try:
+            body, total_size, etag = self.controller.call(self._get_range, key, 0)
+        except ClientError as error:
+            # ranges of empty objects are not satisfiable
+            if error.response['Error']['Code'] != 'InvalidRange':
+                raise
+            return BytesIO(self.controller.call(self._get_body, key))
+        if total_size <= len(body):
+            return BytesIO(body)
+
+        buffer = bytearray(total_size)
+        view = memoryview(buffer)
+        view[:len(body)] = body
+        starts = range(len(body), total_size, self.range_size)
+
+        def get_part(start: int):
+            part, _, _ = self.controller.call(self._get_range, key, start, etag)
+            view[start:start + len(part)] = part
+            return len(part)
+
+        received = len(body) + sum(self._range_pool.map(get_part, starts))
+        if received != total_size:
+            raise IOError(f'Ranged download of {key} incomplete: {received} of {total_size} bytes')
+        self._logger.debug('Downloaded %s bytes in %s ranges', total_size, len(starts) + 1)
+        import pyarrow as pa
+        return pa.BufferReader(pa.py_buffer(buffer))
+
+    def _get_range(self, key: str, start: int, etag: str = None):
+        """Ranged get request of an object of range_size bytes, starting at start
 
         Args:
-            key (str): key of the file that should be read
-            encoding (str, optional): encoding of the data inside the csv file. Defaults to 'utf-8'.
-            sep (str, optional): seperator of the csv file. Defaults to ','.
+            key (str): key of the object
+            start (int): first byte of the range
+            etag (str, optional): ETag the object must still have. Defaults to None.
 
         Returns:
-            data_frame: Pandas dataframe containing the data of the CSV file.
+            tuple: content of the range, total size and ETag of the object
         """
-        self._logger.info('Reading file %s/%s/%s', self.endpoint_url, self._bucket.name, key)
+        kwargs = {'IfMatch': etag} if etag else {}
+        response = self._client.get_object(Bucket=self._bucket.name, Key=key,
+                                           Range=f'bytes={start}-{start + self.range_size - 1}', **kwargs)
+        body = response['Body'].read()
+        # without a Content-Range the whole object was returned
+        content_range = response.get('ContentRange')
+        total_size = int(content_range.rsplit('/', 1)[1]) if content_range else len(body)
+        return body, total_size, response.get('ETag')
+
+    def _get_body(self, key: str):
+        """Get request of an object, including the read of the body (a timeout while reading is retried too)"""
+        return self._client.get_object(Bucket=self._bucket.name, Key=key)['Body'].read()
+
+    def request_stats(self):
+        """Statistics of the requests to the bucket
 
-        csv_obj = self._bucket.Object(key=key).get().get('Body').read().decode(encoding) #Get the specified object using its key from the bucket.
-        data = StringIO(csv_obj) #Convert the CSV object into string format into memory - so that it can be used without saving into hdd (its the alternative accpeted by pandas)
-        data_frame = pd.read_csv(data, sep=sep)
-        return data_frame
+        Returns:
+            dict: counts of requests, retries, throttles and timeouts
+        """
+        return dict(self.controller.stats)
 
-    def write_df_to_s3(self, data_frame: pd.DataFrame, key: str, file_format: str):
-        """Writing a pandas DF to S3 bucket, first converting it into .CSV or .Parquet before storing.
-        Supported formats: .csv, .parquet
+    def _write_bytes(self, key: str, body: bytes, content_hash: str):
+        """Put file into the bucket, the SHA-256 of the content is stored in the object metadata.
 
         Args:
-            data_frame (pd.DataFrame): Dataframe that should be written to S3.
-            key (str): target key of the file to be saved into S3
-            file_format (str): format of the saved file. Either .csv or .parquet.
+            key (str): key of the object
+            body (bytes): content of the object
+            content_hash (str): SHA-256 of body
+        """
+        self.controller.call(self._client.put_object, Bucket=self._bucket.name, Body=body, Key=key,
+                             Metadata={S3ObjectMetadata.CONTENT_SHA256.value: content_hash})
 
-        Raises:
-            WrongFormatException: [description]
+    def _read_with_etag(self, key: str):
+        """Get the specified object with its ETag
+
+        Args:
+            key (str): key of the object
 
         Returns:
-            [type]: [description]
+            tuple: content (bytes) and ETag (str) of the object
         """
+        def get_object():
+            response = self._client.get_object(Bucket=self._bucket.name, Key=key)
+            return response['Body'].read(), response['ETag'].strip('"')
+        return self.controller.call(get_object)
 
-        if data_frame.empty:
-            self._logger.info('The dataframe is empty! No file will be written!')
-            return None
-        elif file_format == S3FileTypes.CSV.value:
-            out_buffer = StringIO() #To handle data in memory - this is what pandas accepts (a buffer)
-            data_frame.to_csv(out_buffer, index=False)
-            return self.__put_object(out_buffer, key)
-        elif file_format == S3FileTypes.PARQUET.value:
-            out_buffer = BytesIO()
-            data_frame.to_parquet(out_buffer, index=False)
-            return self.__put_object(out_buffer, key)
-        else:
-            self._logger.info('The file format %s is not supported supported to be written to S3', file_format)
-            raise WrongFormatException
-
-    def __put_object(self, out_buffer: StringIO or BytesIO, key: str):
-        """Helper function for self.write_df_to_s3(). Put file into target bucket.
+    def _write_conditional(self, key: str, body: bytes, etag: str = None):
+        """Conditional put of an object (If-None-Match: * or If-Match: etag)
 
         Args:
-            out_buffer (StringIOorBytesIO): Buffer that should be written to S3 bucket
-            key (str): target key of the saved-file
+            key (str): key of the object
+            body (bytes): content of the object
+            etag (str, optional): ETag the existing object must have. Defaults to None.
 
         Returns:
-            Boolean: indicates process is finished.
+            str: ETag of the written object, None if the condition is not met
         """
-        self._logger.info('Writing file to %s/%s/%s', self.endpoint_url, self._bucket.name, key)
-        self._bucket.put_object(Body = out_buffer.getvalue(), Key=key)
-        return True
+        condition = {'IfMatch': f'"{etag}"'} if etag else {'IfNoneMatch': '*'}
+        try:
+            response = self.controller.call(self._client.put_object, Bucket=self._bucket.name, Key=key,
+                                            Body=body, **condition)
+        except ClientError as error:
+            if error.response['Error']['Code'] in ('PreconditionFailed', 'ConditionalRequestConflict', 'NoSuchKey'):
+                return None
+            raise
+        return response['ETag'].strip('"')
+
+    def _is_unchanged(self, key: str, body: bytes, content_hash: str):
+        """Compares the content with the existing object - via the content hash in the metadata
+        or else via the ETag (MD5 for single part uploads).
+
+        Args:
+            key (str): key of the existing object
+            body (bytes): content that should be written
+            content_hash (str): SHA-256 of body
+
+        Returns:
+            Boolean: True if an object with the same content exists under key
+        """
+        try:
+            head = self.controller.call(self._client.head_object, Bucket=self._bucket.name, Key=key)
+        except ClientError as error:
+            if error.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+        existing_hash = head.get('Metadata', {}).get(S3ObjectMetadata.CONTENT_SHA256.value)
+        if existing_hash is not None:
+            return existing_hash == content_hash
+        return head.get('ETag', '').strip('"') == hashlib.md5(body).hexdigest()
@@ -0,0 +1,150 @@
+"""
+Methods for the SQLite sink of the report - an additional target for point and range queries
+
+The report rows are upserted into a SQLite database file which is published to the target bucket.
+The table has the primary key (ISIN, date) and is stored WITHOUT ROWID, i.e. clustered by ISIN and date,
+so that queries of an ISIN and a date range read only the matching rows. A second index on the date
+serves queries of a date range over all ISINs.
+
+The database file is downloaded from the bucket once and then kept in a local temporary file
+(e.g. for the long-running watch mode), so the sink assumes to be the only writer of the database.
+
+"""
+import logging
+import os
+import sqlite3
+import tempfile
+from itertools import islice
+
+import pandas as pd
+
+from ETL_sc.common.connector import BucketConnector
+
+
+class SqliteSink():
+    """Class for upserting report rows into a SQLite database file published to a bucket"""
+
+    def __init__(self, db_key: str, table: str, key_cols: list, s3_bucket_conn: BucketConnector,
+                 batch_size: int = 10000):
+        """
+        Constructor for SqliteSink
+
+        Args:
+            db_key (str): key of the database file on the bucket
+            table (str): name of the table of the report rows
+            key_cols (list): primary key columns (ISIN and date)
+            s3_bucket_conn (BucketConnector): BucketConnector for the bucket of the database file
+            batch_size (int, optional): rows per executemany batch. Defaults to 10000.
+        """
+        self._logger = logging.getLogger(__name__)
+        self.db_key = db_key
+        self.table = table
+        self.key_cols = key_cols
+        self.s3_bucket_conn = s3_bucket_conn
+        self.batch_size = batch_size
+        self._path = None
+        self._dirty = False
+
+    def _connect(self):
+        """Connects to the local copy of the database file, downloading it on the first call
+
+        Returns:
+            sqlite3.Connection: connection to the local database file
+        """
+        if self._path is None:
+            file_descriptor, self._path = tempfile.mkstemp(suffix='.sqlite')
+            with os.fdopen(file_descriptor, 'wb') as file:
+                try:
+                    file.write(self.s3_bucket_conn.read_bytes(self.db_key))
+                except self.s3_bucket_conn.no_such_key:
+                    self._logger.info('No SQLite database %s yet, a new one is created.', self.db_key)
+        return sqlite3.connect(self._path)
+
+    @staticmethod
+    def _quote(name: str):
+        """Quotes an identifier (the report columns contain characters like '%')"""
+        return '"' + name.replace('"', '""') + '"'
+
+    @staticmethod
+    def _sql_type(dtype):
+        """SQLite column type of a pandas dtype"""
+        if pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+            return 'INTEGER'
+        if pd.api.types.is_float_dtype(dtype):
+            return 'REAL'
+        return 'TEXT'
+
+    def upsert(self, data_frame: pd.DataFrame):
+        """Inserts the rows of a report into the table, replacing existing rows with the same ISIN and date.
+        The table and its indexes are created if they do not exist.
+
+        Args:
+            data_frame (pd.DataFrame): report rows
+
+        Returns:
+            int: number of upserted rows
+        """
+        if data_frame.empty:
+            return 0
+        columns = [self._quote(col) for col in data_frame.columns]
+        keys = [self._quote(col) for col in self.key_cols]
+        table = self._quote(self.table)
+        updates = [f'{col} = excluded.{col}' for col in columns if col not in keys]
+        sql_upsert = f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))}) '\
+            f'ON CONFLICT ({", ".join(keys)}) DO UPDATE SET {", ".join(updates)}'
+        # object dtype -> python scalars (sqlite3 cannot bind numpy scalars), missing values -> NULL
+        values = data_frame.astype(object).where(data_frame.notna(), None)
+        rows = values.itertuples(index=False, name=None)
+
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    f'CREATE TABLE IF NOT EXISTS {table} ('
+                    + ', '.join(f'{self._quote(col)} {self._sql_type(dtype)}'
+                                for col, dtype in data_frame.dtypes.items())
+                    + f', PRIMARY KEY ({", ".join(keys)})) WITHOUT ROWID')
+                connection.execute(f'CREATE INDEX IF NOT EXISTS {self._quote(f"ix_{self.table}_{self.key_cols[-1]}")} '
+                                   f'ON {table} ({keys[-1]})')
+                for batch in iter(lambda: list(islice(rows, self.batch_size)), []):
+                    connection.executemany(sql_upsert, batch)
+        finally:
+            connection.close()
+        self._dirty = True
+        self._logger.info('%s rows upserted into the SQLite table %s.', len(data_frame), self.table)
+        return len(data_frame)
+
+    def query(self, sql: str, params: tuple = ()):
+        """Runs a query on the local copy of the database
+
+        Args:
+            sql (str): SQL query
+            params (tuple, optional): parameters of the query. Defaults to ().
+
+        Returns:
+            pd.DataFrame: result of the query
+        """
+        connection = self._connect()
+        try:
+            return pd.read_sql_query(sql, connection, params=params)
+        finally:
+            connection.close()
+
+    def publish(self):
+        """Uploads the database file to the bucket if rows were upserted since the last upload
+
+        Returns:
+            Boolean: True if the database file is written
+        """
+        if not self._dirty:
+            return False
+        with open(self._path, 'rb') as file:
+            self.s3_bucket_conn.write_bytes(self.db_key, file.read(), skip_unchanged=True)
+        self._dirty = False
+        return True
+
+    def close(self):
+        """Removes the local copy of the database file"""
+        if self._path is not None:
+            os.remove(self._path)
+            self._path = None
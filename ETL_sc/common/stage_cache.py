@@ -0,0 +1,111 @@
+"""
+Methods for the local stage cache of the extracted source data
+
+The extract of a run is stored as an uncompressed Arrow IPC (Feather v2) file in a local directory, named by
+the run window and a fingerprint of its inputs: the keys and ETags of the source files, the source columns,
+the dtype profile and the source bucket. A later run with the same fingerprint memory-maps the file instead
+of extracting again - numeric columns are then backed by the mapped file without a copy. A changed or added
+source file changes the fingerprint, the stale files of the window are replaced by the new one.
+
+The cache is meant for iterating on the transformation over the same window (e.g. during development),
+it is a local directory and not shared between machines.
+
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+import pandas as pd
+
+FINGERPRINT_VERSION = 1
+FEATHER_SUFFIX = '.feather'
+
+
+class StageCache():
+    """Class for storing and reloading extracted data frames by the fingerprint of their inputs"""
+
+    def __init__(self, cache_dir: str):
+        """
+        Constructor for StageCache
+
+        Args:
+            cache_dir (str): local directory of the cache files
+        """
+        self._logger = logging.getLogger(__name__)
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def fingerprint(objects: list, **inputs):
+        """Fingerprint of the inputs of an extract
+
+        Args:
+            objects (list): S3ObjectInfo of the source files
+            **inputs: further inputs that change the extract (e.g. the source columns), JSON serializable
+
+        Returns:
+            str: hex digest of the inputs
+        """
+        content = {'version': FINGERPRINT_VERSION, 'objects': [[obj.key, obj.etag] for obj in objects],
+                   'inputs': inputs}
+        return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+    def _path(self, name: str, fingerprint: str):
+        """Path of the cache file of a window and fingerprint"""
+        return os.path.join(self.cache_dir, f'{name}_{fingerprint[:32]}{FEATHER_SUFFIX}')
+
+    def load(self, name: str, fingerprint: str):
+        """Loads the cached data frame of a window, memory-mapped
+
+        Args:
+            name (str): name of the window (e.g. venue and dates)
+            fingerprint (str): fingerprint of the inputs
+
+        Returns:
+            pd.DataFrame: the cached data frame with its attrs, None if there is none for the fingerprint
+        """
+        path = self._path(name, fingerprint)
+        if not os.path.exists(path):
+            return None
+        from pyarrow import feather
+        table = feather.read_table(path, memory_map=True)
+        attrs = json.loads((table.schema.metadata or {}).get(b'attrs', b'{}'))
+        data_frame = table.to_pandas(split_blocks=True)
+        data_frame.attrs.update(attrs)
+        self._logger.info('Extract of %s loaded from the stage cache %s.', name, path)
+        return data_frame
+
+    def save(self, name: str, fingerprint: str, data_frame: pd.DataFrame):
+        """Stores the data frame of a window and removes the stale cache files of the window
+
+        Args:
+            name (str): name of the window (e.g. venue and dates)
+            fingerprint (str): fingerprint of the inputs
+            data_frame (pd.DataFrame): extracted data frame (attrs are stored as well)
+
+        Returns:
+            str: path of the cache file
+        """
+        import pyarrow as pa
+        from pyarrow import feather
+        os.makedirs(self.cache_dir, exist_ok=True)
+        table = pa.Table.from_pandas(data_frame, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                               b'attrs': json.dumps(data_frame.attrs).encode()})
+        path = self._path(name, fingerprint)
+        # written to a temporary file and renamed, so that a crashed run leaves no partial cache file
+        file_descriptor, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp')
+        os.close(file_descriptor)
+        try:
+            feather.write_feather(table, tmp_path, compression='uncompressed')
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        for file_name in os.listdir(self.cache_dir):
+            stale = os.path.join(self.cache_dir, file_name)
+            if file_name.startswith(f'{name}_') and file_name.endswith(FEATHER_SUFFIX) and stale != path:
+                os.remove(stale)
+        self._logger.info('Extract of %s stored in the stage cache %s.', name, path)
+        return path
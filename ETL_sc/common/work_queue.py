@@ -0,0 +1,274 @@
+"""
+Methods for coordinating several workers (processes or containers) via work items in a bucket
+
+Under the prefix of a run
+- items/<item_id>.json: the work items (e.g. date ranges), published by any worker with put_if_absent
+- leases/<item_id>.json: the lease of a work item - worker, expiry time and whether the item is done
+
+A worker claims an item by creating its lease (put_if_absent) or by taking over an expired lease
+(put_if_match on the ETag it read), so only one worker holds a lease at a time. Workers renew their lease
+while working (LeaseHeartbeat) and mark the item done at the end. A conditional write that fails is checked by
+reading the lease again - a retried write whose first response was lost fails on its own change. The commit (e.g. the meta-file update) is a special
+item that can only be claimed once all work items are done, so it happens exactly once per run.
+
+Leases expire by the clock of the workers - lease_seconds has to be far above the clock skew between them.
+
+"""
+import json
+import logging
+import threading
+import time
+from typing import NamedTuple
+
+from ETL_sc.common.connector import BucketConnector
+
+COMMIT_ITEM = '_commit'
+
+
+class WorkItem(NamedTuple):
+    """
+    Class for a claimed work item
+
+    item_id: id of the work item
+    payload: payload of the work item (e.g. its dates)
+    etag: ETag of the lease held by the worker
+    """
+    item_id: str
+    payload: dict
+    etag: str
+
+
+class WorkQueue():
+    """Class for publishing, claiming and completing work items with leases in a bucket"""
+
+    def __init__(self, prefix: str, s3_bucket_conn: BucketConnector, worker_id: str, lease_seconds: float = 900):
+        """
+        Constructor for WorkQueue
+
+        Args:
+            prefix (str): prefix of the run on the bucket
+            s3_bucket_conn (BucketConnector): BucketConnector for the bucket with the work items
+            worker_id (str): unique id of this worker
+            lease_seconds (float, optional): seconds until a lease that is not renewed expires. Defaults to 900.
+        """
+        self._logger = logging.getLogger(__name__)
+        self.prefix = prefix
+        self.s3_bucket_conn = s3_bucket_conn
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self._items = {}
+
+    def item_key(self, item_id: str):
+        """Key of a work item"""
+        return f'{self.prefix}items/{item_id}.json'
+
+    def lease_key(self, item_id: str):
+        """Key of the lease of a work item"""
+        return f'{self.prefix}leases/{item_id}.json'
+
+    def publish(self, items: dict):
+        """Publishes work items - items that already exist (published by another worker) are kept
+
+        Args:
+            items (dict): payload (dict) per item id
+
+        Returns:
+            int: number of newly published items
+        """
+        published = sum(self.s3_bucket_conn.put_if_absent(self.item_key(item_id), json.dumps(payload).encode())
+                        is not None for item_id, payload in items.items())
+        self._logger.info('%s of %s work items published.', published, len(items))
+        return published
+
+    def items(self):
+        """Published work items
+
+        Returns:
+            dict: payload per item id
+        """
+        suffix = '.json'
+        for key in self.s3_bucket_conn.list_files_in_prefix(f'{self.prefix}items/'):
+            item_id = key[len(f'{self.prefix}items/'):-len(suffix)]
+            if item_id not in self._items:
+                self._items[item_id] = json.loads(self.s3_bucket_conn.read_bytes_with_etag(key)[0])
+        return dict(sorted(self._items.items()))
+
+    def _read_lease(self, item_id: str):
+        """Reads the lease of a work item
+
+        Returns:
+            tuple: lease (dict) and its ETag, (None, None) if the item has no lease
+        """
+        try:
+            body, etag = self.s3_bucket_conn.read_bytes_with_etag(self.lease_key(item_id))
+        except self.s3_bucket_conn.no_such_key:
+            return None, None
+        return json.loads(body), etag
+
+    def _lease_body(self, done: bool = False):
+        """Content of a lease of this worker"""
+        return json.dumps({'worker': self.worker_id, 'expires': time.time() + self.lease_seconds,
+                           'done': done}).encode()
+
+    def _held_etag(self, item_id: str, done: bool = False):
+        """Reads the lease again after a failed conditional write. The write may have succeeded and only its
+        response was lost - the retry of the request then fails on the ETag of its own write.
+
+        Args:
+            item_id (str): id of the work item
+            done (bool, optional): done flag of the failed write. Defaults to False.
+
+        Returns:
+            str: ETag of the lease if it is held by this worker (with the done flag of the write), else None
+        """
+        lease, etag = self._read_lease(item_id)
+        if lease is None or lease['worker'] != self.worker_id or lease['done'] != done:
+            return None
+        self._logger.info('Lease of work item %s is held by worker %s.', item_id, self.worker_id)
+        return etag
+
+    def _claim(self, item_id: str, payload: dict):
+        """Claims a work item that is not done and has no valid lease
+
+        Returns:
+            WorkItem: the claimed item, None if it cannot be claimed
+        """
+        lease, etag = self._read_lease(item_id)
+        if lease is None:
+            new_etag = (self.s3_bucket_conn.put_if_absent(self.lease_key(item_id), self._lease_body())
+                        or self._held_etag(item_id))
+        elif lease['done'] or lease['expires'] > time.time():
+            return None
+        else:
+            new_etag = (self.s3_bucket_conn.put_if_match(self.lease_key(item_id), self._lease_body(), etag)
+                        or self._held_etag(item_id))
+            if new_etag is not None:
+                self._logger.info('Expired lease of work item %s (worker %s) taken over.', item_id, lease['worker'])
+        return WorkItem(item_id, payload, new_etag) if new_etag is not None else None
+
+    def claim(self):
+        """Claims the next work item that is not done and has no valid lease
+
+        Returns:
+            WorkItem: the claimed item, None if there is none
+        """
+        for item_id, payload in self.items().items():
+            item = self._claim(item_id, payload)
+            if item is not None:
+                self._logger.info('Work item %s claimed by worker %s.', item_id, self.worker_id)
+                return item
+        return None
+
+    def renew(self, item: WorkItem):
+        """Renews the lease of a claimed work item
+
+        Args:
+            item (WorkItem): claimed work item
+
+        Returns:
+            WorkItem: the item with the renewed lease, None if the lease was lost (expired and taken over)
+        """
+        etag = (self.s3_bucket_conn.put_if_match(self.lease_key(item.item_id), self._lease_body(), item.etag)
+                or self._held_etag(item.item_id))
+        if etag is None:
+            self._logger.info('Lease of work item %s lost by worker %s.', item.item_id, self.worker_id)
+            return None
+        return item._replace(etag=etag)
+
+    def complete(self, item: WorkItem):
+        """Marks a claimed work item as done
+
+        Args:
+            item (WorkItem): claimed work item
+
+        Returns:
+            Boolean: True if the item is marked as done, False if the lease was lost
+        """
+        etag = (self.s3_bucket_conn.put_if_match(self.lease_key(item.item_id), self._lease_body(done=True),
+                                                 item.etag)
+                or self._held_etag(item.item_id, done=True))
+        if etag is None:
+            self._logger.info('Lease of work item %s lost by worker %s.', item.item_id, self.worker_id)
+            return False
+        self._logger.info('Work item %s done.', item.item_id)
+        return True
+
+    def is_done(self, item_id: str):
+        """Checks if a work item is done
+
+        Args:
+            item_id (str): id of the work item
+
+        Returns:
+            Boolean: True if the item is done
+        """
+        lease = self._read_lease(item_id)[0]
+        return lease is not None and lease['done']
+
+    def all_done(self):
+        """Checks if all published work items are done
+
+        Returns:
+            Boolean: True if all items are done
+        """
+        return all(self.is_done(item_id) for item_id in self.items())
+
+    def claim_commit(self):
+        """Claims the commit of the run - possible once all work items are done
+
+        Returns:
+            WorkItem: the claimed commit, None if the work items are not done or the commit is claimed or done
+        """
+        if not self.all_done():
+            return None
+        return self._claim(COMMIT_ITEM, {})
+
+
+class LeaseHeartbeat():
+    """
+    Class for renewing the lease of a claimed work item in a background thread while the item is worked on.
+    Used as context manager; after the exit, item is the work item with the latest lease and lost tells
+    if the lease was lost (expired and taken over).
+    """
+
+    def __init__(self, work_queue: WorkQueue, item: WorkItem, interval: float = None):
+        """
+        Constructor for LeaseHeartbeat
+
+        Args:
+            work_queue (WorkQueue): WorkQueue of the claimed item
+            item (WorkItem): claimed work item
+            interval (float, optional): seconds between the renewals. Defaults to a third of the lease_seconds.
+        """
+        self._logger = logging.getLogger(__name__)
+        self.work_queue = work_queue
+        self.item = item
+        self.interval = interval if interval is not None else work_queue.lease_seconds / 3
+        self.lost = False
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        """Renews the lease every interval seconds until stopped or lost"""
+        while not self._stopped.wait(self.interval):
+            try:
+                item = self.work_queue.renew(self.item)
+            except Exception: # pylint: disable=broad-except
+                # e.g. a connection error, the lease is still valid until the next renewal
+                self._logger.exception('Lease of work item %s not renewed.', self.item.item_id)
+                continue
+            if item is None:
+                self.lost = True
+                return
+            self.item = item
+
+    def __enter__(self):
+        """Starts renewing the lease"""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        """Stops renewing the lease"""
+        self._stopped.set()
+        self._thread.join()
@@ -1,13 +1,27 @@
 """ETL component"""
 
+import asyncio
 import logging
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
 from typing import NamedTuple
 
+import numpy as np
 import pandas as pd
 
+from ETL_sc.common.checkpoint import FileCheckpoint
+from ETL_sc.common.day_state import DayState
+from ETL_sc.common.constants import DataFrameAttrs, DtypeProfile, Leaderboard, MetaProcessFormat
 from ETL_sc.common.meta_process import MetaProcess
-from ETL_sc.common.s3 import S3BucketConnector
+from ETL_sc.common.connector import BucketConnector
+from ETL_sc.common.sqlite_sink import SqliteSink
+from ETL_sc.common.stage_cache import StageCache
+from ETL_sc.common.work_queue import LeaseHeartbeat, WorkQueue
+from ETL_sc.transformers.leaderboard import leaderboards
+from ETL_sc.transformers.parallel import run_partitioned
+from ETL_sc.transformers.report1_partials import partial_aggregate, merge_partials, finalize_report
 
 
 
@@ -24,6 +38,10 @@ class EtlSourceConfig(NamedTuple):
     src_col_min_price: column name for minimum price in source
     src_col_max_price: column name for maximum price in source
     src_col_traded_vol: column name for traded volume in source
+    src_date_format: format of the date column in source
+    src_time_format: format of the time column in source
+    src_dtype_profile: dtype profile used when reading the source files ('default' or 'compact', see DtypeProfile)
+    src_venue: name of the trading venue of the source (e.g. 'Xetra' or 'Eurex'), used in the log messages
 
     """
     src_first_extract_date: str
@@ -35,6 +53,10 @@ class EtlSourceConfig(NamedTuple):
     src_col_min_price: str
     src_col_max_price: str
     src_col_traded_vol: str
+    src_date_format: str = '%Y-%m-%d'
+    src_time_format: str = '%H:%M'
+    src_dtype_profile: str = DtypeProfile.DEFAULT.value
+    src_venue: str = 'Xetra'
 
 class EtlTargetConfig(NamedTuple):
     """
@@ -49,8 +71,22 @@ class EtlTargetConfig(NamedTuple):
     trg_col_dail_trade_vol: column name for daily traded volume in target
     trg_col_ch_prev_clos: column name for change to previous day's closing price in target
     trg_key: basic key of target file
-    trg_key_date_format: date format of target file
+    trg_key_date_format: date format of the first and last processed date in the target key
     trg_format: file format of the target file
+    trg_compression_level: compression level of compressed csv target files (None = library default)
+    trg_parquet_compression: codec of parquet target files ('snappy', 'zstd', 'gzip', 'brotli', 'lz4' or None)
+    trg_parquet_row_group_size: maximum rows per row group of parquet target files (None = pyarrow default,
+        1024 * 1024 rows)
+    trg_parquet_use_dictionary: dictionary encoding of the columns of parquet target files
+    trg_parquet_write_statistics: min/max statistics per row group of parquet target files (for row group pruning)
+    trg_column_order: order of the columns in the target file (None = order of the transformation)
+    trg_sort_by: columns the target data is sorted by before it is written (None = order of the transformation) -
+        data that is already in this order (e.g. report 1 by ISIN and date) is not sorted again
+    trg_sqlite_key: key of the SQLite database the report is upserted into, in addition ('' = no SQLite sink)
+    trg_sqlite_table: table of the report in the SQLite database
+    trg_leaderboard_key: key prefix of the per-day leaderboards (top gainers, losers and volume leaders),
+        published next to the report as <key><date>.csv ('' = no leaderboards)
+    trg_leaderboard_size: rows per board of the leaderboards
 
     """
 
@@ -65,21 +101,61 @@ class EtlTargetConfig(NamedTuple):
     trg_key: str
     trg_key_date_format: str
     trg_format: str
+    trg_compression_level: int = None
+    trg_parquet_compression: str = 'snappy'
+    trg_parquet_row_group_size: int = None
+    trg_parquet_use_dictionary: bool = True
+    trg_parquet_write_statistics: bool = True
+    trg_column_order: list = None
+    trg_sort_by: list = None
+    trg_sqlite_key: str = ''
+    trg_sqlite_table: str = 'report1'
+    trg_leaderboard_key: str = ''
+    trg_leaderboard_size: int = 20
+
+class EtlRunConfig(NamedTuple):
+    """
+    Class for run configuration data - optional parameters of how the ETL job is executed
+
+    transform_workers: number of worker processes for transform_report1 (1 = transformation in the main process)
+    checkpoint_prefix: prefix for file-level checkpoints in the target bucket ('' = no checkpoints)
+    state_prefix: prefix for the day states of the incremental mode in the target bucket ('' = no incremental mode)
+    watch_interval: seconds between the polls of the source in watch mode
+    work_prefix: prefix for the work items and leases of the worker mode in the target bucket
+    shard_days: number of dates per work item in the worker mode
+    lease_seconds: seconds until the lease of a work item expires if the worker does not renew it
+    worker_poll_interval: seconds a worker waits for work items leased by other workers before checking again
+    stage_cache_dir: local directory of the stage cache of the extract ('' = no stage cache), see StageCache -
+        with a stage cache etl_report1 extracts without checkpoints
+
+    """
+
+    transform_workers: int = 1
+    checkpoint_prefix: str = ''
+    state_prefix: str = ''
+    watch_interval: float = 300
+    work_prefix: str = 'work/report1/'
+    shard_days: int = 5
+    lease_seconds: float = 900
+    worker_poll_interval: float = 30
+    stage_cache_dir: str = ''
 
 class StockETL():
     "The ETL job. Reads the stock data, transforms and writes the transformed data to target."
 
-    def __init__(self, s3_bucket_src: S3BucketConnector, s3_bucket_trg: S3BucketConnector,
-                meta_key: str, src_args: EtlSourceConfig, trg_args: EtlTargetConfig):
+    def __init__(self, s3_bucket_src: BucketConnector, s3_bucket_trg: BucketConnector,
+                meta_key: str, src_args: EtlSourceConfig, trg_args: EtlTargetConfig,
+                run_args: EtlRunConfig = EtlRunConfig()):
         """
         Constructor
 
         Args:
-            s3_bucket_src (S3BucketConnector): connection to source S3 bucket
-            s3_bucket_trg (S3BucketConnector): connection to target S3 bucket
+            s3_bucket_src (BucketConnector): connection to source bucket (S3 or local directory)
+            s3_bucket_trg (BucketConnector): connection to target bucket (S3 or local directory)
             meta_key (str): key of meta file in S3 bucket
             src_args (EtlSourceConfig): Namedtuple class with source configuration data
             trg_args (EtlTargetConfig): Namedtuple class with target configuration data
+            run_args (EtlRunConfig, optional): Namedtuple class with run configuration data
         """
         self._logger = logging.getLogger(__name__)
         self.s3_bucket_src = s3_bucket_src
@@ -87,6 +163,14 @@ class StockETL():
         self.meta_key = meta_key
         self.src_args = src_args
         self.trg_args = trg_args
+        self.run_args = run_args
+        self._day_state = None
+        self._meta_dates = None
+        self._process_pool = None
+        self._sqlite_sink = None
+        if self.trg_args.trg_sqlite_key:
+            self._sqlite_sink = SqliteSink(self.trg_args.trg_sqlite_key, self.trg_args.trg_sqlite_table,
+                                           [self.src_args.src_col_isin, self.src_args.src_col_date], s3_bucket_trg)
 
         self.extract_date, self.extract_date_list = MetaProcess.return_date_list(
             self.src_args.src_first_extract_date, self.meta_key, self.s3_bucket_trg)
@@ -98,22 +182,162 @@ class StockETL():
         """
 
         Read the source files as per the dates in self.extract_date_list needed,
-        and concatenates them to one Pandas DataFrame
+        and concatenates them to one Pandas DataFrame.
+
+        The source keys sort by date and hour, and every hourly file is time-ordered itself. The files
+        are therefore read (concurrently, as the source connector allows) in key order and each one is checked (cheaply, O(n)) for a monotonic time column.
+        The result of this check is recorded in the DataFrame.attrs so that transform_report1 can skip sorting.
+
+        With a stage cache (run_args.stage_cache_dir) the extract is projected to the source columns and stored,
+        a later extract of the same source files (keys and ETags) is loaded from the cache instead.
 
         Returns:
              data_frame: Pandas DataFrame with the extracted data to transform, from source
         """
-        self._logger.info('Extracting Stock-data (Xetra) source files started...')
-        files = [key for date in self.extract_date_list\
-                     for key in self.s3_bucket_src.list_files_in_prefix(date)] #for each hour there is a seperate file in bucket.
+        self._logger.info('Extracting Stock-data (%s) source files started...', self.src_args.src_venue)
+        objects = self._source_objects()
+        files = [obj.key for obj in objects]
+        stage_cache = StageCache(self.run_args.stage_cache_dir) if self.run_args.stage_cache_dir and files else None
+        if stage_cache is not None:
+            stage_name = f'{self.src_args.src_venue}_{self.extract_date_list[0]}_{self.extract_date_list[-1]}'
+            fingerprint = StageCache.fingerprint(objects, bucket=self.s3_bucket_src.location,
+                                                 columns=self.src_args.src_columns,
+                                                 dtype_profile=self.src_args.src_dtype_profile)
+            data_frame = stage_cache.load(stage_name, fingerprint)
+            if data_frame is not None:
+                self._logger.info('Extracting Stock-data (%s) source files finished.', self.src_args.src_venue)
+                return data_frame
         if not files: #checking if list empty
             data_frame = pd.DataFrame()
         else:
-            data_frame = pd.concat([self.s3_bucket_src.read_csv_as_df(file)\
-                for file in files], ignore_index=True)
-        self._logger.info('Extracting Stock-data (Xetra) source files finished.')
+            data_frame = self._concat_files(
+                self.s3_bucket_src.read_csvs_as_dfs(files, dtype_profile=self.src_args.src_dtype_profile))
+            if stage_cache is not None:
+                time_ordered = data_frame.attrs[DataFrameAttrs.SRC_TIME_ORDERED.value]
+                data_frame = data_frame.loc[:, self.src_args.src_columns]
+                data_frame.attrs[DataFrameAttrs.SRC_TIME_ORDERED.value] = time_ordered
+                stage_cache.save(stage_name, fingerprint, data_frame)
+        self._logger.info('Extracting Stock-data (%s) source files finished.', self.src_args.src_venue)
+        return data_frame
+
+    async def extract_async(self):
+        """
+        Read the source files as per the dates in self.extract_date_list needed with an asyncio source
+        connector (AsyncS3BucketConnector) and concatenates them to one Pandas DataFrame, like extract.
+
+        The dates are listed concurrently and all files are requested at once - the connector bounds the
+        requests in flight and parses the files in its executor.
+
+        Returns:
+             data_frame: Pandas DataFrame with the extracted data to transform, from source
+        """
+        self._logger.info('Extracting Stock-data (%s) source files started...', self.src_args.src_venue)
+        listings = await asyncio.gather(*(self.s3_bucket_src.list_files_in_prefix(date)
+                                          for date in self.extract_date_list))
+        files = [key for keys in listings for key in sorted(keys)]
+        if not files:
+            data_frame = pd.DataFrame()
+        else:
+            data_frame = self._concat_files(
+                await self.s3_bucket_src.read_csvs_as_dfs(files, dtype_profile=self.src_args.src_dtype_profile))
+        self._logger.info('Extracting Stock-data (%s) source files finished.', self.src_args.src_venue)
         return data_frame
 
+    def _concat_files(self, data_frames: list):
+        """Concatenates the DataFrames of the source files (in key order) and records in the DataFrame.attrs
+        if every file is time-ordered
+
+        Args:
+            data_frames (list): DataFrames of the source files
+
+        Returns:
+            pd.DataFrame: the concatenated DataFrame
+        """
+        time_ordered = all(self.src_args.src_col_time not in df_file.columns\
+            or df_file[self.src_args.src_col_time].is_monotonic_increasing for df_file in data_frames)
+        # files without rows are left out - their (string) columns would turn numeric columns into object
+        data_frame = pd.concat([df_file for df_file in data_frames if not df_file.empty] or data_frames,
+                               ignore_index=True)
+        data_frame.attrs[DataFrameAttrs.SRC_TIME_ORDERED.value] = time_ordered
+        self._logger.info('Extracted %s rows, %.1f MB in memory (dtype profile: %s).', len(data_frame),
+            data_frame.memory_usage(index=False).sum() / 1e6, self.src_args.src_dtype_profile)
+        return data_frame
+
+    def extract_partials(self):
+        """
+        Read the source files as per the dates in self.extract_date_list needed, file by file, and
+        aggregates each file to a partial aggregate which is saved as checkpoint. Source files that have a
+        checkpoint from a previous (crashed) run of the same first date are not read again.
+
+        Returns:
+             data_frame: Pandas DataFrame with the merged partial aggregates
+        """
+        self._logger.info('Extracting Stock-data (%s) source files with checkpoints started...',
+                          self.src_args.src_venue)
+        checkpoint = self._checkpoint()
+        processed_keys = checkpoint.processed_keys()
+        files = self._source_files()
+        partials = []
+        for file in files:
+            if file in processed_keys:
+                partials.append(checkpoint.read(file))
+                continue
+            partial = self._partial_aggregate_file(file)
+            if partial is not None:
+                checkpoint.write(file, partial)
+                partials.append(partial)
+        self._logger.info('%s of %s source files taken from checkpoints.',
+                          len(processed_keys.intersection(files)), len(files))
+        if not partials:
+            data_frame = pd.DataFrame()
+        else:
+            data_frame = merge_partials(pd.concat(partials, ignore_index=True), self.src_args, self.trg_args)
+        self._logger.info('Extracting Stock-data (%s) source files finished.', self.src_args.src_venue)
+        return data_frame
+
+    def _partial_aggregate_file(self, key: str):
+        """Reads one source file and aggregates it to a partial aggregate
+
+        Args:
+            key (str): key of the source file
+
+        Returns:
+            pd.DataFrame: partial aggregate, None if the file has no rows
+        """
+        data_frame = self.s3_bucket_src.read_csv_as_df(key, dtype_profile=self.src_args.src_dtype_profile)
+        if data_frame.empty:
+            return None
+        data_frame = self._prepare_source(data_frame)
+        return partial_aggregate(data_frame, self.src_args, self.trg_args,
+                                 data_frame[self.src_args.src_col_time].is_monotonic_increasing)
+
+    def _source_objects(self):
+        """Source files (with ETag and size) as per the dates in self.extract_date_list, in date and hour order
+
+        Returns:
+            list: list of S3ObjectInfo of the source files
+        """
+        return [obj for date in self.extract_date_list\
+                    for obj in sorted(self.s3_bucket_src.list_objects_in_prefix(date))] #for each hour there is a seperate file in bucket.
+
+    def _source_files(self):
+        """Keys of the source files as per the dates in self.extract_date_list, in date and hour order
+
+        Returns:
+            list: list of the source keys
+        """
+        return [obj.key for obj in self._source_objects()]
+
+    def _checkpoint(self):
+        """Checkpoints of the run - stored in the target bucket, per first planned date. The last planned date
+        is today, a run restarted on a later day (same first date, as the meta file is not updated yet) still
+        finds the checkpoints of the crashed run.
+
+        Returns:
+            FileCheckpoint: checkpoints of the run
+        """
+        return FileCheckpoint(f'{self.run_args.checkpoint_prefix}{self.extract_date_list[0]}/', self.s3_bucket_trg)
+
     def transform_report1(self, data_frame: pd.DataFrame):
         """Applies the necessary transformation to create report 1
 
@@ -129,97 +353,297 @@ class StockETL():
             self._logger.info('The dataframe is empty. No transformations will be applied.')
             return data_frame
 
-        self._logger.info('Applying transformations to Xetra source data for report 1 started...')
+        self._logger.info('Applying transformations to %s source data for report 1 started...', self.src_args.src_venue)
+
+        # Time order recorded by extract (if the DataFrame comes from there)
+        time_ordered = data_frame.attrs.get(DataFrameAttrs.SRC_TIME_ORDERED.value)
 
+        data_frame = self._prepare_source(data_frame)
+
+        if time_ordered is None:
+            time_ordered = self._is_time_ordered(data_frame,
+                [self.src_args.src_col_isin, self.src_args.src_col_date])
+
+        extract_day = self._extract_day()
+
+        # All aggregates are independent per ISIN -> the report kernel can run on ISIN partitions in parallel
+        if self.run_args.transform_workers > 1:
+            self._logger.debug('Running the report 1 kernel on %s worker processes.', self.run_args.transform_workers)
+            if self._process_pool is None:
+                # created once per job - the worker processes are reused by the following transformations
+                self._process_pool = ProcessPoolExecutor(max_workers=self.run_args.transform_workers)
+            data_frame = pd.concat(run_partitioned(self._process_pool, data_frame, self.src_args.src_col_isin,
+                self.run_args.transform_workers, StockETL._report1_kernel,
+                self.src_args, self.trg_args, extract_day, time_ordered), ignore_index=True)\
+                    .sort_values(by=[self.src_args.src_col_isin, self.src_args.src_col_date], kind='stable')\
+                        .reset_index(drop=True)
+        else:
+            data_frame = StockETL._report1_kernel(data_frame, self.src_args, self.trg_args, extract_day, time_ordered)
+
+        data_frame = self._format_dates(data_frame)
+        self._logger.info('Applying transformations to %s source data finished...', self.src_args.src_venue)
+        return data_frame
+
+    def transform_report1_partials(self, partials: pd.DataFrame):
+        """Creates report 1 from the merged partial aggregates (see extract_partials)
+
+        Args:
+            partials (pd.DataFrame): merged partial aggregates
+
+        Returns:
+            pd.DataFrame: report 1
+        """
+        if partials.empty:
+            self._logger.info('The dataframe is empty. No transformations will be applied.')
+            return partials
+
+        self._logger.info('Applying transformations to %s source data for report 1 started...', self.src_args.src_venue)
+        data_frame = self._format_dates(finalize_report(partials, self.src_args, self.trg_args, self._extract_day()))
+        self._logger.info('Applying transformations to %s source data finished...', self.src_args.src_venue)
+        return data_frame
+
+    @staticmethod
+    def _report1_kernel(data_frame: pd.DataFrame, src_args: EtlSourceConfig, trg_args: EtlTargetConfig,
+                        extract_day: int, time_ordered: bool):
+        """Aggregates the parsed source data to report 1 (per ISIN and day). Static, so that it can run
+        on a worker process for a partition of ISINs.
+
+        Args:
+            data_frame (pd.DataFrame): Pandas DataFrame with the parsed source data (see _parse_date_time)
+            src_args (EtlSourceConfig): Namedtuple class with source configuration data
+            trg_args (EtlTargetConfig): Namedtuple class with target configuration data
+            extract_day (int): first day (days since epoch) that is part of the report
+            time_ordered (bool): True if the rows of every ISIN and day are already in time order
+
+        Returns:
+            pd.DataFrame: report 1 with the date as day key
+        """
+        return finalize_report(partial_aggregate(data_frame, src_args, trg_args, time_ordered),
+                               src_args, trg_args, extract_day)
+
+    def _prepare_source(self, data_frame: pd.DataFrame):
+        """Filters the source columns, removes rows with missing values and parses the date and time
+
+        Args:
+            data_frame (pd.DataFrame): Pandas DataFrame with the source data
+
+        Returns:
+            pd.DataFrame: Pandas DataFrame with the parsed source data
+        """
         # Filtering necessary source columns
         data_frame = data_frame.loc[:, self.src_args.src_columns]
 
         # Removing rows with missing values
         data_frame.dropna(inplace=True)
 
-         # Calculating opening price per ISIN and day
-        data_frame[self.trg_args.trg_col_op_price] = data_frame\
-            .sort_values(by=[self.src_args.src_col_time])\
-                .groupby([
-                    self.src_args.src_col_isin,
-                    self.src_args.src_col_date
-                    ])[self.src_args.src_col_start_price]\
-                    .transform('first')
-
-         # Calculating closing price per ISIN and day
-        data_frame[self.trg_args.trg_col_clos_price] = data_frame\
-            .sort_values(by=[self.src_args.src_col_time])\
-                .groupby([
-                    self.src_args.src_col_isin,
-                    self.src_args.src_col_date
-                    ])[self.src_args.src_col_start_price]\
-                        .transform('last')
-
-        # Renaming columns
-        data_frame.rename(columns={
-            self.src_args.src_col_min_price: self.trg_args.trg_col_min_price,
-            self.src_args.src_col_max_price: self.trg_args.trg_col_max_price,
-            self.src_args.src_col_traded_vol: self.trg_args.trg_col_dail_trade_vol
-            }, inplace=True)
-
-        # Aggregating per ISIN and day -> opening price, closing price,
-        # minimum price, maximum price, traded volume
-        data_frame = data_frame.groupby([
-            self.src_args.src_col_isin,
-            self.src_args.src_col_date], as_index=False)\
-                .agg({
-                    self.trg_args.trg_col_op_price: 'min',
-                    self.trg_args.trg_col_clos_price: 'min',
-                    self.trg_args.trg_col_min_price: 'min',
-                    self.trg_args.trg_col_max_price: 'max',
-                    self.trg_args.trg_col_dail_trade_vol: 'sum'})
-
-        # Change of current day's closing price compared to the
-        # previous trading day's closing price in %
-        data_frame[self.trg_args.trg_col_ch_prev_clos] = data_frame\
-            .sort_values(by=[self.src_args.src_col_date])\
-                .groupby([self.src_args.src_col_isin])[self.trg_args.trg_col_op_price]\
-                    .shift(1)
-        data_frame[self.trg_args.trg_col_ch_prev_clos] = (
-            data_frame[self.trg_args.trg_col_op_price] \
-            - data_frame[self.trg_args.trg_col_ch_prev_clos]
-            ) / data_frame[self.trg_args.trg_col_ch_prev_clos ] * 100
-
-        # Rounding to 2 decimals
-        data_frame = data_frame.round(decimals=2)
-
-        # Removing the day before extract_date
-        data_frame = data_frame[data_frame.Date >= self.extract_date].reset_index(drop=True)
-        self._logger.info('Applying transformations to Xetra source data finished...')
+        # Parsing date and time once into integer keys, so that sorting, grouping and filtering
+        # run on fixed-width numeric columns
+        return self._parse_date_time(data_frame)
+
+    def _extract_day(self):
+        """First day of the report (extract_date) as day key
+
+        Returns:
+            int: days since epoch
+        """
+        return (datetime.strptime(self.extract_date, MetaProcessFormat.META_FILE_DATE_FORMAT.value)\
+            - datetime(1970, 1, 1)).days
+
+    def _format_dates(self, data_frame: pd.DataFrame):
+        """Converts the date keys back to the source date format
+
+        Args:
+            data_frame (pd.DataFrame): Pandas DataFrame with the date as day key
+
+        Returns:
+            pd.DataFrame: Pandas DataFrame with the date as string
+        """
+        data_frame[self.src_args.src_col_date] = pd.to_datetime(data_frame[self.src_args.src_col_date], unit='D')\
+            .dt.strftime(self.src_args.src_date_format)
         return data_frame
 
+    def _parse_date_time(self, data_frame: pd.DataFrame):
+        """Replaces the date and time string columns by integer keys - the date by days since epoch (int32)
+        and the time by a timestamp in seconds since epoch (int64). Only the unique values are parsed,
+        with a fixed format.
+
+        Args:
+            data_frame (pd.DataFrame): Pandas DataFrame with the source data
+
+        Returns:
+            pd.DataFrame: Pandas DataFrame with the parsed date and time columns
+        """
+        date_codes, date_uniques = pd.factorize(data_frame[self.src_args.src_col_date])
+        time_codes, time_uniques = pd.factorize(data_frame[self.src_args.src_col_time])
+        days = pd.to_datetime(pd.Series(date_uniques, dtype=object), format=self.src_args.src_date_format)\
+            .to_numpy().astype('datetime64[D]').astype(np.int32)
+        times = pd.to_datetime(pd.Series(time_uniques, dtype=object), format=self.src_args.src_time_format)
+        seconds = (times - times.dt.normalize()).dt.total_seconds().to_numpy().astype(np.int64)
+
+        data_frame[self.src_args.src_col_date] = days[date_codes]
+        data_frame[self.src_args.src_col_time] = days[date_codes].astype(np.int64) * 86400 + seconds[time_codes]
+        return data_frame
+
+    def _is_time_ordered(self, data_frame: pd.DataFrame, group_keys: list):
+        """Checks if the rows of every ISIN and day group are already in time order
+
+        Args:
+            data_frame (pd.DataFrame): Pandas DataFrame with the source data
+            group_keys (list): columns the report is grouped by
+
+        Returns:
+            Boolean: True if no sorting by time is needed
+        """
+        times = data_frame[self.src_args.src_col_time]
+        prev_times = data_frame.groupby(group_keys, sort=False)[self.src_args.src_col_time].shift(1)
+        return bool((prev_times.isna() | (times >= prev_times)).all())
+
     def load(self, data_frame: pd.DataFrame):
         """Saves a Pandas DataFrame to the target
 
+        The target key is derived from the processed date range, so that a rerun of the same window
+        overwrites the report - and the upload is skipped completely if the content did not change.
+
         Args:
             data_frame (pd.DataFrame): Pandas DataFrame as Input
         """
-        # Creating target key
-        target_key = (
-            f'{self.trg_args.trg_key}'
-            f'{datetime.today().strftime(self.trg_args.trg_key_date_format)}.'
-            f'{self.trg_args.trg_format}'
-        )
-
         # Writing to target
-        self.s3_bucket_trg.write_df_to_s3(data_frame, target_key, self.trg_args.trg_format)
-        self._logger.info('Xetra target data successfully written.')
+        if self.meta_update_list:
+            self._write_target(data_frame, self.target_key())
+            self._publish_sqlite()
+        self._logger.info('%s target data successfully written.', self.src_args.src_venue)
 
         # Updating meta file
         MetaProcess.update_meta_file(self.meta_update_list, self.meta_key, self.s3_bucket_trg)
-        self._logger.info('Xetra meta file successfully updated.')
+        self._logger.info('%s meta file successfully updated.', self.src_args.src_venue)
+        return True
+
+    def _write_target(self, data_frame: pd.DataFrame, key: str):
+        """Writes report data to the target with the configured column order, sorting and writer options.
+        Sorted data (e.g. by ISIN and date) gives row groups with narrow min/max statistics, which readers
+        use to skip row groups.
+
+        Args:
+            data_frame (pd.DataFrame): report data
+            key (str): target key
+
+        Returns:
+            Boolean: True if the file is written (or unchanged), None if the dataframe is empty.
+        """
+        if data_frame.empty:
+            # e.g. no source files for the dates, the frame may not even have the report columns
+            self._logger.info('The dataframe is empty! No file will be written!')
+            return None
+        if self.trg_args.trg_column_order:
+            data_frame = data_frame.loc[:, self.trg_args.trg_column_order]
+        if self.trg_args.trg_sort_by and not self._is_sorted(data_frame, self.trg_args.trg_sort_by):
+            data_frame = data_frame.sort_values(by=self.trg_args.trg_sort_by, kind='stable', ignore_index=True)
+        if self._sqlite_sink is not None:
+            self._sqlite_sink.upsert(data_frame)
+        if self.trg_args.trg_leaderboard_key:
+            self._publish_leaderboards(data_frame)
+        parquet_options = {
+            'compression': self.trg_args.trg_parquet_compression,
+            'row_group_size': self.trg_args.trg_parquet_row_group_size,
+            'use_dictionary': self.trg_args.trg_parquet_use_dictionary,
+            'write_statistics': self.trg_args.trg_parquet_write_statistics}
+        return self.s3_bucket_trg.write_df_to_s3(data_frame, key, self.trg_args.trg_format, skip_unchanged=True,
+                                                 compression_level=self.trg_args.trg_compression_level,
+                                                 parquet_options=parquet_options)
+
+    @staticmethod
+    def _is_sorted(data_frame: pd.DataFrame, columns: list):
+        """Checks (in O(n), without sorting) if a DataFrame is sorted by columns in ascending order
+
+        Args:
+            data_frame (pd.DataFrame): data to check
+            columns (list): sort columns, most significant first
+
+        Returns:
+            Boolean: True if sorted - False for missing values in the columns (sorted last by sort_values)
+        """
+        tied = np.ones(max(len(data_frame) - 1, 0), dtype=bool)
+        for col in columns:
+            values = data_frame[col]
+            if values.isna().any():
+                return False
+            previous = values.iloc[:-1].reset_index(drop=True)
+            following = values.iloc[1:].reset_index(drop=True)
+            if (tied & (previous > following).to_numpy(dtype=bool)).any():
+                return False
+            tied &= (previous == following).to_numpy(dtype=bool)
+            if not tied.any():
+                break
         return True
 
+    def _publish_leaderboards(self, data_frame: pd.DataFrame):
+        """Publishes the leaderboard of every date of the report data as a small object of its own
+
+        Args:
+            data_frame (pd.DataFrame): report data
+
+        Returns:
+            list: keys of the leaderboards
+        """
+        keys = []
+        for date, board in leaderboards(data_frame, self.src_args, self.trg_args,
+                                        self.trg_args.trg_leaderboard_size).items():
+            key = f'{self.trg_args.trg_leaderboard_key}{date}.{Leaderboard.FILE_FORMAT.value}'
+            self.s3_bucket_trg.write_df_to_s3(board, key, Leaderboard.FILE_FORMAT.value, skip_unchanged=True)
+            keys.append(key)
+        self._logger.info('%s leaderboards of %s published.', len(keys), self.src_args.src_venue)
+        return keys
+
+    def _publish_sqlite(self):
+        """Publishes the SQLite database to the target bucket, if the SQLite sink is configured
+
+        Returns:
+            Boolean: True if the database file is written
+        """
+        return self._sqlite_sink is not None and self._sqlite_sink.publish()
+
+    def close(self):
+        """Releases the local resources of the job - the worker processes of the transformation and the local
+        copy of the SQLite database, if the SQLite sink is configured. The database is downloaded again on the
+        next upsert, the process pool is created again by the next transformation.
+        """
+        if self._process_pool is not None:
+            self._process_pool.shutdown()
+            self._process_pool = None
+        if self._sqlite_sink is not None:
+            self._sqlite_sink.close()
+
+    def target_key(self, first_date: str = None, last_date: str = None):
+        """Creates the target key of the report from the first and last processed date
+
+        Args:
+            first_date (str, optional): first date of the report. Defaults to the first processed date.
+            last_date (str, optional): last date of the report. Defaults to the last processed date.
+
+        Returns:
+            str: key of the report in the target bucket
+        """
+        first_date, last_date = [
+            datetime.strptime(date, MetaProcessFormat.META_FILE_DATE_FORMAT.value)\
+                .strftime(self.trg_args.trg_key_date_format)
+            for date in (first_date or self.meta_update_list[0], last_date or self.meta_update_list[-1])]
+        return f'{self.trg_args.trg_key}{first_date}_{last_date}.{self.trg_args.trg_format}'
 
     def etl_report1(self):
         """
         Extract, transform and load to create report 1
         """
+        if self.run_args.checkpoint_prefix and not self.run_args.stage_cache_dir and self.extract_date_list:
+            # Extraction with file-level checkpoints
+            partials = self.extract_partials()
+            # Transformation
+            data_frame = self.transform_report1_partials(partials)
+            # Load
+            self.load(data_frame)
+            # The run is complete -> checkpoints are not needed anymore, also not the ones left by runs
+            # of other first dates (e.g. after a change of the source configuration)
+            FileCheckpoint(self.run_args.checkpoint_prefix, self.s3_bucket_trg).clear()
+            return True
         # Extraction
         data_frame = self.extract()
         # Transformation
@@ -228,7 +652,304 @@ class StockETL():
         self.load(data_frame)
         return True
 
+    async def etl_report1_async(self):
+        """
+        Extract, transform and load to create report 1 with an asyncio source connector
+        (AsyncS3BucketConnector). Transformation and load run in the default executor of the loop.
+        The source files are read in one go, without checkpoints (run_args.checkpoint_prefix) and without
+        the stage cache (run_args.stage_cache_dir).
+        """
+        # Extraction
+        data_frame = await self.extract_async()
+        loop = asyncio.get_running_loop()
+        # Transformation
+        data_frame = await loop.run_in_executor(None, self.transform_report1, data_frame)
+        # Load
+        await loop.run_in_executor(None, self.load, data_frame)
+        return True
 
+    def plan_shards(self, shard_days: int):
+        """Splits the dates to process into shards of consecutive dates
 
+        Args:
+            shard_days (int): number of dates per shard
 
+        Returns:
+            dict: work item payload ({'dates': [...]}) per item id ('<first date>_<last date>')
+        """
+        shards = [self.meta_update_list[start:start + shard_days]
+                  for start in range(0, len(self.meta_update_list), shard_days)]
+        return {f'{dates[0]}_{dates[-1]}': {'dates': dates} for dates in shards}
+
+    def _previous_source_date(self, date: str, max_days: int = 10):
+        """Latest date before date that has source files (needed for the change to the previous closing price)
+
+        Args:
+            date (str): date
+            max_days (int, optional): number of days to look back. Defaults to 10.
+
+        Returns:
+            str: previous date with source files, the day before date if there is none
+        """
+        day = datetime.strptime(date, MetaProcessFormat.META_FILE_DATE_FORMAT.value)
+        previous_dates = [(day - timedelta(days=days)).strftime(MetaProcessFormat.META_FILE_DATE_FORMAT.value)
+                          for days in range(1, max_days + 1)]
+        return next((previous_date for previous_date in previous_dates
+                     if self.s3_bucket_src.list_files_in_prefix(previous_date)), previous_dates[0])
+
+    def transform_shard(self, dates: list):
+        """
+        Extract and transform report 1 for a shard of consecutive dates. The source of the latest
+        previous trading day is read as well, for the change to the previous closing price.
+
+        Args:
+            dates (list): dates of the shard
+
+        Returns:
+            pd.DataFrame: report 1 of the dates
+        """
+        self.extract_date = dates[0]
+        self.extract_date_list = [self._previous_source_date(dates[0])] + list(dates)
+        self.meta_update_list = list(dates)
+        return self.transform_report1(self.extract())
+
+    def etl_report1_worker(self, worker_id: str):
+        """
+        Extract, transform and load to create report 1 as one of several workers. The planned dates are
+        published as work items (shards of run_args.shard_days dates) in the target bucket; each worker
+        claims items with expiring leases, writes the report of the shard (one target file per shard)
+        and marks the item done. Workers wait for items leased by others and take over expired leases.
+        When all items are done the meta-file is updated once, by the worker that claims the commit.
+        The SQLite sink has a single writer and is not published in this mode.
+
+        Args:
+            worker_id (str): unique id of the worker
+
+        Returns:
+            list: list of the dates processed by this worker
+        """
+        all_dates = list(self.meta_update_list)
+        if not all_dates:
+            self._logger.info('No %s source dates to process.', self.src_args.src_venue)
+            return []
+        work_queue = WorkQueue(f'{self.run_args.work_prefix}{all_dates[0]}_{all_dates[-1]}/',
+                               self.s3_bucket_trg, worker_id, self.run_args.lease_seconds)
+        work_queue.publish(self.plan_shards(self.run_args.shard_days))
+        processed_dates = []
+        while True:
+            item = work_queue.claim()
+            if item is None:
+                if work_queue.all_done():
+                    break
+                time.sleep(self.run_args.worker_poll_interval)
+                continue
+            # the lease is renewed in the background while the shard is worked on,
+            # a worker that lost it leaves the shard to the new holder
+            with LeaseHeartbeat(work_queue, item) as heartbeat:
+                data_frame = self.transform_shard(item.payload['dates'])
+                if not heartbeat.lost:
+                    self._write_target(data_frame, self.target_key())
+            if not heartbeat.lost and work_queue.complete(heartbeat.item):
+                processed_dates.extend(item.payload['dates'])
+        commit = work_queue.claim_commit()
+        if commit is not None:
+            MetaProcess.update_meta_file(all_dates, self.meta_key, self.s3_bucket_trg)
+            work_queue.complete(commit)
+            self._logger.info('%s meta file successfully updated.', self.src_args.src_venue)
+        return processed_dates
+
+    def etl_report1_incremental(self, dates: list = None):
+        """
+        Incremental extract, transform and load to create report 1. Per date only the source files that
+        appeared (or changed) since the last run are read, their partial aggregates are merged into the
+        stored day state and only the affected days are written to the target, as one partition per day.
+
+        The day states and the dates already written to the meta-file are kept in memory, so repeated
+        calls on the same instance (watch mode) do not read them from S3 again. A date is written to the
+        meta-file once the day is over (before today), as later source files of today are still reported.
+
+        Args:
+            dates (list, optional): source dates to check. Defaults to the planned dates and today.
+
+        Returns:
+            list: list of the dates whose partition was written
+        """
+        self._logger.info('Incremental %s ETL run started...', self.src_args.src_venue)
+        day_state = self._get_day_state()
+        today = datetime.today().strftime(MetaProcessFormat.META_FILE_DATE_FORMAT.value)
+        if dates is None:
+            # the day before extract_date is needed for the change to the previous closing price,
+            # already processed days are reprocessed if their source files changed
+            dates = sorted(set(self.extract_date_list) | {today} | set(self.changed_dates()))
+        updated_dates = [date for date in dates if self._update_day_state(day_state, date)]
+        publish_dates = {date for date in updated_dates
+                         if date >= self.extract_date or date == today or date in self._published_state_dates()}
+        # the change to the previous closing price of the following day depends on an updated day
+        state_dates = day_state.dates()
+        for date in updated_dates:
+            next_dates = [state_date for state_date in state_dates if state_date > date]
+            if next_dates:
+                publish_dates.add(next_dates[0])
+        publish_dates = sorted(publish_dates)
+        for date in publish_dates:
+            self._publish_day(day_state, date)
+        self._publish_sqlite()
+        meta_dates = sorted(date for date in set(publish_dates) | self._published_state_dates()
+                            if date < today and date not in self._get_meta_dates())
+        if meta_dates:
+            MetaProcess.update_meta_file(meta_dates, self.meta_key, self.s3_bucket_trg)
+            self._meta_dates.update(meta_dates)
+        self._logger.info('Incremental %s ETL run finished, %s day partitions written.',
+                          self.src_args.src_venue, len(publish_dates))
+        return publish_dates
+
+    def changed_dates(self):
+        """
+        Already processed dates (with a stored day state) whose source files changed since - republished or
+        backfilled files have a different ETag or size, late files are missing in the manifest. The source is
+        listed once per month and the listing is compared with the manifests.
+
+        Returns:
+            list: sorted list of the changed dates
+        """
+        day_state = self._get_day_state()
+        state_dates = day_state.dates()
+        changed = []
+        for month in sorted({date[:7] for date in state_dates}):
+            listing = {}
+            for obj in self.s3_bucket_src.list_objects_in_prefix(month):
+                listing.setdefault(obj.key.split('/')[0], {})[obj.key] = obj
+            changed.extend(date for date in state_dates
+                           if date.startswith(month) and day_state.read_manifest(date) != listing.get(date, {}))
+        if changed:
+            self._logger.info('Source files changed for %s already processed dates: %s', len(changed), changed)
+        return changed
+
+    def _get_day_state(self):
+        """Stored day states of the incremental mode, created on first use and kept in memory
+
+        Returns:
+            DayState: stored day states
+        """
+        if self._day_state is None:
+            self._day_state = DayState(self.run_args.state_prefix, self.s3_bucket_trg)
+        return self._day_state
+
+    def _get_meta_dates(self):
+        """Dates in the meta-file, read on first use and kept in memory
+
+        Returns:
+            set: set of the dates
+        """
+        if self._meta_dates is None:
+            try:
+                self._meta_dates = MetaProcess.return_meta_dates(self.meta_key, self.s3_bucket_trg)
+            except self.s3_bucket_trg.no_such_key:
+                self._meta_dates = set()
+        return self._meta_dates
+
+    def _published_state_dates(self):
+        """Dates with a stored day state that are part of the report (the first state date is only
+        used for the previous closing price)
+
+        Returns:
+            set: set of the dates
+        """
+        return set(self._get_day_state().dates()[1:])
+
+    def watch(self, interval: float, max_runs: int = None, changed_check_interval: float = 86400,
+              stop: threading.Event = None):
+        """
+        Long-running watch mode: runs etl_report1_incremental every interval seconds, keeping the
+        connections, the day states and the meta-file dates warm in memory. The first run covers the
+        planned dates, the following runs only yesterday and today - and every changed_check_interval
+        seconds also the older dates whose source files changed (republished or late files, see changed_dates).
+
+        Args:
+            interval (float): seconds between the polls of the source
+            max_runs (int, optional): stop after this many runs. Defaults to None (run forever).
+            changed_check_interval (float, optional): seconds between the checks for changed source files of
+                older dates (a listing of the source per month with a day state). Defaults to 86400 (daily).
+            stop (threading.Event, optional): stops the watch after the current run when set, e.g. by the thread
+                of another job. Defaults to None.
+
+        Returns:
+            int: number of runs
+        """
+        runs = 0
+        dates = None
+        changed_checked = time.monotonic() # the first run checks for changed dates
+        while (max_runs is None or runs < max_runs) and not (stop is not None and stop.is_set()):
+            started = time.monotonic()
+            self.etl_report1_incremental(dates)
+            runs += 1
+            today = datetime.today().date()
+            dates = [(today - timedelta(days=1)).strftime(MetaProcessFormat.META_FILE_DATE_FORMAT.value),
+                     today.strftime(MetaProcessFormat.META_FILE_DATE_FORMAT.value)]
+            if time.monotonic() - changed_checked >= changed_check_interval:
+                changed_checked = time.monotonic()
+                dates = sorted(set(dates) | set(self.changed_dates()))
+            if max_runs is None or runs < max_runs:
+                wait = max(0.0, interval - (time.monotonic() - started))
+                if stop is not None:
+                    stop.wait(wait)
+                else:
+                    time.sleep(wait)
+        return runs
+
+    def _update_day_state(self, day_state: DayState, date: str):
+        """Merges the source files of a date that are not in its manifest into the stored day state.
+        If a processed file changed or disappeared, the day state is rebuilt from all source files.
+
+        Args:
+            day_state (DayState): stored day states
+            date (str): source date
+
+        Returns:
+            Boolean: True if the day state changed
+        """
+        objects = {obj.key: obj for obj in self.s3_bucket_src.list_objects_in_prefix(date)}
+        manifest = day_state.read_manifest(date)
+        if any(objects.get(key) != obj for key, obj in manifest.items()):
+            self._logger.info('Source files of %s changed, rebuilding the day state.', date)
+            manifest = {}
+        new_keys = sorted(key for key in objects if key not in manifest)
+        if not new_keys:
+            return False
+
+        partials = [day_state.read_partials(date)] if manifest else []
+        for key in new_keys:
+            partial = self._partial_aggregate_file(key)
+            if partial is not None:
+                partials.append(partial)
+        partials = [partial for partial in partials if not partial.empty]
+        if partials:
+            df_partials = merge_partials(pd.concat(partials, ignore_index=True), self.src_args, self.trg_args)
+        else:
+            df_partials = pd.DataFrame()
+        manifest.update({key: objects[key] for key in new_keys})
+        day_state.write(date, df_partials, manifest)
+        self._logger.info('%s new source files merged into the day state of %s.', len(new_keys), date)
+        return True
+
+    def _publish_day(self, day_state: DayState, date: str):
+        """Writes the report partition of one day, using the stored day state of the day and the latest
+        day before it (for the change to the previous closing price)
+
+        Args:
+            day_state (DayState): stored day states
+            date (str): date of the partition
+        """
+        partials = day_state.read_partials(date)
+        if partials.empty:
+            return False
+        # latest earlier day with data (skips weekends and holidays)
+        previous_partials = next((day_state.read_partials(state_date) for state_date in reversed(day_state.dates())
+                                  if state_date < date and not day_state.read_partials(state_date).empty), None)
+        if previous_partials is not None:
+            partials = pd.concat([previous_partials, partials], ignore_index=True)\
+                .sort_values(by=[self.src_args.src_col_isin, self.src_args.src_col_date], kind='stable')
+        day = (datetime.strptime(date, MetaProcessFormat.META_FILE_DATE_FORMAT.value) - datetime(1970, 1, 1)).days
+        data_frame = self._format_dates(finalize_report(partials, self.src_args, self.trg_args, day))
+        return self._write_target(data_frame, self.target_key(date, date))
 
@@ -0,0 +1,61 @@
+"""
+Methods for the per-day leaderboard derived from report 1
+
+Per date the top n gainers and losers (change to the previous closing price) and volume leaders (daily
+traded volume) are selected with a partial selection (numpy.argpartition, O(rows) per date) - only the
+selected n rows are sorted. Rows without a value (e.g. no previous closing price) are not ranked.
+
+"""
+import numpy as np
+import pandas as pd
+
+from ETL_sc.common.constants import Leaderboard
+
+
+def top_n_positions(values: np.ndarray, top_n: int, largest: bool = True):
+    """Positions of the top n values (without NaN), ranked
+
+    Args:
+        values (np.ndarray): values (float)
+        top_n (int): number of positions
+        largest (bool, optional): the largest (True) or the smallest (False) values. Defaults to True.
+
+    Returns:
+        np.ndarray: positions of the top n values in values, best first
+    """
+    valid = np.flatnonzero(~np.isnan(values))
+    keys = -values[valid] if largest else values[valid]
+    if len(valid) > top_n:
+        selected = np.argpartition(keys, top_n - 1)[:top_n]
+    else:
+        selected = np.arange(len(valid))
+    return valid[selected[np.argsort(keys[selected], kind='stable')]]
+
+
+def leaderboards(report: pd.DataFrame, src_args, trg_args, top_n: int = 20):
+    """Leaderboards of the dates of report 1
+
+    Args:
+        report (pd.DataFrame): report 1
+        src_args (EtlSourceConfig): Namedtuple class with source configuration data
+        trg_args (EtlTargetConfig): Namedtuple class with target configuration data
+        top_n (int, optional): rows per board. Defaults to 20.
+
+    Returns:
+        dict: leaderboard (pd.DataFrame with the board, rank, ISIN, closing price, change and volume) per date
+    """
+    columns = [src_args.src_col_isin, trg_args.trg_col_clos_price, trg_args.trg_col_ch_prev_clos,
+               trg_args.trg_col_dail_trade_vol]
+    change = report[trg_args.trg_col_ch_prev_clos].to_numpy(dtype=np.float64, na_value=np.nan)
+    volume = report[trg_args.trg_col_dail_trade_vol].to_numpy(dtype=np.float64, na_value=np.nan)
+    boards = {}
+    # row positions per date (hash grouping, the rows are not sorted)
+    for date, positions in report.groupby(src_args.src_col_date, sort=True).indices.items():
+        ranked = [(Leaderboard.GAINERS.value, positions[top_n_positions(change[positions], top_n)]),
+                  (Leaderboard.LOSERS.value, positions[top_n_positions(change[positions], top_n, largest=False)]),
+                  (Leaderboard.VOLUME_LEADERS.value, positions[top_n_positions(volume[positions], top_n)])]
+        board = pd.concat([report.iloc[rows][columns].assign(**{
+            Leaderboard.BOARD_COL.value: name, Leaderboard.RANK_COL.value: np.arange(1, len(rows) + 1)})
+                           for name, rows in ranked], ignore_index=True)
+        boards[date] = board[[Leaderboard.BOARD_COL.value, Leaderboard.RANK_COL.value, *columns]]
+    return boards
@@ -0,0 +1,104 @@
+"""
+Methods for running a transformation in parallel on a process pool
+
+The DataFrame is hash-partitioned on a column (e.g. ISIN), every partition is handed to the worker
+processes of a (reused) process pool as an Arrow IPC stream in shared memory (no pickled DataFrames) and the partition results
+are returned as Arrow IPC buffers.
+
+"""
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import pandas as pd
+import pyarrow as pa
+
+
+def run_partitioned(executor: ProcessPoolExecutor, data_frame: pd.DataFrame, partition_col: str, workers: int,
+                    func, *func_args):
+    """Hash-partitions data_frame on partition_col and runs func(partition, *func_args) on a process pool.
+
+    Args:
+        executor (ProcessPoolExecutor): process pool running the partitions, owned (and shut down) by the caller
+        data_frame (pd.DataFrame): Pandas DataFrame that should be partitioned
+        partition_col (str): column used for the hash partitioning - all rows with the same value end up in the same partition
+        workers (int): number of worker processes (and partitions)
+        func: module level function (or staticmethod) returning a Pandas DataFrame
+        func_args: further arguments passed to func
+
+    Returns:
+        list: list with the result DataFrames, in partition order
+    """
+    # hashed on the column itself - Arrow backed strings are not converted to a numpy object array
+    partitions = pd.util.hash_pandas_object(data_frame[partition_col], index=False).to_numpy() % workers
+    shared_blocks = []
+    try:
+        futures = []
+        for partition in range(workers):
+            df_partition = data_frame[partitions == partition]
+            if df_partition.empty:
+                continue
+            shm = _to_shared_memory(pa.Table.from_pandas(df_partition, preserve_index=False))
+            shared_blocks.append(shm)
+            futures.append(executor.submit(_run_on_shared_memory, shm.name, func, func_args))
+        results = [pa.ipc.open_stream(future.result()).read_pandas() for future in futures]
+    finally:
+        for shm in shared_blocks:
+            shm.close()
+            shm.unlink()
+    return results
+
+
+def _to_shared_memory(table: pa.Table):
+    """Writes an Arrow table as IPC stream into a new shared memory block
+
+    Args:
+        table (pa.Table): Arrow table to write
+
+    Returns:
+        SharedMemory: shared memory block holding the IPC stream
+    """
+    sink = pa.MockOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    shm = SharedMemory(create=True, size=max(sink.size(), 1))
+    stream = pa.FixedSizeBufferWriter(pa.py_buffer(shm.buf))
+    with pa.ipc.new_stream(stream, table.schema) as writer:
+        writer.write_table(table)
+    stream.close()
+    del stream
+    return shm
+
+
+def _run_on_shared_memory(shm_name: str, func, func_args: tuple):
+    """Worker function: reads the partition from shared memory, runs func on it and returns the result
+    as Arrow IPC buffer.
+
+    Args:
+        shm_name (str): name of the shared memory block with the partition
+        func: function applied to the partition
+        func_args (tuple): further arguments passed to func
+
+    Returns:
+        pa.Buffer: Arrow IPC stream of the result DataFrame
+    """
+    if sys.version_info >= (3, 13):
+        shm = SharedMemory(name=shm_name, track=False)
+    else:
+        shm = SharedMemory(name=shm_name)
+        # the parent owns (and unlinks) the block - the worker should not track it
+        resource_tracker.unregister(shm._name, 'shared_memory') # pylint: disable=protected-access
+    try:
+        # the partition DataFrame may reference the shared memory (zero-copy) - it is dropped before closing
+        data_frame = pa.ipc.open_stream(pa.py_buffer(shm.buf)).read_pandas()
+        result = func(data_frame, *func_args)
+        del data_frame
+        table = pa.Table.from_pandas(result, preserve_index=False)
+    finally:
+        shm.close()
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
@@ -0,0 +1,132 @@
+"""
+Methods for building report 1 from partial aggregates
+
+A partial aggregate holds per ISIN and day the first and last trade time with their prices, the minimum
+and maximum price and the traded volume. Partial aggregates of different source files (e.g. hourly files)
+can be merged, and the report is finalized from the merged partial aggregates. This allows checkpointing
+and incremental processing without keeping the source rows.
+
+"""
+import numpy as np
+import pandas as pd
+
+from ETL_sc.common.constants import Report1Partials
+
+
+def partial_columns(src_args, trg_args):
+    """Column names of a partial aggregate, in order
+
+    Args:
+        src_args (EtlSourceConfig): Namedtuple class with source configuration data
+        trg_args (EtlTargetConfig): Namedtuple class with target configuration data
+
+    Returns:
+        list: list of the column names
+    """
+    return [src_args.src_col_isin, src_args.src_col_date,
+            Report1Partials.FIRST_TIME.value, trg_args.trg_col_op_price,
+            Report1Partials.LAST_TIME.value, trg_args.trg_col_clos_price,
+            trg_args.trg_col_min_price, trg_args.trg_col_max_price, trg_args.trg_col_dail_trade_vol]
+
+
+def partial_aggregate(data_frame: pd.DataFrame, src_args, trg_args, time_ordered: bool = True):
+    """Aggregates parsed source data (date key and timestamp, see StockETL._parse_date_time) per ISIN and day
+
+    Args:
+        data_frame (pd.DataFrame): Pandas DataFrame with the parsed source data
+        src_args (EtlSourceConfig): Namedtuple class with source configuration data
+        trg_args (EtlTargetConfig): Namedtuple class with target configuration data
+        time_ordered (bool, optional): True if the rows of every ISIN and day are already in time order. Defaults to True.
+
+    Returns:
+        pd.DataFrame: partial aggregate, sorted by ISIN and day
+    """
+    # Rows already in time order -> first/last price taken from the group boundaries in row order,
+    # otherwise a (single, stable) sort by time is needed first
+    if not time_ordered:
+        data_frame = data_frame.sort_values(by=[src_args.src_col_time], kind='stable')
+
+    # Summing the traded volume in int64 also for the compact dtype profile (avoids int32 overflow)
+    if data_frame[src_args.src_col_traded_vol].dtype == np.int32:
+        data_frame = data_frame.astype({src_args.src_col_traded_vol: np.int64})
+
+    return data_frame.groupby([src_args.src_col_isin, src_args.src_col_date], as_index=False)\
+        .agg(**{
+            Report1Partials.FIRST_TIME.value: (src_args.src_col_time, 'first'),
+            trg_args.trg_col_op_price: (src_args.src_col_start_price, 'first'),
+            Report1Partials.LAST_TIME.value: (src_args.src_col_time, 'last'),
+            trg_args.trg_col_clos_price: (src_args.src_col_start_price, 'last'),
+            trg_args.trg_col_min_price: (src_args.src_col_min_price, 'min'),
+            trg_args.trg_col_max_price: (src_args.src_col_max_price, 'max'),
+            trg_args.trg_col_dail_trade_vol: (src_args.src_col_traded_vol, 'sum')})
+
+
+def merge_partials(partials: pd.DataFrame, src_args, trg_args):
+    """Merges (concatenated) partial aggregates, so that there is one row per ISIN and day
+
+    Args:
+        partials (pd.DataFrame): concatenated partial aggregates
+        src_args (EtlSourceConfig): Namedtuple class with source configuration data
+        trg_args (EtlTargetConfig): Namedtuple class with target configuration data
+
+    Returns:
+        pd.DataFrame: merged partial aggregate, sorted by ISIN and day
+    """
+    group_keys = [src_args.src_col_isin, src_args.src_col_date]
+    df_first = partials.sort_values(by=[Report1Partials.FIRST_TIME.value], kind='stable')\
+        .groupby(group_keys)\
+            .agg(**{
+                Report1Partials.FIRST_TIME.value: (Report1Partials.FIRST_TIME.value, 'first'),
+                trg_args.trg_col_op_price: (trg_args.trg_col_op_price, 'first')})
+    df_last = partials.sort_values(by=[Report1Partials.LAST_TIME.value], kind='stable')\
+        .groupby(group_keys)\
+            .agg(**{
+                Report1Partials.LAST_TIME.value: (Report1Partials.LAST_TIME.value, 'last'),
+                trg_args.trg_col_clos_price: (trg_args.trg_col_clos_price, 'last')})
+    df_rest = partials.groupby(group_keys)\
+        .agg(**{
+            trg_args.trg_col_min_price: (trg_args.trg_col_min_price, 'min'),
+            trg_args.trg_col_max_price: (trg_args.trg_col_max_price, 'max'),
+            trg_args.trg_col_dail_trade_vol: (trg_args.trg_col_dail_trade_vol, 'sum')})
+    return pd.concat([df_first, df_last, df_rest], axis=1)\
+        .reset_index()\
+            .loc[:, partial_columns(src_args, trg_args)]
+
+
+def finalize_report(partials: pd.DataFrame, src_args, trg_args, extract_day: int):
+    """Creates report 1 (with the date as day key) from a merged partial aggregate
+
+    Args:
+        partials (pd.DataFrame): merged partial aggregate, sorted by ISIN and day
+        src_args (EtlSourceConfig): Namedtuple class with source configuration data
+        trg_args (EtlTargetConfig): Namedtuple class with target configuration data
+        extract_day (int): first day (days since epoch) that is part of the report
+
+    Returns:
+        pd.DataFrame: report 1
+    """
+    data_frame = partials.drop(columns=[Report1Partials.FIRST_TIME.value, Report1Partials.LAST_TIME.value])
+
+    # Aggregated prices in float64 (the compact dtype profile parses files with integral prices only as int32)
+    data_frame = data_frame.astype({col: np.float64 for col in [
+        trg_args.trg_col_op_price,
+        trg_args.trg_col_clos_price,
+        trg_args.trg_col_min_price,
+        trg_args.trg_col_max_price]})
+
+    # Change of current day's closing price compared to the
+    # previous trading day's closing price in %
+    data_frame[trg_args.trg_col_ch_prev_clos] = data_frame\
+        .sort_values(by=[src_args.src_col_date])\
+            .groupby([src_args.src_col_isin])[trg_args.trg_col_op_price]\
+                .shift(1)
+    data_frame[trg_args.trg_col_ch_prev_clos] = (
+        data_frame[trg_args.trg_col_op_price] \
+        - data_frame[trg_args.trg_col_ch_prev_clos]
+        ) / data_frame[trg_args.trg_col_ch_prev_clos] * 100
+
+    # Rounding to 2 decimals
+    data_frame = data_frame.round(decimals=2)
+
+    # Removing the day before extract_date
+    return data_frame[data_frame[src_args.src_col_date] >= extract_day].reset_index(drop=True)
@@ -0,0 +1 @@
+"""Benchmarks of the Stock-data ETL application, run as modules, e.g. python -m benchmarks.parquet_options"""
@@ -0,0 +1,69 @@
+"""
+Benchmark of the parquet writer options of the report (target config trg_parquet_* and trg_sort_by)
+
+Prints per setting the file size, the time to write, to read the whole file and to read the rows of one ISIN
+(the row groups are pruned with their min/max statistics).
+
+    python -m benchmarks.parquet_options --isins 5000 --days 60
+
+"""
+import argparse
+import time
+from io import BytesIO
+
+import pyarrow.parquet as pq
+
+from benchmarks.synthetic import generate_report
+
+# name -> (options of the parquet writer, columns sorted by before writing)
+SETTINGS = {
+    'default (snappy)': ({}, None),
+    'snappy, sorted': ({'compression': 'snappy'}, ['ISIN', 'Date']),
+    'snappy, sorted, 64k row groups': ({'compression': 'snappy', 'row_group_size': 65536}, ['ISIN', 'Date']),
+    'zstd, sorted, 64k row groups': ({'compression': 'zstd', 'row_group_size': 65536}, ['ISIN', 'Date']),
+    'gzip, sorted, 64k row groups': ({'compression': 'gzip', 'row_group_size': 65536}, ['ISIN', 'Date']),
+    'zstd, sorted, no dictionary': ({'compression': 'zstd', 'use_dictionary': False}, ['ISIN', 'Date']),
+    'zstd, 64k row groups, no statistics': ({'compression': 'zstd', 'row_group_size': 65536,
+                                             'write_statistics': False}, ['ISIN', 'Date']),
+    'uncompressed, sorted': ({'compression': None}, ['ISIN', 'Date']),
+}
+
+
+def best_of(repeat: int, func):
+    """Best wall time of repeated calls of func in seconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    """Runs the benchmark and prints the results"""
+    parser = argparse.ArgumentParser(description='Benchmark of the parquet writer options of the report')
+    parser.add_argument('--isins', type=int, default=3000, help='number of ISINs')
+    parser.add_argument('--days', type=int, default=60, help='number of trading days')
+    parser.add_argument('--repeat', type=int, default=5, help='repetitions per measurement (best is taken)')
+    args = parser.parse_args()
+
+    data_frame = generate_report(args.isins, args.days)
+    isin = data_frame['ISIN'].iloc[len(data_frame) // 2]
+    print(f'{len(data_frame)} report rows, {data_frame.memory_usage(deep=True).sum() / 1e6:.1f} MB in memory')
+    print(f'{"setting":<38}{"size MB":>9}{"write s":>9}{"read s":>9}{"1 ISIN s":>10}')
+    for name, (options, sort_by) in SETTINGS.items():
+        df_write = data_frame.sort_values(by=sort_by, ignore_index=True) if sort_by else data_frame
+        buffer = BytesIO()
+        def write():
+            buffer.seek(0)
+            buffer.truncate()
+            df_write.to_parquet(buffer, index=False, **options)
+        write_time = best_of(args.repeat, write)
+        body = buffer.getvalue()
+        read_time = best_of(args.repeat, lambda: pq.read_table(BytesIO(body)).to_pandas())
+        filter_time = best_of(args.repeat, lambda: pq.read_table(BytesIO(body), filters=[('ISIN', '=', isin)]))
+        print(f'{name:<38}{len(body) / 1e6:>9.2f}{write_time:>9.3f}{read_time:>9.3f}{filter_time:>10.4f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,257 @@
+"""
+Benchmark regression gate of the ETL stages against a stored baseline
+
+Runs the report 1 job (extract, transform_report1 and load of StockETL) on synthetic source data of the
+standard data sizes (SCENARIOS) with local directories as buckets, every run in its own process. Per scenario
+the wall time of the stages, the throughput in source rows per second and the peak RSS of the process are
+compared with the baseline (benchmarks/baseline.json). A scenario regresses when a time or the peak RSS is
+higher, or the throughput lower, than the baseline by more than the tolerance - the differences are printed
+and the exit code is 1.
+
+    python -m benchmarks.regression                      # compare with the baseline
+    python -m benchmarks.regression --scenarios small    # only some scenarios
+    python -m benchmarks.regression --update-baseline    # store the results as new baseline
+
+The baseline depends on the machine, refresh it (on purpose) when the benchmark machine changes or a
+change is known to trade time or memory for something else.
+
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import yaml
+
+from benchmarks.startup import CONFIG, ROOT_DIR
+
+BASELINE = os.path.join(ROOT_DIR, 'benchmarks', 'baseline.json')
+# standard data sizes: ISINs and trading days (of 9 hourly files, plus the previous day)
+SCENARIOS = {
+    'small': {'isins': 500, 'days': 2},
+    'medium': {'isins': 3000, 'days': 5},
+    'large': {'isins': 6000, 'days': 10},
+}
+# metric -> True if higher values are better
+METRICS = {
+    'extract_s': False,
+    'transform_s': False,
+    'load_s': False,
+    'total_s': False,
+    'rows_per_s': True,
+    'peak_rss_mb': False,
+}
+
+
+def scenario_dates(scenario: str):
+    """Fixed dates of the source files of a scenario - the first date is only read for the previous closing price
+
+    Args:
+        scenario (str): key of SCENARIOS
+
+    Returns:
+        list: dates, '%Y-%m-%d'
+    """
+    return [(date(2021, 4, 12) + timedelta(days=day)).isoformat() for day in range(SCENARIOS[scenario]['days'] + 1)]
+
+
+def run_scenario(source_dir: str, target_dir: str, scenario: str):
+    """Runs report 1 on the source files of source_dir and measures the stages
+
+    Args:
+        source_dir (str): directory with the source files
+        target_dir (str): directory of the target bucket (empty)
+        scenario (str): key of SCENARIOS
+
+    Returns:
+        dict: source rows, wall times of the stages in seconds and throughput in source rows per second
+    """
+    from ETL_sc.common.local import LocalBucketConnector
+    from ETL_sc.transformers.etl_transformer import StockETL, EtlSourceConfig, EtlTargetConfig
+
+    with open(CONFIG, encoding='utf-8') as file:
+        config = yaml.safe_load(file)
+    dates = scenario_dates(scenario)
+    source_config = EtlSourceConfig(**{**config['source'], 'src_first_extract_date': dates[1]})
+    stock_etl = StockETL(LocalBucketConnector(source_dir), LocalBucketConnector(target_dir),
+                         config['meta']['meta_key'], source_config, EtlTargetConfig(**config['target']))
+    # the dates of the scenario instead of the dates up to today, so that the runs do not change over time
+    stock_etl.extract_date, stock_etl.extract_date_list, stock_etl.meta_update_list = dates[1], dates, dates[1:]
+    start = time.perf_counter()
+    data_frame = stock_etl.extract()
+    extract_time = time.perf_counter() - start
+    rows = len(data_frame)
+    start = time.perf_counter()
+    data_frame = stock_etl.transform_report1(data_frame)
+    transform_time = time.perf_counter() - start
+    start = time.perf_counter()
+    stock_etl.load(data_frame)
+    load_time = time.perf_counter() - start
+    total_time = extract_time + transform_time + load_time
+    return {'rows': rows, 'extract_s': extract_time, 'transform_s': transform_time, 'load_s': load_time,
+            'total_s': total_time, 'rows_per_s': rows / total_time}
+
+
+def peak_rss_mb():
+    """Peak RSS of the process in MB - from /proc (VmHWM), as ru_maxrss includes the peak RSS of the
+    parent process on Linux (it is kept over fork and exec)
+
+    Returns:
+        float: peak RSS in MB
+    """
+    try:
+        with open('/proc/self/status', encoding='utf-8') as file:
+            for line in file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(scenario: str, repeat: int):
+    """Measures a scenario in fresh processes - the best time and throughput and the lowest peak RSS
+
+    Args:
+        scenario (str): key of SCENARIOS
+        repeat (int): processes per scenario
+
+    Returns:
+        dict: source rows and the metrics of METRICS
+    """
+    from benchmarks.synthetic import generate_source
+    from ETL_sc.common.local import LocalBucketConnector
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source_dir = os.path.join(tmp_dir, 'src')
+        writer = LocalBucketConnector(source_dir)
+        for key, df_hour in generate_source(scenario_dates(scenario), SCENARIOS[scenario]['isins']).items():
+            writer.write_df_to_s3(df_hour, key, 'csv')
+        for run in range(repeat):
+            output = subprocess.run([sys.executable, '-m', 'benchmarks.regression', '--source-dir', source_dir,
+                                     '--target-dir', os.path.join(tmp_dir, f'trg{run}'), '--scenario', scenario],
+                                    cwd=ROOT_DIR, check=True, capture_output=True, text=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+    result = {'rows': results[0]['rows']}
+    for metric, higher_is_better in METRICS.items():
+        result[metric] = (max if higher_is_better else min)(run_result[metric] for run_result in results)
+    result['total_s_spread'] = statistics.pstdev(run_result['total_s'] for run_result in results)
+    return result
+
+
+def compare(results: dict, baseline: dict, tolerance: float, rss_tolerance: float, min_seconds: float = 0.0):
+    """Compares the results with the baseline - time differences below min_seconds are not counted, so that the
+    jitter of short stages does not fail the gate
+
+    Args:
+        results (dict): metrics per scenario
+        baseline (dict): metrics per scenario of the baseline
+        tolerance (float): allowed relative regression of the times and the throughput, e.g. 0.2
+        rss_tolerance (float): allowed relative increase of the peak RSS
+        min_seconds (float, optional): smallest time difference counted as regression. Defaults to 0.0.
+
+    Returns:
+        list: regressions as (scenario, metric, baseline value, value, relative change)
+    """
+    regressions = []
+    for scenario, result in results.items():
+        if scenario not in baseline:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            base = baseline[scenario].get(metric)
+            if not base:
+                continue
+            change = result[metric] / base - 1
+            if metric.endswith('_s') and result[metric] - base <= min_seconds:
+                continue
+            allowed = rss_tolerance if metric == 'peak_rss_mb' else tolerance
+            if (-change if higher_is_better else change) > allowed:
+                regressions.append((scenario, metric, base, result[metric], change))
+    return regressions
+
+
+def machine():
+    """Description of the machine of the measurement"""
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()}
+
+
+def main():
+    """Runs the benchmark, compares it with the baseline or stores it as baseline"""
+    parser = argparse.ArgumentParser(description='Benchmark regression gate of the ETL stages')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS),
+                        help='scenarios to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=3, help='processes per scenario (best is taken)')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed relative regression of the times and the throughput (default: 0.2)')
+    parser.add_argument('--rss-tolerance', type=float, default=0.25,
+                        help='allowed relative increase of the peak RSS (default: 0.25)')
+    parser.add_argument('--min-seconds', type=float, default=0.05,
+                        help='smallest time difference of a stage counted as regression (default: 0.05)')
+    parser.add_argument('--baseline', default=BASELINE, help='path of the baseline JSON')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='store the results of the scenarios as baseline instead of comparing')
+    parser.add_argument('--source-dir', help=argparse.SUPPRESS)
+    parser.add_argument('--target-dir', help=argparse.SUPPRESS)
+    parser.add_argument('--scenario', choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.source_dir:
+        # child process of one run
+        result = run_scenario(args.source_dir, args.target_dir, args.scenario)
+        result['peak_rss_mb'] = peak_rss_mb()
+        print(json.dumps(result))
+        return
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+    results = {}
+    print(f'{"scenario":<10}{"rows":>10}{"extract s":>11}{"transform s":>13}{"load s":>9}{"total s":>9}'
+          f'{"rows/s":>11}{"peak RSS MB":>13}')
+    for scenario in args.scenarios:
+        result = results[scenario] = measure(scenario, args.repeat)
+        print(f'{scenario:<10}{result["rows"]:>10}{result["extract_s"]:>11.3f}{result["transform_s"]:>13.3f}'
+              f'{result["load_s"]:>9.3f}{result["total_s"]:>9.3f}{result["rows_per_s"]:>11.0f}'
+              f'{result["peak_rss_mb"]:>13.0f}')
+
+    if args.update_baseline:
+        scenarios = baseline.get('scenarios', {})
+        scenarios.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump({'machine': machine(), 'scenarios': scenarios}, file, indent=2, sort_keys=True)
+            file.write('\n')
+        print(f'Baseline of {", ".join(results)} stored in {args.baseline}')
+        return
+
+    if not baseline:
+        sys.exit(f'No baseline in {args.baseline}, store one with --update-baseline')
+    if baseline['machine'] != machine():
+        print(f'Note: the baseline was measured on another machine ({baseline["machine"]})')
+    for scenario in results:
+        if scenario not in baseline['scenarios']:
+            print(f'Note: no baseline of the scenario {scenario}')
+        elif results[scenario]['rows'] != baseline['scenarios'][scenario]['rows']:
+            print(f'Note: the scenario {scenario} has {results[scenario]["rows"]} source rows, '
+                  f'the baseline {baseline["scenarios"][scenario]["rows"]}')
+    regressions = compare(results, baseline['scenarios'], args.tolerance, args.rss_tolerance,
+                          args.min_seconds)
+    if regressions:
+        print(f'{len(regressions)} regression(s) against {args.baseline}:')
+        for scenario, metric, base, value, change in regressions:
+            print(f'  {scenario:<10}{metric:<13}{base:>14.3f} -> {value:>14.3f}  ({change:+.1%})')
+        sys.exit(1)
+    print(f'No regressions against {args.baseline} (tolerance {args.tolerance:.0%}, '
+          f'peak RSS {args.rss_tolerance:.0%})')
+
+
+if __name__ == '__main__':
+    main()
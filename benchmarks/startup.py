@@ -0,0 +1,117 @@
+"""
+Benchmark of the startup time of run.py
+
+Measures (median wall time of fresh interpreter processes) --help, a run with nothing to process and
+--plan, both against local directories as buckets, and for comparison the import of the transformation.
+The benchmark fails if the run with nothing to process imports pandas.
+
+    python -m benchmarks.startup --repeat 10
+
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import yaml
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUN_PY = os.path.join(ROOT_DIR, 'run.py')
+CONFIG = os.path.join(ROOT_DIR, 'configs', 'etl_report1_config.yml')
+
+
+def write_nothing_to_do_config(tmp_dir: str):
+    """Writes a config with local buckets whose meta files (one per enabled venue) contain all dates up to today
+
+    Args:
+        tmp_dir (str): directory for the config and the buckets
+
+    Returns:
+        str: path of the config
+    """
+    with open(CONFIG, encoding='utf-8') as file:
+        config = yaml.safe_load(file)
+    config['s3'].update(src_backend='local', src_local_dir=os.path.join(tmp_dir, 'src'),
+                        trg_backend='local', trg_local_dir=os.path.join(tmp_dir, 'trg'))
+    first_date = date.today() - timedelta(days=7)
+    config['source']['src_first_extract_date'] = first_date.isoformat()
+    config['logging']['root']['level'] = 'WARNING'
+    os.makedirs(os.path.join(tmp_dir, 'src'), exist_ok=True)
+    config_path = os.path.join(tmp_dir, 'config.yml')
+    with open(config_path, 'w', encoding='utf-8') as file:
+        yaml.safe_dump(config, file)
+    from run import load_jobs
+    for job in load_jobs([config_path]):
+        meta_path = os.path.join(job['s3']['trg_local_dir'], *job['meta']['meta_key'].split('/'))
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        with open(meta_path, 'w', encoding='utf-8') as file:
+            file.write('source_file_date,datetime_of_processing\n')
+            file.writelines(f'{first_date + timedelta(days=day)},{date.today()}\n' for day in range(8))
+    return config_path
+
+
+def nothing_to_do_imports_pandas(config_path: str):
+    """Checks if run.py imports pandas for a run with nothing to process - it has to exit before the
+    transformation is imported, else the nothing-to-do measurement times an import (or a run) instead
+
+    Args:
+        config_path (str): path of the config of write_nothing_to_do_config
+
+    Returns:
+        Boolean: True if pandas is imported
+    """
+    code = ('import runpy, sys; sys.argv = sys.argv[1:]; runpy.run_path(sys.argv[0], run_name="__main__"); '
+            'print("pandas" in sys.modules)')
+    output = subprocess.run([sys.executable, '-c', code, RUN_PY, config_path], cwd=ROOT_DIR, check=True,
+                            capture_output=True, text=True).stdout
+    return output.strip().splitlines()[-1] == 'True'
+
+
+def median_seconds(command: list, repeat: int):
+    """Median wall time of a command in seconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT_DIR, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def measure_startup(repeat: int = 5):
+    """Measures the startup times
+
+    Args:
+        repeat (int, optional): processes per measurement. Defaults to 5.
+
+    Returns:
+        dict: median seconds per case
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config_path = write_nothing_to_do_config(tmp_dir)
+        if nothing_to_do_imports_pandas(config_path):
+            raise RuntimeError('run.py imports pandas with nothing to process, the early exit is not measured')
+        return {
+            'python -c pass': median_seconds([sys.executable, '-c', 'pass'], repeat),
+            'run.py --help': median_seconds([sys.executable, RUN_PY, '--help'], repeat),
+            'run.py (nothing to do)': median_seconds([sys.executable, RUN_PY, config_path], repeat),
+            'run.py --plan': median_seconds([sys.executable, RUN_PY, config_path, '--plan'], repeat),
+            'import etl_transformer': median_seconds(
+                [sys.executable, '-c', 'import ETL_sc.transformers.etl_transformer'], repeat),
+        }
+
+
+def main():
+    """Runs the benchmark and prints the results"""
+    parser = argparse.ArgumentParser(description='Benchmark of the startup time of run.py')
+    parser.add_argument('--repeat', type=int, default=5, help='processes per measurement (median is taken)')
+    args = parser.parse_args()
+    for name, seconds in measure_startup(args.repeat).items():
+        print(f'{name:<28}{seconds * 1000:>8.0f} ms')
+
+
+if __name__ == '__main__':
+    main()
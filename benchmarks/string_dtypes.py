@@ -0,0 +1,112 @@
+"""
+Benchmark of the dtypes of the text columns (ISIN, Mnemonic, Date, Time) of the extract
+
+Compares the Arrow csv parsing of the connector (Arrow-backed strings) with the default pandas csv parser (with
+pandas 3 also Arrow-backed strings), with the pyarrow engine of pandas (dates and times as strings by dtype=) and
+with the pandas csv parser keeping the text columns as Python objects (the default before pandas 3). Every setting runs in its own process and reads the synthetic hourly source
+files of a local directory, concatenates them, aggregates per ISIN and date and writes the result as parquet.
+Prints the memory of the extract (pandas memory_usage - it counts every Python string object, although the
+pandas parser shares the objects of repeated values), the wall time per stage and the peak RSS of the process,
+in total and above the RSS after the imports.
+
+    python -m benchmarks.string_dtypes --isins 3000 --days 5
+
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from io import BytesIO
+
+import pandas as pd
+
+from benchmarks.synthetic import generate_source
+from ETL_sc.common.local import LocalBucketConnector
+
+TEXT_COLUMNS = ['ISIN', 'Mnemonic', 'Date', 'Time']
+SETTINGS = {
+    'arrow': 'Arrow strings (connector)',
+    'pandas': 'pandas.read_csv default',
+    'pandas_pyarrow': 'pandas.read_csv pyarrow engine',
+    'object': 'Python object strings (pandas parser)',
+}
+
+
+def run_setting(setting: str, source_dir: str):
+    """Extracts and aggregates the source files of source_dir with the dtypes of a setting
+
+    Args:
+        setting (str): key of SETTINGS
+        source_dir (str): directory with the source files
+
+    Returns:
+        dict: memory of the extract in MB and wall times of the stages in seconds
+    """
+    connector = LocalBucketConnector(source_dir)
+    keys = connector.list_files_in_prefix('')
+    start = time.perf_counter()
+    if setting == 'arrow':
+        data_frames = [connector.read_csv_as_df(key) for key in keys]
+    elif setting == 'pandas':
+        data_frames = [pd.read_csv(connector._path(key)) for key in keys]
+    elif setting == 'pandas_pyarrow':
+        data_frames = [pd.read_csv(connector._path(key), engine='pyarrow', dtype={'Date': str, 'Time': str})
+                       for key in keys]
+    else:
+        data_frames = [pd.read_csv(connector._path(key), dtype={col: object for col in TEXT_COLUMNS}) for key in keys]
+    read_time = time.perf_counter() - start
+    start = time.perf_counter()
+    data_frame = pd.concat(data_frames, ignore_index=True)
+    concat_time = time.perf_counter() - start
+    start = time.perf_counter()
+    report = data_frame.groupby(['ISIN', 'Date'], as_index=False, sort=False)\
+        .agg(opening_price_eur=('StartPrice', 'first'), daily_traded_volume=('TradedVolume', 'sum'))
+    groupby_time = time.perf_counter() - start
+    start = time.perf_counter()
+    report.to_parquet(BytesIO(), index=False)
+    write_time = time.perf_counter() - start
+    return {'rows': len(data_frame), 'extract_mb': data_frame.memory_usage(index=False, deep=True).sum() / 1e6,
+            'read_s': read_time, 'concat_s': concat_time, 'groupby_s': groupby_time, 'write_s': write_time,
+            'dtypes': sorted({str(data_frame[col].dtype) for col in TEXT_COLUMNS})}
+
+
+def main():
+    """Runs the benchmark and prints the results"""
+    parser = argparse.ArgumentParser(description='Benchmark of the dtypes of the text columns of the extract')
+    parser.add_argument('--isins', type=int, default=3000, help='number of ISINs')
+    parser.add_argument('--days', type=int, default=5, help='number of trading days')
+    parser.add_argument('--setting', choices=SETTINGS, help=argparse.SUPPRESS)
+    parser.add_argument('--source-dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.setting:
+        # child process of one setting
+        import_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        result = run_setting(args.setting, args.source_dir)
+        result['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        result['extract_rss_mb'] = result['peak_rss_mb'] - import_rss_mb
+        print(json.dumps(result))
+        return
+
+    with tempfile.TemporaryDirectory() as source_dir:
+        dates = [(date(2021, 4, 12) + timedelta(days=day)).isoformat() for day in range(args.days)]
+        writer = LocalBucketConnector(source_dir)
+        for key, df_hour in generate_source(dates, args.isins).items():
+            writer.write_df_to_s3(df_hour, key, 'csv')
+        print(f'{"setting":<40}{"rows":>10}{"text dtype":>12}{"extract MB":>12}{"read s":>8}{"concat s":>10}'
+              f'{"groupby s":>11}{"write s":>9}{"peak RSS MB":>13}{"above imports":>15}')
+        for setting, name in SETTINGS.items():
+            output = subprocess.run([sys.executable, '-m', 'benchmarks.string_dtypes', '--setting', setting,
+                                     '--source-dir', source_dir], check=True, capture_output=True, text=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f'{name:<40}{result["rows"]:>10}{",".join(result["dtypes"]):>12}{result["extract_mb"]:>12.1f}'
+                  f'{result["read_s"]:>8.2f}{result["concat_s"]:>10.3f}{result["groupby_s"]:>11.3f}'
+                  f'{result["write_s"]:>9.3f}{result["peak_rss_mb"]:>13.0f}{result["extract_rss_mb"]:>15.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Generators of synthetic Xetra-like source data and report data for the benchmarks"""
+
+import numpy as np
+import pandas as pd
+
+SRC_COLUMNS = ['ISIN', 'Mnemonic', 'Date', 'Time', 'StartPrice', 'EndPrice', 'MinPrice', 'MaxPrice', 'TradedVolume']
+REPORT_COLUMNS = ['ISIN', 'Date', 'opening_price_eur', 'closing_price_eur', 'minimum_price_eur',
+                  'maximum_price_eur', 'daily_traded_volume', 'change_prev_closing_%']
+
+
+def isins(n_isins: int):
+    """Synthetic ISINs
+
+    Args:
+        n_isins (int): number of ISINs
+
+    Returns:
+        list: ISINs like 'DE0000000042'
+    """
+    return [f'DE{i:010d}' for i in range(n_isins)]
+
+
+def generate_source_hour(date: str, hour: int, n_isins: int, seed: int = 0):
+    """Source data of one hourly file - one row per ISIN and minute with trades, in time order
+
+    Args:
+        date (str): date of the file, '%Y-%m-%d'
+        hour (int): hour of the file
+        n_isins (int): number of ISINs
+        seed (int, optional): seed of the random numbers. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: source data with the Xetra columns
+    """
+    rng = np.random.default_rng([seed, hour, int(date.replace('-', ''))])
+    all_isins = np.array(isins(n_isins))
+    # about a third of the ISINs trade in a minute
+    minutes, isin_idx = np.nonzero(rng.random((60, n_isins)) < 0.3)
+    n_rows = len(minutes)
+    start = 10 + (isin_idx % 200) + rng.normal(0, 0.1, n_rows)
+    end = start + rng.normal(0, 0.05, n_rows)
+    return pd.DataFrame({
+        'ISIN': all_isins[isin_idx],
+        'Mnemonic': np.char.add('M', (isin_idx % 1000).astype(str)),
+        'Date': date,
+        'Time': [f'{hour:02d}:{minute:02d}' for minute in minutes],
+        'StartPrice': start.round(2),
+        'EndPrice': end.round(2),
+        'MinPrice': (np.minimum(start, end) - np.abs(rng.normal(0, 0.02, n_rows))).round(2),
+        'MaxPrice': (np.maximum(start, end) + np.abs(rng.normal(0, 0.02, n_rows))).round(2),
+        'TradedVolume': rng.integers(1, 5000, n_rows)}, columns=SRC_COLUMNS)
+
+
+def generate_source(dates: list, n_isins: int, hours: range = range(8, 17), seed: int = 0):
+    """Source data of several days, as hourly files
+
+    Args:
+        dates (list): dates, '%Y-%m-%d'
+        n_isins (int): number of ISINs
+        hours (range, optional): trading hours. Defaults to range(8, 17).
+        seed (int, optional): seed of the random numbers. Defaults to 0.
+
+    Returns:
+        dict: source key ('<date>/<date>_BINS_XETR<hour>.csv') -> pd.DataFrame of the hourly file
+    """
+    return {f'{date}/{date}_BINS_XETR{hour:02d}.csv': generate_source_hour(date, hour, n_isins, seed)
+            for date in dates for hour in hours}
+
+
+def generate_report(n_isins: int, n_days: int, seed: int = 0):
+    """Report 1 data, sorted by date (as the ISINs of a day are written together by many producers)
+
+    Args:
+        n_isins (int): number of ISINs
+        n_days (int): number of days
+        seed (int, optional): seed of the random numbers. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: report data with the report 1 columns
+    """
+    rng = np.random.default_rng(seed)
+    n_rows = n_isins * n_days
+    dates = pd.date_range('2021-01-04', periods=n_days, freq='B').strftime('%Y-%m-%d')
+    opening = 10 + rng.random(n_rows) * 200
+    closing = opening * (1 + rng.normal(0, 0.01, n_rows))
+    return pd.DataFrame({
+        'ISIN': np.tile(isins(n_isins), n_days),
+        'Date': np.repeat(dates, n_isins),
+        'opening_price_eur': opening.round(2),
+        'closing_price_eur': closing.round(2),
+        'minimum_price_eur': (np.minimum(opening, closing) * 0.99).round(2),
+        'maximum_price_eur': (np.maximum(opening, closing) * 1.01).round(2),
+        'daily_traded_volume': rng.integers(1, 10 ** 6, n_rows),
+        'change_prev_closing_%': rng.normal(0, 1, n_rows).round(2)}, columns=REPORT_COLUMNS)
@@ -1,63 +1,346 @@
-"""Entry point for running the Stock data ETL application"""
+"""Entry point for running the Stock data ETL application
+
+Only the standard library and yaml are imported at startup. boto3 is imported with the S3 connector,
+pandas only once there is something to process - so --help, --plan and runs without new dates stay fast.
+"""
 
 import argparse
 import logging
 import logging.config
+import os
+import socket
 from os import access
 
 import yaml
 
-from ETL_sc.common.s3 import S3BucketConnector
-from ETL_sc.transformers.etl_transformer import StockETL, EtlSourceConfig, EtlTargetConfig
+
+def create_connector(s3_config: dict, side: str):
+    """
+    Creates the bucket connector of the source or target as per the s3 configuration -
+    <side>_backend selects 's3' (default) or 'local' (a local directory given by <side>_local_dir);
+    the source can also use 's3_async' (asyncio connector, needs aiobotocore)
+
+    Args:
+        s3_config (dict): s3 section of the configuration
+        side (str): 'src' or 'trg'
+
+    Returns:
+        BucketConnector: connector for the bucket
+    """
+    if s3_config.get(f'{side}_backend', 's3') == 'local':
+        from ETL_sc.common.local import LocalBucketConnector
+        return LocalBucketConnector(s3_config[f'{side}_local_dir'])
+    if s3_config.get(f'{side}_backend') == 's3_async':
+        from ETL_sc.common.async_s3 import AsyncS3BucketConnector
+        return AsyncS3BucketConnector(access_key=s3_config['access_key'],
+                                      secret_key=s3_config['secret_key'],
+                                      endpoint_url=s3_config[f'{side}_endpoint_url'],
+                                      bucket_name=s3_config[f'{side}_bucket'],
+                                      max_concurrency=s3_config.get('max_concurrency', 8),
+                                      max_attempts=s3_config.get('max_attempts', 5))
+    from ETL_sc.common.s3 import S3BucketConnector
+    return S3BucketConnector(access_key=s3_config['access_key'],
+                             secret_key=s3_config['secret_key'],
+                             endpoint_url=s3_config[f'{side}_endpoint_url'],
+                             bucket_name=s3_config[f'{side}_bucket'],
+                             max_concurrency=s3_config.get('max_concurrency', 8),
+                             max_attempts=s3_config.get('max_attempts', 5),
+                             range_size=s3_config.get('range_size', 8 * 1024 * 1024))
+
+
+def log_request_stats(logger: logging.Logger, connectors: dict):
+    """
+    Logs the request statistics (requests, retries, throttles, timeouts, cached reads) of the bucket connectors
+
+    Args:
+        logger (logging.Logger): logger of the run summary
+        connectors (dict): bucket connectors by name
+    """
+    for name, connector in connectors.items():
+        stats = connector.request_stats()
+        if stats:
+            logger.info('%s bucket: %s requests, %s retries (%s throttled, %s timed out)', name,
+                        stats['requests'], stats['retries'], stats['throttles'], stats['timeouts'])
+        if connector.read_cache is not None:
+            logger.info('%s bucket: %s reads from the cache, %s fetched', name,
+                        connector.read_cache.stats['hits'], connector.read_cache.stats['misses'])
+
+
+def load_jobs(config_paths: list):
+    """
+    Reads the configuration files - every file is one job per enabled venue of its venues section (one job if
+    it has none) and per entry of its jobs list (one job if it has none). The sections of a venue override the
+    sections of the file, the sections of a jobs entry override both. A venue with enabled: false is skipped.
+
+    Args:
+        config_paths (list): paths of the configuration files
+
+    Returns:
+        list: configuration (dict) per job
+    """
+    jobs = []
+    for config_path in config_paths:
+        with open(config_path) as config_file:
+            config = yaml.safe_load(config_file)
+        venues = config.pop('venues', None) or {None: {}}
+        job_entries = config.pop('jobs', None) or [{}]
+        for venue, venue_config in venues.items():
+            venue_config = dict(venue_config or {})
+            if not venue_config.pop('enabled', True):
+                continue
+            for job in job_entries:
+                sections = set(config) | set(venue_config) | set(job)
+                job_config = {section: {**config.get(section, {}), **venue_config.get(section, {}),
+                                        **job.get(section, {})} for section in sections}
+                if venue is not None:
+                    job_config['source']['src_venue'] = venue
+                jobs.append(job_config)
+    return jobs
+
+
+def job_venue(config: dict):
+    """Name of the trading venue of a job (Xetra if the config names none)"""
+    return config['source'].get('src_venue', 'Xetra')
+
+
+def connector_id(s3_config: dict, side: str):
+    """
+    Identity of the bucket of the source or target - jobs with the same bucket share the connector
+
+    Args:
+        s3_config (dict): s3 section of the configuration
+        side (str): 'src' or 'trg'
+
+    Returns:
+        tuple: backend and location of the bucket
+    """
+    if s3_config.get(f'{side}_backend', 's3') == 'local':
+        return ('local', os.path.abspath(s3_config[f'{side}_local_dir']))
+    return (s3_config.get(f'{side}_backend', 's3'), s3_config[f'{side}_endpoint_url'], s3_config[f'{side}_bucket'])
+
+
+def create_job_connectors(jobs: list):
+    """
+    Creates the bucket connectors of the jobs - one connector per distinct bucket. With several jobs the
+    source connectors read in one shared, bounded I/O pool, and sources of several jobs that are not written
+    by any job get a read cache, so that source files needed by several jobs are fetched once.
+
+    Args:
+        jobs (list): configuration per job
+
+    Returns:
+        tuple: list of the (source, target) connectors per job, shared I/O pool (None for one job)
+    """
+    connectors = {}
+    job_connectors = []
+    for job in jobs:
+        pair = []
+        for side in ('src', 'trg'):
+            bucket_id = connector_id(job['s3'], side)
+            if bucket_id not in connectors:
+                connectors[bucket_id] = create_connector(job['s3'], side)
+            pair.append(connectors[bucket_id])
+        job_connectors.append(tuple(pair))
+    if len(jobs) <= 1:
+        return job_connectors, None
+
+    from concurrent.futures import ThreadPoolExecutor
+    from ETL_sc.common.read_cache import ReadCache
+    io_pool = ThreadPoolExecutor(max_workers=max(job['s3'].get('max_concurrency', 8) for job in jobs))
+    targets = {id(trg) for _, trg in job_connectors}
+    sources = [id(src) for src, _ in job_connectors]
+    for job, (src, _) in zip(jobs, job_connectors):
+        if job['s3'].get('src_backend') == 's3_async':
+            continue # requests on the event loop of the job
+        src.io_pool = io_pool
+        if sources.count(id(src)) > 1 and id(src) not in targets and src.read_cache is None:
+            src.read_cache = ReadCache(int(jobs[0]['s3'].get('read_cache_mb', 256) * 1024 * 1024))
+    return job_connectors, io_pool
 
 
 def main():
     """
-    Entry point to run the Stock-data ETL job
+    Entry point to run the Stock-data ETL job(s)
     """
 
-    #Parsing the YAML (configuration) file.
+    #Parsing the YAML (configuration) file(s).
 
     #Submit the path of config file as an argument
     parser = argparse.ArgumentParser(description="Run the stock-data ETL job") #parser reads launch.json
-    parser.add_argument('config', help='A path to configuration file, in YAML format')
+    parser.add_argument('config', nargs='+',
+                        help='Path(s) to configuration files, in YAML format - one job per file or per entry of its jobs list')
+    parser.add_argument('--watch', '--serve', action='store_true',
+                        help='Keep running and process new source files as they land, one loop per job '
+                             '(needs run.state_prefix)')
+    parser.add_argument('--plan', action='store_true',
+                        help='Only plan the run: list the source and estimate objects, bytes, requests and wall time')
+    parser.add_argument('--worker', action='store_true',
+                        help='Run as one of several workers sharing the planned dates via leases in the target bucket')
+    parser.add_argument('--worker-id', default=f'{socket.gethostname()}-{os.getpid()}',
+                        help='Unique id of the worker (default: <hostname>-<pid>)')
+    parser.add_argument('--concurrent-jobs', type=int, default=None,
+                        help='Number of jobs run at the same time (default: number of venues, '
+                             'i.e. the venues concurrently and the jobs of a venue one after the other)')
     args = parser.parse_args()
-    config = yaml.safe_load(open(args.config))
+    jobs = load_jobs(args.config)
 
 
-    #Congifure logging
-    log_config = config['logging']
+    #Congifure logging (of the first job)
+    log_config = jobs[0]['logging']
     logging.config.dictConfig(log_config) #loading the config as a dictionary
     logger = logging.getLogger(__name__)
 
-    #Reading our S3 configuration from YAML
-    s3_config = config['s3']
+    # checking the mode against the configuration before anything is imported or listed
+    if args.watch and args.concurrent_jobs and args.concurrent_jobs < len(jobs):
+        parser.error('--watch runs every job in its own loop at the same time, --concurrent-jobs is too low')
+    for job in jobs:
+        if args.watch and not job.get('run', {}).get('state_prefix'):
+            parser.error('--watch needs the incremental mode (run.state_prefix in the config)')
+        if args.worker and job['target'].get('trg_sqlite_key'):
+            parser.error('--worker does not support the SQLite sink (target.trg_sqlite_key)')
+        if job['s3'].get('src_backend') == 's3_async':
+            if job['s3'].get('trg_backend') == 's3_async':
+                parser.error('s3_async is only supported as source backend (s3.src_backend)')
+            if args.watch or args.worker or args.plan or job.get('run', {}).get('state_prefix'):
+                parser.error('the source backend s3_async only supports the default mode '
+                             '(no --plan, --watch, --worker or run.state_prefix)')
+            for name in ('checkpoint_prefix', 'stage_cache_dir'):
+                if job.get('run', {}).get(name):
+                    parser.error(f'the source backend s3_async does not support run.{name}')
+            if [connector_id(other['s3'], 'src') for other in jobs].count(connector_id(job['s3'], 'src')) > 1:
+                parser.error('jobs with the source backend s3_async need different source buckets')
+    # jobs writing to the same target bucket must not share their meta file, outputs or run state
+    job_outputs = {}
+    for number, job in enumerate(jobs):
+        run_section = job.get('run', {})
+        for name, value in (('meta.meta_key', job['meta']['meta_key']), ('target.trg_key', job['target']['trg_key']),
+                            ('target.trg_leaderboard_key', job['target'].get('trg_leaderboard_key')),
+                            ('target.trg_sqlite_key', job['target'].get('trg_sqlite_key')),
+                            ('run.checkpoint_prefix', run_section.get('checkpoint_prefix')),
+                            ('run.state_prefix', run_section.get('state_prefix')),
+                            ('run.work_prefix', run_section.get('work_prefix', 'work/report1/') if args.worker else None)):
+            if value and job_outputs.setdefault((connector_id(job['s3'], 'trg'), name, value), number) != number:
+                parser.error(f'jobs with the same target bucket need different {name} ({value})')
 
-    # creating the S3BucketConnector class instances for source and target
-    s3_bucket_src = S3BucketConnector(access_key=s3_config['access_key'],
-                                      secret_key=s3_config['secret_key'],
-                                      endpoint_url=s3_config['src_endpoint_url'],
-                                      bucket_name=s3_config['src_bucket'])
+    # creating the bucket connector instances for sources and targets
+    job_connectors, io_pool = create_job_connectors(jobs)
+
+    concurrent_jobs = args.concurrent_jobs or len({job_venue(job) for job in jobs})
+    if args.watch:
+        # the watch loops of the jobs never end, every job needs its own thread
+        concurrent_jobs = len(jobs)
+    try:
+        if concurrent_jobs > 1 and len(jobs) > 1:
+            import threading
+            from concurrent.futures import ThreadPoolExecutor
+            stop = threading.Event()
+            with ThreadPoolExecutor(max_workers=concurrent_jobs) as executor:
+                results = executor.map(lambda job_args: run_job(*job_args, args, logger, stop),
+                                       [(job, *connectors) for job, connectors in zip(jobs, job_connectors)])
+                try:
+                    list(results)
+                except KeyboardInterrupt:
+                    # the watch loops end after their current run, the other jobs run to their end
+                    stop.set()
+                    if not args.watch:
+                        raise
+                    logger.info('ETL jobs stopping...')
+        else:
+            for job, connectors in zip(jobs, job_connectors):
+                run_job(job, *connectors, args, logger)
+    finally:
+        if io_pool is not None:
+            io_pool.shutdown()
+
+    connectors = {}
+    for src, trg in job_connectors:
+        connectors.setdefault(id(src), (f'Source {src.location}', src))
+        connectors.setdefault(id(trg), (f'Target {trg.location}', trg))
+    log_request_stats(logger, dict(connectors.values()))
 
-    s3_bucket_trg = S3BucketConnector(access_key=s3_config['access_key'],
-                                      secret_key=s3_config['secret_key'],
-                                      endpoint_url=s3_config['trg_endpoint_url'],
-                                      bucket_name=s3_config['trg_bucket'])
+
+def run_job(config: dict, s3_bucket_src, s3_bucket_trg, args: argparse.Namespace, logger: logging.Logger,
+            stop=None):
+    """
+    Runs one job as per its configuration and the mode of the command line
+
+    Args:
+        config (dict): configuration of the job
+        s3_bucket_src (BucketConnector): connector of the source bucket
+        s3_bucket_trg (BucketConnector): connector of the target bucket
+        args (argparse.Namespace): command line arguments
+        logger (logging.Logger): logger of the job
+        stop (threading.Event, optional): stops the watch mode of jobs run in threads. Defaults to None.
+    """
+    run_section = config.get('run', {})
+    venue = job_venue(config)
+
+    # dry run - planned without pandas and without reading source data
+    if args.plan:
+        from ETL_sc.common.planner import plan_run, log_plan
+        log_plan(plan_run(config['source']['src_first_extract_date'], config['meta']['meta_key'],
+                          s3_bucket_src, s3_bucket_trg), logger, f'{venue} plan')
+        return
+
+    # nothing to do (all dates in the meta file) -> finished without importing pandas;
+    # the incremental and watch modes always check today's source files
+    if not (args.watch or run_section.get('state_prefix')):
+        from ETL_sc.common.meta_process import MetaProcess
+        _, dates = MetaProcess.return_date_list(config['source']['src_first_extract_date'],
+                                                config['meta']['meta_key'], s3_bucket_trg)
+        if not dates:
+            logger.info('%s ETL job: nothing to process, all dates are in the meta file.', venue)
+            return
+
+    # the transformation (and with it pandas) is only imported for a real run
+    from ETL_sc.transformers.etl_transformer import StockETL, EtlSourceConfig, EtlTargetConfig, EtlRunConfig
 
     # reading source configuration
     source_config = EtlSourceConfig(**config['source']) #** allows dictionaries to be submitted as keyword arguments.
     # reading target configuration
     target_config = EtlTargetConfig(**config['target'])
+    # reading (optional) run configuration
+    run_config = EtlRunConfig(**run_section)
     # reading meta file configuration
     meta_config = config['meta']
 
     # creating StockETL class instance
-    logger.info('Xetra ETL job started')
+    logger.info('%s ETL job started', venue)
     stock_etl = StockETL(s3_bucket_src, s3_bucket_trg,
-                         meta_config['meta_key'], source_config, target_config)
-    # running etl job for xetra report1
-    stock_etl.etl_report1()
-    logger.info('Xetra ETL job finished.')
+                         meta_config['meta_key'], source_config, target_config, run_config)
+    # running etl job for report1 of the venue
+    try:
+        if args.watch:
+            logger.info('%s ETL job watching the source every %s seconds', venue, run_config.watch_interval)
+            try:
+                stock_etl.watch(run_config.watch_interval, stop=stop)
+            except KeyboardInterrupt:
+                logger.info('%s ETL job stopped.', venue)
+        elif args.worker:
+            logger.info('%s ETL job running as worker %s', venue, args.worker_id)
+            stock_etl.etl_report1_worker(args.worker_id)
+        elif run_config.state_prefix:
+            stock_etl.etl_report1_incremental()
+        elif config['s3'].get('src_backend') == 's3_async':
+            import asyncio
+            asyncio.run(run_async_job(stock_etl))
+        else:
+            stock_etl.etl_report1()
+    finally:
+        # e.g. the transformation worker processes and the local copy of the SQLite database
+        stock_etl.close()
+    logger.info('%s ETL job finished.', venue)
+
+
+async def run_async_job(stock_etl):
+    """
+    Runs report 1 of a job with the asyncio source connector, which is open during the run
+
+    Args:
+        stock_etl (StockETL): the job, with an AsyncS3BucketConnector as source
+    """
+    async with stock_etl.s3_bucket_src:
+        await stock_etl.etl_report1_async()
 
 
 
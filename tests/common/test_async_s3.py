@@ -0,0 +1,128 @@
+"""Test AsyncS3BucketConnector methods"""
+
+import asyncio
+import os
+import unittest
+from io import BytesIO
+
+import boto3
+import pandas as pd
+
+try:
+    from moto.server import ThreadedMotoServer # needs the server extras of moto (flask)
+except ImportError:
+    ThreadedMotoServer = None
+
+from ETL_sc.common import async_s3
+from ETL_sc.common.async_s3 import AsyncS3BucketConnector
+from ETL_sc.common.constants import S3ObjectMetadata
+
+
+@unittest.skipIf(async_s3.get_session is None, 'aiobotocore is not installed')
+@unittest.skipIf(ThreadedMotoServer is None, 'the moto server is not installed')
+class TestAsyncS3BucketConnectorMethods(unittest.TestCase):
+    """Testing the AsyncS3BucketConnector class against a local moto server
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """Starts the moto server once for all tests"""
+        cls.server = ThreadedMotoServer(port=5123, verbose=False)
+        cls.server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stops the moto server"""
+        cls.server.stop()
+
+    def setUp(self):
+        """Method used to initilize our test (ran each time)
+        """
+        self.s3_access_key = 'AWS_ACCESS_KEY_ID'
+        self.s3_secret_key = 'AWS_SECRET_ACCESS_KEY'
+        self.s3_endpoint_url = 'http://127.0.0.1:5123'
+        self.s3_bucket_name = 'test-bucket'
+        os.environ[self.s3_access_key] = 'KEY1'
+        os.environ[self.s3_secret_key] = 'KEY2'
+        os.environ.setdefault('AWS_DEFAULT_REGION', 'eu-central-1')
+        self.s3 = boto3.resource(service_name='s3', endpoint_url=self.s3_endpoint_url,
+                                 aws_access_key_id='KEY1', aws_secret_access_key='KEY2')
+        self.s3.create_bucket(Bucket=self.s3_bucket_name,
+                              CreateBucketConfiguration={'LocationConstraint': 'eu-central-1'})
+        self.s3_bucket = self.s3.Bucket(self.s3_bucket_name)
+        self.s3_bucket_conn = AsyncS3BucketConnector(self.s3_access_key, self.s3_secret_key,
+                                                     self.s3_endpoint_url, self.s3_bucket_name, max_concurrency=4)
+
+    def tearDown(self):
+        """Ran each time after the unit tests have been done."""
+        self.s3_bucket.objects.all().delete()
+        self.s3_bucket.delete()
+
+    def run_async(self, coroutine_function):
+        """Runs a coroutine function with the opened connector"""
+        async def run():
+            async with self.s3_bucket_conn:
+                return await coroutine_function()
+        return asyncio.run(run())
+
+    def test_list_files_in_prefix_ok(self):
+        """
+        Tests the list_files_in_prefix method over several listing pages
+        """
+        # Test init
+        keys = [f'prefix/test{number:04d}.csv' for number in range(1005)]
+        for key in keys:
+            self.s3_bucket.put_object(Body='col1\n1', Key=key)
+        self.s3_bucket.put_object(Body='col1\n1', Key='other/test.csv')
+        # Method execution
+        list_result = self.run_async(lambda: self.s3_bucket_conn.list_files_in_prefix('prefix/'))
+        # Test after method execution
+        self.assertEqual(list_result, keys)
+
+    def test_read_csvs_as_dfs_ok(self):
+        """
+        Tests the read_csvs_as_dfs method - more files than requests in flight, in the order of the keys
+        """
+        # Test init
+        keys = [f'test{number}.csv' for number in range(10)]
+        for number, key in enumerate(keys):
+            self.s3_bucket.put_object(Body=f'col1,col2\n{number},A', Key=key)
+        # Method execution
+        data_frames = self.run_async(lambda: self.s3_bucket_conn.read_csvs_as_dfs(keys))
+        # Test after method execution
+        self.assertEqual([df['col1'][0] for df in data_frames], list(range(10)))
+        self.assertEqual(data_frames[0]['col2'][0], 'A')
+
+    def test_write_df_to_s3_skip_unchanged(self):
+        """
+        Tests the write_df_to_s3 method - content hash in the metadata, an unchanged upload is skipped
+        """
+        # Test init
+        key = 'test.parquet'
+        df_exp = pd.DataFrame({'col1': ['A', 'B'], 'col2': [1, 2]})
+        # Method execution
+        async def write_twice():
+            first = await self.s3_bucket_conn.write_df_to_s3(df_exp, key, 'parquet', skip_unchanged=True)
+            etag = self.s3_bucket.Object(key).e_tag
+            second = await self.s3_bucket_conn.write_df_to_s3(df_exp, key, 'parquet', skip_unchanged=True)
+            return first, second, etag
+        first, second, etag = self.run_async(write_twice)
+        # Test after method execution
+        obj = self.s3_bucket.Object(key)
+        self.assertTrue(first and second)
+        self.assertEqual(obj.e_tag, etag)
+        self.assertIn(S3ObjectMetadata.CONTENT_SHA256.value, obj.metadata)
+        self.assertTrue(pd.read_parquet(BytesIO(obj.get()['Body'].read())).equals(df_exp))
+
+    def test_read_csv_as_df_no_such_key(self):
+        """
+        Tests the read_csv_as_df method for a missing key
+        """
+        async def read_missing():
+            with self.assertRaises(self.s3_bucket_conn.no_such_key):
+                await self.s3_bucket_conn.read_csv_as_df('missing.csv')
+        self.run_async(read_missing)
+
+
+if __name__ == "__main__":
+    unittest.main()
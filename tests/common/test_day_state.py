@@ -0,0 +1,92 @@
+"""Test DayState methods"""
+
+import os
+import unittest
+import unittest.mock
+
+import boto3
+import pandas as pd
+from moto import mock_s3
+
+from ETL_sc.common.day_state import DayState
+from ETL_sc.common.s3 import S3BucketConnector, S3ObjectInfo
+
+
+class TestDayStateMethods(unittest.TestCase):
+    """Testing the DayState class"""
+
+    def setUp(self):
+        """
+        Setting up the environment
+        """
+        # mocking s3 connection start
+        self.mock_s3 = mock_s3()
+        self.mock_s3.start()
+        # Defining the class arguments
+        self.s3_access_key = 'AWS_ACCESS_KEY_ID'
+        self.s3_secret_key = 'AWS_SECRET_ACCESS_KEY'
+        self.s3_endpoint_url = 'https://s3.eu-central-1.amazonaws.com'
+        self.s3_bucket_name = 'test-bucket'
+        os.environ[self.s3_access_key] = 'KEY1'
+        os.environ[self.s3_secret_key] = 'KEY2'
+        self.s3 = boto3.resource(service_name='s3', endpoint_url=self.s3_endpoint_url)
+        self.s3.create_bucket(Bucket=self.s3_bucket_name,
+                              CreateBucketConfiguration={
+                                  'LocationConstraint': 'eu-central-1'})
+        self.s3_bucket_conn = S3BucketConnector(self.s3_access_key, self.s3_secret_key,
+                                                self.s3_endpoint_url, self.s3_bucket_name)
+
+    def tearDown(self):
+        # mocking s3 connection stop
+        self.mock_s3.stop()
+
+    def test_no_state(self):
+        """
+        Tests reading a date without stored state
+        """
+        day_state = DayState('state/', self.s3_bucket_conn)
+        self.assertEqual(day_state.read_manifest('2021-04-19'), {})
+        self.assertTrue(day_state.read_partials('2021-04-19').empty)
+        self.assertEqual(day_state.dates(), [])
+
+    def test_write_read(self):
+        """
+        Tests writing a day state and reading it back - from S3 with a new
+        instance and from memory with the same instance
+        """
+        # Expected results
+        manifest_exp = {'2021-04-19/file.csv': S3ObjectInfo('2021-04-19/file.csv', '0123e4', 10)}
+        df_exp = pd.DataFrame({'ISIN': ['AT0000A0E9W5'], 'Date': [18736]})
+        # Method execution
+        day_state = DayState('state/', self.s3_bucket_conn)
+        day_state.write('2021-04-19', df_exp, manifest_exp)
+        day_state_new = DayState('state/', self.s3_bucket_conn)
+        # Test after method execution
+        self.assertEqual(day_state_new.read_manifest('2021-04-19'), manifest_exp)
+        self.assertTrue(df_exp.equals(day_state_new.read_partials('2021-04-19')))
+        self.assertEqual(day_state_new.dates(), ['2021-04-19'])
+        with unittest.mock.patch.object(self.s3_bucket_conn, 'read_parquet_as_df') as read_mock:
+            self.assertEqual(day_state.read_manifest('2021-04-19'), manifest_exp)
+            self.assertTrue(df_exp.equals(day_state.read_partials('2021-04-19')))
+            read_mock.assert_not_called()
+
+    def test_cache_eviction(self):
+        """
+        Tests that only the states of the most recently used dates are kept in memory
+        """
+        # Test init
+        dates = ['2021-04-16', '2021-04-17', '2021-04-18', '2021-04-19']
+        day_state = DayState('state/', self.s3_bucket_conn, max_cached_dates=2)
+        # Method execution
+        for date in dates[:3]:
+            day_state.write(date, pd.DataFrame({'Date': [date]}), {})
+        day_state.read_partials(dates[1])
+        day_state.read_manifest(dates[3])
+        # Test after method execution
+        self.assertEqual(list(day_state._partials), [dates[2], dates[1]])
+        self.assertEqual(list(day_state._manifests), [dates[2], dates[3]])
+        self.assertEqual(day_state.read_partials(dates[0])['Date'].tolist(), [dates[0]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+"""Test LocalBucketConnector methods"""
+
+import os
+import tempfile
+import unittest
+from io import BytesIO
+from unittest.mock import patch
+
+import pandas as pd
+import pyarrow as pa
+
+from ETL_sc.common.local import LocalBucketConnector
+from ETL_sc.common.meta_process import MetaProcess
+
+
+class TestLocalBucketConnectorMethods(unittest.TestCase):
+    """Testing the LocalBucketConnector class"""
+
+    def setUp(self):
+        """
+        Setting up the environment - a temporary directory as bucket
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.local_bucket_conn = LocalBucketConnector(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_write_read_list(self):
+        """
+        Tests writing a csv and a parquet file, listing them with a prefix and reading them back
+        """
+        # Expected results
+        df_exp = pd.DataFrame([['A', 1.5], ['C', 2.5]], columns=['col1', 'col2'])
+        keys_exp = ['prefix/test.csv', 'prefix/test.parquet']
+        # Method execution
+        self.local_bucket_conn.write_df_to_s3(df_exp, 'prefix/test.csv', 'csv')
+        self.local_bucket_conn.write_df_to_s3(df_exp, 'prefix/test.parquet', 'parquet')
+        self.local_bucket_conn.write_df_to_s3(df_exp, 'other/test.csv', 'csv')
+        # Test after method execution
+        self.assertEqual(self.local_bucket_conn.list_files_in_prefix('prefix/'), keys_exp)
+        self.assertEqual(self.local_bucket_conn.list_files_in_prefix('prefix/test.c'), keys_exp[:1])
+        self.assertTrue(df_exp.equals(self.local_bucket_conn.read_csv_as_df('prefix/test.csv')))
+        self.assertTrue(df_exp.equals(self.local_bucket_conn.read_parquet_as_df('prefix/test.parquet')))
+        self.assertEqual([file for file in os.listdir(os.path.join(self.tmp_dir.name, 'prefix'))
+                          if file.startswith('.tmp')], [])
+
+    def test_list_date_prefix(self):
+        """
+        Tests listing with a prefix without '/' - only the matching entries of the root directory are walked
+        """
+        # Test init
+        keys = ['2021-04-16/2021-04-16_BINS_XETR08.csv', '2021-04-16/sub/file.csv',
+                '2021-04-17/2021-04-17_BINS_XETR08.csv', '2021-04-16.csv']
+        for key in keys:
+            self.local_bucket_conn.write_bytes(key, b'col1\n1', skip_unchanged=False)
+        # Method execution
+        with patch('os.walk', wraps=os.walk) as walk_mock:
+            list_result = self.local_bucket_conn.list_files_in_prefix('2021-04-16')
+        # Test after method execution
+        self.assertEqual(list_result, sorted(keys[:2] + keys[3:]))
+        self.assertEqual([call.args[0] for call in walk_mock.call_args_list],
+                         [os.path.join(self.local_bucket_conn.root_dir, '2021-04-16')])
+        self.assertEqual(self.local_bucket_conn.list_files_in_prefix('2021-04-2'), [])
+        self.assertEqual(self.local_bucket_conn.list_files_in_prefix('missing/'), [])
+        self.assertEqual(len(self.local_bucket_conn.list_files_in_prefix('')), 4)
+
+    def test_write_skip_unchanged(self):
+        """
+        Tests that writing the same content again is skipped
+        """
+        # Expected results
+        df_exp = pd.DataFrame([['A', 'B']], columns=['col1', 'col2'])
+        # Method execution
+        self.local_bucket_conn.write_df_to_s3(df_exp, 'test.csv', 'csv', skip_unchanged=True)
+        etag = self.local_bucket_conn.list_objects_in_prefix('test.csv')[0].etag
+        with self.assertLogs() as logm:
+            self.local_bucket_conn.write_df_to_s3(df_exp, 'test.csv', 'csv', skip_unchanged=True)
+            # Log test after method execution
+            self.assertIn('is unchanged, upload skipped', logm.output[0])
+        # Test after method execution
+        self.assertEqual(self.local_bucket_conn.list_objects_in_prefix('test.csv')[0].etag, etag)
+
+    def test_missing_key(self):
+        """
+        Tests reading a missing key - raises the connectors no_such_key exception,
+        which is handled by MetaProcess
+        """
+        with self.assertRaises(self.local_bucket_conn.no_such_key):
+            self.local_bucket_conn.read_csv_as_df('missing.csv')
+        return_min_date, _ = MetaProcess.return_date_list('2021-04-17', 'meta.csv', self.local_bucket_conn)
+        self.assertEqual(return_min_date, '2021-04-17')
+
+    def test_empty_file(self):
+        """
+        Tests reading an empty (header only) csv file
+        """
+        with open(os.path.join(self.tmp_dir.name, 'empty.csv'), 'w', encoding='utf-8') as file:
+            file.write('col1,col2\n')
+        self.assertTrue(self.local_bucket_conn.read_csv_as_df('empty.csv').empty)
+
+    def test_write_empty_file_skip_unchanged(self):
+        """
+        Tests writing an empty file twice with skip_unchanged - the second write is skipped
+        """
+        # Method execution
+        self.assertTrue(self.local_bucket_conn.write_bytes('empty.txt', b'', skip_unchanged=True))
+        with self.assertLogs() as logm:
+            self.assertTrue(self.local_bucket_conn.write_bytes('empty.txt', b'', skip_unchanged=True))
+        # Test after method execution
+        self.assertIn('unchanged, upload skipped', logm.output[0])
+        self.assertEqual(self.local_bucket_conn.read_bytes('empty.txt'), b'')
+
+    def test_read_csv_memory_mapped(self):
+        """
+        Tests that csv files are handed to the parser as Arrow memory map (without a copy)
+        """
+        # Test init
+        self.local_bucket_conn.write_bytes('test.csv', b'col1,col2\n1,A\n', skip_unchanged=False)
+        # Method execution
+        with patch.object(self.local_bucket_conn, '_csv_to_df', wraps=self.local_bucket_conn._csv_to_df) as parse_mock:
+            df_result = self.local_bucket_conn.read_csv_as_df('test.csv')
+        # Test after method execution
+        self.assertIsInstance(parse_mock.call_args.args[0], pa.MemoryMappedFile)
+        self.assertEqual(list(df_result['col2']), ['A'])
+
+    def test_read_csv_dtypes(self):
+        """
+        Tests that text columns are read as Arrow-backed strings - also dates and times, which keep their text -
+        and numeric columns as by pandas
+        """
+        # Expected results
+        dtypes_exp = {'ISIN': self.local_bucket_conn.string_dtype(), 'Date': self.local_bucket_conn.string_dtype(),
+                      'Time': self.local_bucket_conn.string_dtype(), 'Price': 'float64', 'Volume': 'int64',
+                      'Missing': 'float64', 'Late': self.local_bucket_conn.string_dtype()}
+        body = 'ISIN,Date,Time,Price,Volume,Missing,Late\n' + 'DE0001,2021-04-16,09:00,1.5,10,,\n' * 5000\
+            + 'DE0002,2021-04-16,09:01,,20,,2021-04-17\n'
+        # Method execution
+        self.local_bucket_conn.write_bytes('test.csv', body.encode(), skip_unchanged=False)
+        df_result = self.local_bucket_conn.read_csv_as_df('test.csv')
+        # Test after method execution
+        self.assertEqual(df_result.dtypes.to_dict(), dtypes_exp)
+        self.assertEqual(list(df_result.iloc[-1, :3]), ['DE0002', '2021-04-16', '09:01'])
+        self.assertEqual(df_result['Late'].iloc[-1], '2021-04-17')
+        self.assertTrue(pd.isna(df_result['Price'].iloc[-1]))
+
+    def test_read_csv_empty_fields(self):
+        """
+        Tests that empty fields are read as missing values - also in text columns, as with pandas.read_csv
+        """
+        # Test init
+        body = b'ISIN,Mnemonic,Date,Time,Price\n,AB1,2021-04-16,09:00,1.5\nDE0002,,2021-04-16,,2.5\n'
+        self.local_bucket_conn.write_bytes('test.csv', body, skip_unchanged=False)
+        # Method execution
+        df_result = self.local_bucket_conn.read_csv_as_df('test.csv')
+        # Test after method execution
+        self.assertEqual(df_result.isna().to_dict('list'), pd.read_csv(BytesIO(body)).isna().to_dict('list'))
+        self.assertEqual(df_result.dropna(subset=['ISIN'])['ISIN'].tolist(), ['DE0002'])
+
+    def test_conditional_write(self):
+        """
+        Tests put_if_absent and put_if_match - a write only succeeds with the current ETag
+        """
+        # Method execution
+        etag = self.local_bucket_conn.put_if_absent('lease/item.json', b'first')
+        self.assertIsNone(self.local_bucket_conn.put_if_absent('lease/item.json', b'second'))
+        body, etag_read = self.local_bucket_conn.read_bytes_with_etag('lease/item.json')
+        new_etag = self.local_bucket_conn.put_if_match('lease/item.json', b'third', etag)
+        # Tests after method execution
+        self.assertEqual((body, etag_read), (b'first', etag))
+        self.assertIsNone(self.local_bucket_conn.put_if_match('lease/item.json', b'fourth', etag))
+        self.assertIsNone(self.local_bucket_conn.put_if_match('lease/missing.json', b'fourth', etag))
+        self.assertEqual(self.local_bucket_conn.read_bytes_with_etag('lease/item.json'), (b'third', new_etag))
+        self.assertEqual(self.local_bucket_conn.list_files_in_prefix('lease/'), ['lease/item.json'])
+
+
+if __name__ == "__main__":
+    unittest.main()
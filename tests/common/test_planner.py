@@ -0,0 +1,96 @@
+"""Test planner methods"""
+
+import os
+import subprocess
+import sys
+import unittest
+from datetime import datetime, timedelta
+
+import boto3
+from moto import mock_s3
+
+from ETL_sc.common.constants import MetaProcessFormat, PlanEstimates
+from ETL_sc.common.planner import plan_run, log_plan
+from ETL_sc.common.s3 import S3BucketConnector
+
+
+class TestPlannerMethods(unittest.TestCase):
+    """Testing the planner methods"""
+
+    def setUp(self):
+        """
+        Setting up the environment - mocked source and target buckets
+        """
+        self.mock_s3 = mock_s3()
+        self.mock_s3.start()
+        os.environ['AWS_ACCESS_KEY_ID'] = 'KEY1'
+        os.environ['AWS_SECRET_ACCESS_KEY'] = 'KEY2'
+        endpoint_url = 'https://s3.eu-central-1.amazonaws.com'
+        s3_resource = boto3.resource(service_name='s3', endpoint_url=endpoint_url)
+        for bucket in ('src-bucket', 'trg-bucket'):
+            s3_resource.create_bucket(Bucket=bucket,
+                                      CreateBucketConfiguration={'LocationConstraint': 'eu-central-1'})
+        self.src_bucket = s3_resource.Bucket('src-bucket')
+        self.trg_bucket = s3_resource.Bucket('trg-bucket')
+        self.s3_bucket_src = S3BucketConnector('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', endpoint_url,
+                                               'src-bucket', max_concurrency=4, range_size=100)
+        self.s3_bucket_trg = S3BucketConnector('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', endpoint_url,
+                                               'trg-bucket')
+        self.today = datetime.today().date()
+
+    def tearDown(self):
+        self.mock_s3.stop()
+
+    def _date(self, days_ago: int):
+        """Date string of a day before today"""
+        return (self.today - timedelta(days=days_ago)).strftime(MetaProcessFormat.META_FILE_DATE_FORMAT.value)
+
+    def test_plan_run(self):
+        """
+        Tests plan_run - the dates after the meta file, their source objects and requests
+        """
+        # Test init - the days until the day before yesterday are processed already
+        meta_key = 'meta.csv'
+        self.trg_bucket.put_object(Key=meta_key, Body=f'source_file_date,datetime_of_processing\n'
+                                                      f'{self._date(3)},{self._date(2)}\n'
+                                                      f'{self._date(2)},{self._date(2)}\n')
+        for days_ago, size in ((3, 10), (2, 10), (1, 50), (1, 250), (0, 100)):
+            self.src_bucket.put_object(Key=f'{self._date(days_ago)}/{self._date(days_ago)}_BINS_XETR{size}.csv',
+                                       Body=b'x' * size)
+        # Method execution
+        plan = plan_run(self._date(3), meta_key, self.s3_bucket_src, self.s3_bucket_trg)
+        # Tests after method execution
+        self.assertEqual(plan.extract_date, self._date(1))
+        self.assertEqual(plan.dates, [self._date(2), self._date(1), self._date(0)])
+        self.assertEqual(plan.objects, 4)
+        self.assertEqual(plan.total_bytes, 410)
+        list_requests = len({self._date(days_ago)[:7] for days_ago in range(3)})
+        # the 250 bytes object is read in 3 ranges
+        self.assertEqual(plan.requests, list_requests + 6 + PlanEstimates.TARGET_REQUESTS.value)
+        self.assertGreater(plan.est_seconds, 0)
+        with self.assertLogs() as logm:
+            log_plan(plan)
+            self.assertIn('4 source objects, 0.0 MB', logm.output[1])
+
+    def test_plan_run_nothing_to_do(self):
+        """
+        Tests plan_run when all dates are in the meta file
+        """
+        meta_key = 'meta.csv'
+        self.trg_bucket.put_object(Key=meta_key, Body=f'source_file_date,datetime_of_processing\n'
+                                                      f'{self._date(0)},{self._date(0)}\n')
+        plan = plan_run(self._date(0), meta_key, self.s3_bucket_src, self.s3_bucket_trg)
+        self.assertEqual((plan.dates, plan.objects, plan.requests), ([], 0, 0))
+
+    def test_no_pandas_import(self):
+        """
+        Tests that planning imports neither pandas nor pyarrow
+        """
+        code = 'import sys, ETL_sc.common.planner, ETL_sc.common.s3, ETL_sc.common.local; '\
+            'print(sorted(m for m in ("pandas", "numpy", "pyarrow") if m in sys.modules))'
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), '[]')
+
+
+if __name__ == "__main__":
+    unittest.main()
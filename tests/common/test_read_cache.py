@@ -0,0 +1,76 @@
+"""Test ReadCache methods"""
+
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pandas as pd
+
+from ETL_sc.common.local import LocalBucketConnector
+from ETL_sc.common.read_cache import ReadCache
+
+
+class TestReadCacheMethods(unittest.TestCase):
+    """Testing the ReadCache class"""
+
+    def test_get_concurrent_fetch_once(self):
+        """
+        Tests that concurrent reads of the same key fetch it once
+        """
+        read_cache = ReadCache(max_bytes=100)
+        fetch_started = threading.Event()
+        release_fetch = threading.Event()
+        calls = []
+        def fetch():
+            calls.append(1)
+            fetch_started.set()
+            release_fetch.wait(5)
+            return b'content'
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            first = executor.submit(read_cache.get, 'key', fetch)
+            fetch_started.wait(5)
+            second = executor.submit(read_cache.get, 'key', fetch)
+            release_fetch.set()
+            self.assertEqual((first.result(), second.result()), (b'content', b'content'))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(read_cache.get('key', fetch), b'content')
+        self.assertEqual(read_cache.stats, {'hits': 2, 'misses': 1, 'evictions': 0})
+
+    def test_get_eviction_and_error(self):
+        """
+        Tests the eviction of the least recently used content and that failed fetches are not cached
+        """
+        read_cache = ReadCache(max_bytes=10)
+        read_cache.get('a', lambda: b'aaaa')
+        read_cache.get('b', lambda: b'bbbb')
+        read_cache.get('a', lambda: b'xxxx')
+        read_cache.get('c', lambda: b'cccc')
+        self.assertEqual(read_cache.get('a', lambda: b'xxxx'), b'aaaa')
+        self.assertEqual(read_cache.get('b', lambda: b'new'), b'new')
+        self.assertEqual(read_cache.stats['evictions'], 2)
+        def fetch_missing():
+            raise FileNotFoundError
+        with self.assertRaises(FileNotFoundError):
+            read_cache.get('missing', fetch_missing)
+        self.assertEqual(read_cache.get('missing', lambda: b'late'), b'late')
+
+    def test_connector_read_cache(self):
+        """
+        Tests that a connector with a read cache reads a source file once for several reads
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            local_bucket_conn = LocalBucketConnector(tmp_dir)
+            df_exp = pd.DataFrame([['A', 1]], columns=['col1', 'col2'])
+            local_bucket_conn.write_df_to_s3(df_exp, 'test.csv', 'csv')
+            local_bucket_conn.read_cache = ReadCache(max_bytes=1000)
+            with patch.object(local_bucket_conn, '_open', wraps=local_bucket_conn._open) as open_mock:
+                dfs_result = [local_bucket_conn.read_csv_as_df('test.csv') for _ in range(3)]
+            self.assertEqual(open_mock.call_count, 1)
+            for df_result in dfs_result:
+                self.assertTrue(df_exp.equals(df_result))
+
+
+if __name__ == "__main__":
+    unittest.main()
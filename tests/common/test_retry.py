@@ -0,0 +1,83 @@
+"""Test AdaptiveConcurrency methods"""
+
+import unittest
+from unittest.mock import patch
+
+from botocore.exceptions import ClientError, ReadTimeoutError
+
+from ETL_sc.common.retry import AdaptiveConcurrency
+
+
+class TestAdaptiveConcurrencyMethods(unittest.TestCase):
+    """Testing the AdaptiveConcurrency class
+    """
+
+    def setUp(self):
+        """Method used to initilize our test (ran each time)
+        """
+        self.controller = AdaptiveConcurrency(max_concurrency=8, max_attempts=3)
+        self.throttle = ClientError({'Error': {'Code': 'SlowDown'}}, 'GetObject')
+        self.sleep_patch = patch('ETL_sc.common.retry.time.sleep')
+        self.sleep_mock = self.sleep_patch.start()
+
+    def tearDown(self):
+        """Ran each time after the unit tests have been done."""
+        self.sleep_patch.stop()
+
+    def test_call_retries_throttled(self):
+        """Tests the call method for a throttled request - retried with backoff, the limit is halved"""
+        results = iter([self.throttle, 'ok'])
+        def func():
+            result = next(results)
+            if isinstance(result, Exception):
+                raise result
+            return result
+        # Method execution
+        self.assertEqual(self.controller.call(func), 'ok')
+        # Tests after method execution
+        self.assertEqual(self.controller.limit, 4)
+        self.assertEqual(self.controller.stats, {'requests': 2, 'retries': 1, 'throttles': 1, 'timeouts': 0})
+        delay = self.sleep_mock.call_args[0][0]
+        self.assertTrue(0 <= delay <= self.controller.base_delay)
+
+    def test_call_gives_up(self):
+        """Tests the call method when every attempt times out - the last error is raised"""
+        def func():
+            raise ReadTimeoutError(endpoint_url='https://s3')
+        with self.assertRaises(ReadTimeoutError):
+            self.controller.call(func)
+        self.assertEqual(self.controller.stats['timeouts'], 3)
+        self.assertEqual(self.controller.stats['retries'], 2)
+        self.assertEqual(self.sleep_mock.call_count, 2)
+
+    def test_call_throttled_last_attempt(self):
+        """Tests the call method when the last attempt is throttled - counted as throttle, not as success"""
+        self.controller = AdaptiveConcurrency(max_concurrency=8, max_attempts=1)
+        self.controller.limit = 2
+        self.controller._successes = 1
+        def func():
+            raise self.throttle
+        with self.assertRaises(ClientError):
+            self.controller.call(func)
+        self.assertEqual(self.controller.stats, {'requests': 1, 'retries': 0, 'throttles': 1, 'timeouts': 0})
+        self.assertEqual(self.controller.limit, 1)
+
+    def test_call_not_retryable(self):
+        """Tests the call method for an error that is not retried"""
+        def func():
+            raise ClientError({'Error': {'Code': 'NoSuchKey'}}, 'GetObject')
+        with self.assertRaises(ClientError):
+            self.controller.call(func)
+        self.assertEqual(self.controller.stats['retries'], 0)
+        self.assertEqual(self.controller.limit, 8)
+
+    def test_limit_recovers(self):
+        """Tests the additive increase of the limit after successful requests"""
+        self.controller.limit = 2
+        for _ in range(2 + 3):
+            self.controller.call(lambda: None)
+        self.assertEqual(self.controller.limit, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,14 +2,22 @@
 
 from ETL_sc.common.custom_exceptions import WrongFormatException
 from io import StringIO, BytesIO
+import gzip
 import os
+import threading
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from unittest.mock import patch
 
 import boto3
 import pandas as pd
+import pyarrow as pa
+from botocore.exceptions import ClientError
 
 from moto import mock_s3
 
+from ETL_sc.common import connector
 from ETL_sc.common.s3 import S3BucketConnector
 
 class TestS3BucketConnectorMethods(unittest.TestCase):
@@ -138,6 +146,23 @@ class TestS3BucketConnectorMethods(unittest.TestCase):
             }
         )
 
+    def test_read_csv_to_df_compact(self):
+        """Tests the read_csv_as_df method with the compact dtype profile -
+        floats stay float64, integers are read as int32 if they fit or else int64.
+        """
+        #Expected results
+        key_exp = 'test.csv'
+        #Test init/Setup
+        csv_content = 'price,vol,big_vol,name\n1.25,10,3000000000,A\n2.5,20,1,B'
+        self.s3_bucket.put_object(Body=csv_content, Key=key_exp)
+        # Method execution
+        df_result = self.s3_bucket_conn.read_csv_as_df(key_exp, dtype_profile='compact')
+        #Test after method execution
+        self.assertEqual(df_result['price'].dtype, 'float64')
+        self.assertEqual(df_result['vol'].dtype, 'int32')
+        self.assertEqual(df_result['big_vol'].dtype, 'int64')
+        self.assertEqual(list(df_result['price']), [1.25, 2.5])
+
     def test_write_df_to_s3_empty(self):
         """Tests the write_df_to_s3 method with an empty Dataframe as input
         """
@@ -228,6 +253,185 @@ class TestS3BucketConnectorMethods(unittest.TestCase):
             }
         )
 
+    def test_write_df_to_s3_skip_unchanged(self):
+        """Tests the write_df_to_s3 method with skip_unchanged - the content hash is stored in the
+        object metadata and a second upload of the same content is skipped.
+        """
+        #Expected result
+        df_exp = pd.DataFrame([['A', 'B'], ['C', 'D']], columns=['col1', 'col2'])
+        key_exp = 'test.csv'
+        log_exp = f'File {self.s3_endpoint_url}/{self.s3_bucket_name}/{key_exp} is unchanged, upload skipped'
+        #Method execution
+        self.s3_bucket_conn.write_df_to_s3(df_exp, key_exp, 'csv', skip_unchanged=True)
+        metadata = self.s3_bucket.Object(key=key_exp).metadata
+        with self.assertLogs() as logm:
+            result = self.s3_bucket_conn.write_df_to_s3(df_exp, key_exp, 'csv', skip_unchanged=True)
+            #Logging test
+            self.assertIn(log_exp, logm.output[0])
+        #Test after method execution
+        self.assertTrue(result)
+        self.assertEqual(len(metadata['content-sha256']), 64)
+        #Changed content is written
+        with self.assertLogs() as logm:
+            self.s3_bucket_conn.write_df_to_s3(df_exp.iloc[:1], key_exp, 'csv', skip_unchanged=True)
+            self.assertIn('Writing file to', logm.output[0])
+
+    def test_read_csvs_as_dfs_throttled(self):
+        """Tests the read_csvs_as_dfs method when S3 throttles a request - the request is retried,
+        the files are returned in key order and the throttling shows in the request statistics.
+        """
+        #Expected results
+        keys_exp = [f'prefix/test{i}.csv' for i in range(4)]
+        for i, key in enumerate(keys_exp):
+            self.s3_bucket.put_object(Body=f'col1,col2\n{i},{i * 2}\n', Key=key)
+        throttle = ClientError({'Error': {'Code': 'SlowDown'}, 'ResponseMetadata': {'HTTPStatusCode': 503}},
+                               'GetObject')
+        get_object = self.s3_bucket_conn._client.get_object
+        calls = []
+        def get_object_throttled(**kwargs):
+            calls.append(kwargs['Key'])
+            if len(calls) == 1:
+                raise throttle
+            return get_object(**kwargs)
+        # Method execution - the first request is throttled
+        with patch.object(self.s3_bucket_conn._client, 'get_object', side_effect=get_object_throttled), \
+            patch('ETL_sc.common.retry.time.sleep') as sleep_mock:
+            dfs_result = self.s3_bucket_conn.read_csvs_as_dfs(keys_exp)
+        # Tests after method execution
+        self.assertEqual([df['col1'][0] for df in dfs_result], [0, 1, 2, 3])
+        self.assertEqual(len(calls), 5)
+        self.assertEqual(sleep_mock.call_count, 1)
+        stats = self.s3_bucket_conn.request_stats()
+        self.assertEqual(stats['retries'], 1)
+        self.assertEqual(stats['throttles'], 1)
+        self.assertEqual(stats['requests'], 5)
+
+    def test_read_csv_to_df_not_retried(self):
+        """Tests the read_csv_as_df method for a missing key - the error is not retried.
+        """
+        with self.assertRaises(self.s3_bucket_conn.no_such_key):
+            self.s3_bucket_conn.read_csv_as_df('missing.csv')
+        self.assertEqual(self.s3_bucket_conn.request_stats()['retries'], 0)
+
+    def test_read_csv_to_df_ranged(self):
+        """Tests the read_csv_as_df method for an object larger than the range size - downloaded in
+        parallel byte ranges, also for the parquet read and an empty object.
+        """
+        #Expected results
+        df_exp = pd.DataFrame({'col1': range(100), 'col2': [f'value{i}' for i in range(100)]})
+        key_exp = 'test.csv'
+        self.s3_bucket.put_object(Body=df_exp.to_csv(index=False), Key=key_exp)
+        parquet_buffer = BytesIO()
+        df_exp.to_parquet(parquet_buffer, index=False)
+        self.s3_bucket.put_object(Body=parquet_buffer.getvalue(), Key='test.parquet')
+        self.s3_bucket.put_object(Body=b'', Key='empty.csv')
+        self.s3_bucket_conn.range_size = 64
+        # Method execution
+        df_result = self.s3_bucket_conn.read_csv_as_df(key_exp)
+        requests_csv = self.s3_bucket_conn.request_stats()['requests']
+        df_parquet_result = self.s3_bucket_conn.read_parquet_as_df('test.parquet')
+        # Tests after method execution
+        self.assertTrue(df_exp.equals(df_result))
+        self.assertTrue(df_exp.equals(df_parquet_result))
+        self.assertEqual(requests_csv, -(-len(df_exp.to_csv(index=False)) // 64))
+        with self.assertRaises(pd.errors.EmptyDataError):
+            self.s3_bucket_conn.read_csv_as_df('empty.csv')
+
+    def test_read_csvs_as_dfs_ranged_shared_pool(self):
+        """Tests the read_csvs_as_dfs method in a shared io_pool for objects larger than the range size -
+        the range parts of the concurrent reads share max_concurrency threads.
+        """
+        #Expected results
+        df_exp = pd.DataFrame({'col1': range(100), 'col2': [f'value{i}' for i in range(100)]})
+        keys_exp = [f'test{i}.csv' for i in range(6)]
+        for key in keys_exp:
+            self.s3_bucket.put_object(Body=df_exp.to_csv(index=False), Key=key)
+        self.s3_bucket_conn.range_size = 64
+        get_range = self.s3_bucket_conn._get_range
+        range_threads = set()
+        def get_range_in_thread(key, start, etag=None):
+            if etag:
+                range_threads.add(threading.current_thread().name)
+            return get_range(key, start, etag)
+        # Method execution
+        with ThreadPoolExecutor(max_workers=6) as io_pool, \
+                patch.object(self.s3_bucket_conn, '_get_range', get_range_in_thread):
+            self.s3_bucket_conn.io_pool = io_pool
+            df_results = self.s3_bucket_conn.read_csvs_as_dfs(keys_exp)
+        # Tests after method execution
+        self.assertTrue(all(df_exp.equals(df_result) for df_result in df_results))
+        self.assertTrue(range_threads)
+        self.assertLessEqual(len(range_threads), self.s3_bucket_conn.max_concurrency)
+
+    def test_write_df_to_s3_csv_gz(self):
+        """Tests the write_df_to_s3 and read_csv_as_df methods for gzip compressed csv files -
+        a rewrite with the same data has the same content, also when read in ranges.
+        """
+        #Expected results
+        df_exp = pd.DataFrame({'col1': range(200), 'col2': ['value'] * 200})
+        key_exp = 'test.csv.gz'
+        # Method execution
+        self.s3_bucket_conn.write_df_to_s3(df_exp, key_exp, 'csv.gz', compression_level=9)
+        with self.assertLogs() as logm:
+            self.s3_bucket_conn.write_df_to_s3(df_exp, key_exp, 'csv.gz', skip_unchanged=True, compression_level=9)
+            self.assertIn('upload skipped', logm.output[0])
+        df_result = self.s3_bucket_conn.read_csv_as_df(key_exp)
+        self.s3_bucket_conn.range_size = 64
+        df_ranged_result = self.s3_bucket_conn.read_csv_as_df(key_exp)
+        # Tests after method execution
+        body = self.s3_bucket.Object(key=key_exp).get().get('Body').read()
+        self.assertEqual(body[:2], b'\x1f\x8b')
+        self.assertLess(len(body), len(df_exp.to_csv(index=False)))
+        self.assertTrue(df_exp.equals(df_result))
+        self.assertTrue(df_exp.equals(df_ranged_result))
+
+    @unittest.skipIf(connector.zstandard is None, 'zstandard is not installed')
+    def test_write_df_to_s3_csv_zst(self):
+        """Tests the write_df_to_s3 and read_csv_as_df methods for zstd compressed csv files
+        """
+        df_exp = pd.DataFrame({'col1': range(200), 'col2': ['value'] * 200})
+        self.s3_bucket_conn.write_df_to_s3(df_exp, 'test.csv.zst', 'csv.zst', compression_level=3)
+        self.assertTrue(df_exp.equals(self.s3_bucket_conn.read_csv_as_df('test.csv.zst')))
+
+    def test_read_csv_to_df_zst_missing(self):
+        """Tests zstd compressed csv files without the zstandard package - read by pyarrow, the write fails
+        """
+        df_exp = pd.DataFrame({'col1': range(200), 'col2': ['value'] * 200})
+        body = pa.BufferOutputStream()
+        with pa.CompressedOutputStream(body, 'zstd') as stream:
+            stream.write(df_exp.to_csv(index=False).encode())
+        self.s3_bucket.put_object(Body=body.getvalue().to_pybytes(), Key='test.csv.zst')
+        with patch.object(connector, 'zstandard', None):
+            self.assertTrue(df_exp.equals(self.s3_bucket_conn.read_csv_as_df('test.csv.zst')))
+            with self.assertLogs() as logm:
+                with self.assertRaises(WrongFormatException):
+                    self.s3_bucket_conn.write_df_to_s3(df_exp, 'test.csv.zst', 'csv.zst')
+                self.assertIn('zstandard package is needed', logm.output[0])
+
+    def test_read_csv_to_df_gz_late_dates(self):
+        """Tests the read_csv_as_df method for a gzip compressed csv file with a date column that is
+        empty in the sample - the stream is parsed again with the column as text
+        """
+        df_exp = pd.DataFrame({'col1': range(20000), 'col2': [None] * 19999 + ['2021-04-17']})
+        self.s3_bucket.put_object(Body=gzip.compress(df_exp.to_csv(index=False).encode()), Key='test.csv.gz')
+        df_result = self.s3_bucket_conn.read_csv_as_df('test.csv.gz')
+        self.assertEqual(df_result['col2'].iloc[-1], '2021-04-17')
+        self.assertEqual(df_result['col2'].dtype, self.s3_bucket_conn.string_dtype())
+
+    def test_put_if_absent_precondition_failed(self):
+        """Tests the conditional writes - the conditions are sent and a failed precondition returns None
+        """
+        etag = self.s3_bucket_conn.put_if_absent('lease.json', b'first')
+        self.assertEqual(self.s3_bucket_conn.read_bytes_with_etag('lease.json'), (b'first', etag))
+        precondition_failed = ClientError({'Error': {'Code': 'PreconditionFailed'},
+                                           'ResponseMetadata': {'HTTPStatusCode': 412}}, 'PutObject')
+        with patch.object(self.s3_bucket_conn._client, 'put_object', side_effect=precondition_failed) as put_mock:
+            self.assertIsNone(self.s3_bucket_conn.put_if_absent('lease.json', b'second'))
+            self.assertEqual(put_mock.call_args.kwargs['IfNoneMatch'], '*')
+            self.assertIsNone(self.s3_bucket_conn.put_if_match('lease.json', b'second', 'other'))
+            self.assertEqual(put_mock.call_args.kwargs['IfMatch'], '"other"')
+        self.assertEqual(self.s3_bucket_conn.request_stats()['retries'], 0)
+
     def test_write_df_to_wrong_s3_format(self):
         """Tests the write_df_to_s3 method if not supported format is given as argument, also checks the exception
         and logging for correctness.
@@ -0,0 +1,74 @@
+"""Test SqliteSink methods"""
+
+import sqlite3
+import tempfile
+import unittest
+
+import pandas as pd
+
+from ETL_sc.common.local import LocalBucketConnector
+from ETL_sc.common.sqlite_sink import SqliteSink
+
+
+class TestSqliteSinkMethods(unittest.TestCase):
+    """Testing the SqliteSink class"""
+
+    def setUp(self):
+        """
+        Setting up the environment - a temporary directory as bucket and a report
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.local_bucket_conn = LocalBucketConnector(self.tmp_dir.name)
+        self.db_key = 'sqlite/report1.sqlite'
+        self.key_cols = ['ISIN', 'Date']
+        self.df_report = pd.DataFrame(
+            [['AT0000A0E9W5', '2021-04-17', 20.21, 1088, None],
+             ['AT0000A0E9W5', '2021-04-18', 20.58, 10286, 1.83],
+             ['DE0005772206', '2021-04-17', 11.5, 100, 2.5]],
+            columns=['ISIN', 'Date', 'opening_price_eur', 'daily_traded_volume', 'change_prev_closing_%'])
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_upsert_publish(self):
+        """
+        Tests upserting report rows (new and changed), publishing the database
+        and continuing with the published database in a new sink
+        """
+        # Method execution
+        sink = SqliteSink(self.db_key, 'report1', self.key_cols, self.local_bucket_conn, batch_size=2)
+        self.assertEqual(sink.upsert(self.df_report), 3)
+        self.assertTrue(sink.publish())
+        self.assertFalse(sink.publish())
+        sink.close()
+        df_update = self.df_report.iloc[1:2].assign(opening_price_eur=21.0)
+        sink = SqliteSink(self.db_key, 'report1', self.key_cols, self.local_bucket_conn)
+        sink.upsert(df_update)
+        sink.publish()
+        df_result = sink.query('SELECT * FROM report1 WHERE "ISIN" = ? AND "Date" BETWEEN ? AND ?',
+                               ('AT0000A0E9W5', '2021-04-01', '2021-04-30'))
+        sink.close()
+        # Test after method execution
+        self.assertEqual(list(df_result['opening_price_eur']), [20.21, 21.0])
+        self.assertTrue(pd.isna(df_result['change_prev_closing_%'][0]))
+        self.assertEqual(list(df_result['daily_traded_volume']), [1088, 10286])
+        db_path = f'{self.tmp_dir.name}/{self.db_key}'
+        with sqlite3.connect(db_path) as connection:
+            self.assertEqual(connection.execute('SELECT COUNT(*) FROM report1').fetchone()[0], 3)
+            plan = connection.execute('EXPLAIN QUERY PLAN SELECT * FROM report1 WHERE "ISIN" = ? AND "Date" > ?',
+                                      ('AT0000A0E9W5', '2021-04-17')).fetchall()
+        connection.close()
+        self.assertIn('PRIMARY KEY', plan[0][-1])
+
+    def test_upsert_empty(self):
+        """
+        Tests that an empty report is not written
+        """
+        sink = SqliteSink(self.db_key, 'report1', self.key_cols, self.local_bucket_conn)
+        self.assertEqual(sink.upsert(self.df_report.iloc[:0]), 0)
+        self.assertFalse(sink.publish())
+        self.assertEqual(self.local_bucket_conn.list_files_in_prefix('sqlite/'), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+"""Test StageCache methods"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from ETL_sc.common.connector import S3ObjectInfo
+from ETL_sc.common.stage_cache import StageCache
+
+
+class TestStageCacheMethods(unittest.TestCase):
+    """Testing the StageCache class"""
+
+    def setUp(self):
+        """
+        Setting up the environment
+        """
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.stage_cache = StageCache(self.cache_dir.name)
+        self.objects = [S3ObjectInfo('2021-04-16/file1.csv', 'etag1', 10),
+                        S3ObjectInfo('2021-04-16/file2.csv', 'etag2', 20)]
+        self.df_extract = pd.DataFrame({'ISIN': ['DE0001', 'DE0002'], 'StartPrice': [1.5, 2.5],
+                                        'TradedVolume': np.array([10, 20], dtype=np.int32)})
+        self.df_extract.attrs['src_time_ordered'] = True
+
+    def tearDown(self):
+        self.cache_dir.cleanup()
+
+    def test_fingerprint(self):
+        """
+        Tests that the fingerprint changes with the ETags and the further inputs
+        """
+        fingerprint = StageCache.fingerprint(self.objects, columns=['ISIN'])
+        self.assertEqual(fingerprint, StageCache.fingerprint(list(self.objects), columns=['ISIN']))
+        self.assertNotEqual(fingerprint, StageCache.fingerprint(
+            [self.objects[0], self.objects[1]._replace(etag='etag3')], columns=['ISIN']))
+        self.assertNotEqual(fingerprint, StageCache.fingerprint(self.objects, columns=['ISIN', 'Date']))
+
+    def test_save_load(self):
+        """
+        Tests that a stored extract is loaded with its dtypes and attrs, and only for its fingerprint
+        """
+        fingerprint = StageCache.fingerprint(self.objects)
+        self.assertIsNone(self.stage_cache.load('Xetra_2021-04-16', fingerprint))
+        self.stage_cache.save('Xetra_2021-04-16', fingerprint, self.df_extract)
+        df_result = self.stage_cache.load('Xetra_2021-04-16', fingerprint)
+        self.assertTrue(self.df_extract.equals(df_result))
+        self.assertEqual(df_result.attrs, {'src_time_ordered': True})
+        self.assertIsNone(self.stage_cache.load('Xetra_2021-04-16', StageCache.fingerprint(self.objects[:1])))
+
+    def test_save_replaces_stale(self):
+        """
+        Tests that storing a new extract of a window removes the stale one
+        """
+        self.stage_cache.save('Xetra_2021-04-16', StageCache.fingerprint(self.objects), self.df_extract)
+        path = self.stage_cache.save('Xetra_2021-04-16', StageCache.fingerprint(self.objects[:1]), self.df_extract)
+        self.assertEqual(os.listdir(self.cache_dir.name), [os.path.basename(path)])
+
+
+if __name__ == "__main__":
+    unittest.main()
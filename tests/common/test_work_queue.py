@@ -0,0 +1,125 @@
+"""Test WorkQueue methods"""
+
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from ETL_sc.common.local import LocalBucketConnector
+from ETL_sc.common.work_queue import LeaseHeartbeat, WorkQueue
+
+
+class TestWorkQueueMethods(unittest.TestCase):
+    """Testing the WorkQueue class"""
+
+    def setUp(self):
+        """
+        Setting up the environment - a temporary directory as bucket and two workers
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.local_bucket_conn = LocalBucketConnector(self.tmp_dir.name)
+        self.items = {'2021-04-17_2021-04-18': {'dates': ['2021-04-17', '2021-04-18']},
+                      '2021-04-19_2021-04-19': {'dates': ['2021-04-19']}}
+        self.queue_1 = WorkQueue('work/run/', self.local_bucket_conn, 'worker-1', lease_seconds=60)
+        self.queue_2 = WorkQueue('work/run/', self.local_bucket_conn, 'worker-2', lease_seconds=60)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_claim_complete_commit(self):
+        """
+        Tests that the workers claim different items and the commit is claimed once after all items are done
+        """
+        # Method execution
+        self.assertEqual(self.queue_1.publish(self.items), 2)
+        self.assertEqual(self.queue_2.publish(self.items), 0)
+        item_1 = self.queue_1.claim()
+        item_2 = self.queue_2.claim()
+        # Tests after method execution
+        self.assertEqual(self.queue_2.items(), self.items)
+        self.assertEqual([item_1.item_id, item_2.item_id], list(self.items))
+        self.assertIsNone(self.queue_1.claim())
+        self.assertTrue(self.queue_1.complete(item_1))
+        self.assertIsNone(self.queue_1.claim_commit())
+        self.assertTrue(self.queue_2.complete(item_2))
+        self.assertTrue(self.queue_1.all_done())
+        commit = self.queue_1.claim_commit()
+        self.assertIsNotNone(commit)
+        self.assertIsNone(self.queue_2.claim_commit())
+        self.assertTrue(self.queue_1.complete(commit))
+        self.assertIsNone(self.queue_2.claim_commit())
+        self.assertIsNone(self.queue_2.claim())
+
+    def test_expired_lease(self):
+        """
+        Tests that an expired lease is taken over and the former holder cannot renew or complete it
+        """
+        # Method execution
+        self.queue_1.publish(self.items)
+        item_1 = self.queue_1.claim()
+        self.assertEqual(self.queue_2.claim().item_id, '2021-04-19_2021-04-19')
+        with patch('ETL_sc.common.work_queue.time.time', return_value=10 ** 10):
+            with self.assertLogs() as logm:
+                item_2 = self.queue_2.claim()
+                self.assertIn('Expired lease of work item 2021-04-17_2021-04-18', logm.output[0])
+        # Tests after method execution
+        self.assertEqual(item_2.item_id, item_1.item_id)
+        self.assertFalse(self.queue_1.complete(item_1))
+        item_2 = self.queue_2.renew(item_2)
+        self.assertTrue(self.queue_2.complete(item_2))
+        self.assertTrue(self.queue_1.is_done(item_1.item_id))
+
+    def test_lost_response(self):
+        """
+        Tests conditional writes that succeeded with the response lost - the retry fails on the own write
+        """
+        # Test init
+        put_if_absent = self.local_bucket_conn.put_if_absent
+        put_if_match = self.local_bucket_conn.put_if_match
+        def lost_response(put):
+            def put_and_retry(*args):
+                put(*args)
+                return put(*args)
+            return put_and_retry
+        self.queue_1.publish(self.items)
+        # Method execution
+        with patch.object(self.local_bucket_conn, 'put_if_absent', lost_response(put_if_absent)), \
+                patch.object(self.local_bucket_conn, 'put_if_match', lost_response(put_if_match)):
+            item_1 = self.queue_1.claim()
+            item_1 = self.queue_1.renew(item_1)
+            self.assertIsNotNone(item_1)
+            self.assertTrue(self.queue_1.complete(item_1))
+            item_2 = self.queue_2.claim()
+        # Tests after method execution
+        self.assertEqual(item_1.item_id, '2021-04-17_2021-04-18')
+        self.assertEqual(item_2.item_id, '2021-04-19_2021-04-19')
+        self.assertTrue(self.queue_1.is_done(item_1.item_id))
+        self.assertIsNone(self.queue_1.renew(item_2._replace(etag='other')))
+
+    def test_lease_heartbeat(self):
+        """
+        Tests that the heartbeat renews the lease while the item is worked on, and notices a lost lease
+        """
+        # Test init
+        self.queue_1.publish(self.items)
+        item_1 = self.queue_1.claim()
+        # Method execution
+        with LeaseHeartbeat(self.queue_1, item_1, interval=0.01) as heartbeat:
+            time.sleep(0.1)
+        # Tests after method execution
+        self.assertFalse(heartbeat.lost)
+        self.assertNotEqual(heartbeat.item.etag, item_1.etag)
+        self.assertTrue(self.queue_1.complete(heartbeat.item))
+        # lost lease
+        item_2 = self.queue_1.claim()
+        with patch('ETL_sc.common.work_queue.time.time', return_value=10 ** 10):
+            self.queue_2.claim()
+        with LeaseHeartbeat(self.queue_1, item_2, interval=0.01) as heartbeat:
+            time.sleep(0.1)
+        self.assertTrue(heartbeat.lost)
+        self.assertEqual(heartbeat.item, item_2)
+        self.assertEqual(LeaseHeartbeat(self.queue_1, item_2).interval, 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
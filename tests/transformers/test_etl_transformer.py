@@ -1,17 +1,29 @@
 """Test ETLMethods"""
 
+import asyncio
 import unittest
 import boto3
 from moto import mock_s3
+try:
+    from moto.server import ThreadedMotoServer # needs the server extras of moto (flask)
+except ImportError:
+    ThreadedMotoServer = None
 import os
+import tempfile
+import threading
 import pandas as pd
+import pyarrow.parquet as pq
+from datetime import datetime
 from io import BytesIO
 from unittest.mock import patch
 
+from ETL_sc.common import async_s3
+from ETL_sc.common.async_s3 import AsyncS3BucketConnector
+from ETL_sc.common.local import LocalBucketConnector
 from ETL_sc.common.s3 import S3BucketConnector
-from ETL_sc.transformers.etl_transformer import EtlSourceConfig, EtlTargetConfig, StockETL
+from ETL_sc.transformers.etl_transformer import EtlSourceConfig, EtlTargetConfig, EtlRunConfig, StockETL
 from ETL_sc.common.meta_process import MetaProcess
-from ETL_sc.common.constants import MetaProcessFormat
+from ETL_sc.common.constants import MetaProcessFormat, DataFrameAttrs
 
 class IntTestStockETLMethods(unittest.TestCase):
     """
@@ -176,6 +188,40 @@ class IntTestStockETLMethods(unittest.TestCase):
         # Test after method execution
         self.assertTrue(df_exp.equals(df_result))
 
+    def test_extract_stage_cache(self):
+        """
+        Tests the extract method with a stage cache - the second extract of unchanged
+        source files is loaded from the cache, after a new source file it is extracted again
+        """
+        # Expected results
+        df_exp = self.df_src.loc[1:8, self.source_config.src_columns].reset_index(drop=True)
+        # Test init
+        extract_date = '2021-04-17'
+        extract_date_list = ['2021-04-16', '2021-04-17', '2021-04-18', '2021-04-19', '2021-04-20']
+        stage_cache_dir = tempfile.TemporaryDirectory()
+        run_config = EtlRunConfig(stage_cache_dir=stage_cache_dir.name)
+        # Method execution
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list]):
+            xetra_etl = StockETL(self.s3_bucket_src, self.s3_bucket_trg,
+                         self.meta_key, self.source_config, self.target_config, run_config)
+            df_first = xetra_etl.extract()
+            with patch.object(self.s3_bucket_src, 'read_csvs_as_dfs',
+                              wraps=self.s3_bucket_src.read_csvs_as_dfs) as read_mock:
+                df_cached = xetra_etl.extract()
+                self.assertEqual(read_mock.call_count, 0)
+                self.s3_bucket_src.write_df_to_s3(self.df_src.loc[1:2], '2021-04-17/2021-04-17_BINS_XETR12.csv',
+                                                  'csv')
+                df_changed = xetra_etl.extract()
+                self.assertEqual(read_mock.call_count, 1)
+        # Test after method execution
+        self.assertTrue(df_exp.equals(df_first))
+        self.assertTrue(df_exp.equals(df_cached))
+        self.assertTrue(df_cached.attrs[DataFrameAttrs.SRC_TIME_ORDERED.value])
+        self.assertEqual(len(df_changed), 10)
+        self.assertEqual(len(os.listdir(stage_cache_dir.name)), 1)
+        stage_cache_dir.cleanup()
+
     def test_transform_report1_emptydf(self):
         """
         Tests the transform_report1 method with
@@ -228,6 +274,144 @@ class IntTestStockETLMethods(unittest.TestCase):
         # Test after method execution
         self.assertTrue(df_exp.equals(df_result))
 
+    def test_extract_files_time_ordered(self):
+        """
+        Tests that the extract method records the time order
+        of the extracted source files
+        """
+        # Test init
+        extract_date = '2021-04-17'
+        extract_date_list = ['2021-04-16', '2021-04-17', '2021-04-18', '2021-04-19']
+        # Method execution
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list]):
+            xetra_etl = StockETL(self.s3_bucket_src, self.s3_bucket_trg,
+                         self.meta_key, self.source_config, self.target_config)
+            df_result = xetra_etl.extract()
+        # Test after method execution
+        self.assertTrue(df_result.attrs[DataFrameAttrs.SRC_TIME_ORDERED.value])
+
+    def test_transform_report1_unordered(self):
+        """
+        Tests the transform_report1 method with
+        a DataFrame which is not in time order (sort fallback)
+        """
+        # Expected results
+        df_exp = self.df_report
+        # Test init
+        extract_date = '2021-04-17'
+        extract_date_list = ['2021-04-16', '2021-04-17', '2021-04-18', '2021-04-19']
+        df_input = self.df_src.loc[[8, 1, 3, 2, 5, 4, 7, 6]].reset_index(drop=True)
+        # Method execution
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list]):
+            xetra_etl = StockETL(self.s3_bucket_src, self.s3_bucket_trg,
+                         self.meta_key, self.source_config, self.target_config)
+            self.assertFalse(xetra_etl._is_time_ordered(df_input, ['ISIN', 'Date']))
+            df_result = xetra_etl.transform_report1(df_input)
+        # Test after method execution
+        self.assertTrue(df_exp.equals(df_result))
+
+    def test_parse_date_time(self):
+        """
+        Tests the _parse_date_time method, which converts
+        the date and time strings into integer keys
+        """
+        # Expected results
+        days_exp = [18734, 18734] # 2021-04-17 in days since 1970-01-01
+        seconds_exp = [18734 * 86400 + 13 * 3600, 18734 * 86400 + 14 * 3600]
+        # Test init
+        extract_date = '2021-04-17'
+        extract_date_list = ['2021-04-16', '2021-04-17']
+        df_input = self.df_src.loc[2:3].reset_index(drop=True)
+        # Method execution
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list]):
+            xetra_etl = StockETL(self.s3_bucket_src, self.s3_bucket_trg,
+                         self.meta_key, self.source_config, self.target_config)
+            df_result = xetra_etl._parse_date_time(df_input)
+        # Test after method execution
+        self.assertEqual(list(df_result['Date']), days_exp)
+        self.assertEqual(list(df_result['Time']), seconds_exp)
+        self.assertEqual(df_result['Time'].dtype, 'int64')
+
+    def test_transform_report1_compact_dtypes(self):
+        """
+        Tests that extracting with the compact dtype profile
+        produces the same report as the default profile
+        """
+        # Expected results
+        df_exp = self.df_report
+        # Test init
+        extract_date = '2021-04-17'
+        extract_date_list = ['2021-04-16', '2021-04-17', '2021-04-18', '2021-04-19']
+        source_config = self.source_config._replace(src_dtype_profile='compact')
+        # Method execution
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list]):
+            xetra_etl = StockETL(self.s3_bucket_src, self.s3_bucket_trg,
+                         self.meta_key, source_config, self.target_config)
+            df_extract = xetra_etl.extract()
+            df_result = xetra_etl.transform_report1(df_extract)
+        # Test after method execution
+        self.assertEqual(df_extract['StartPrice'].dtype, 'float64')
+        self.assertEqual(df_extract['TradedVolume'].dtype, 'int32')
+        self.assertTrue(df_exp.equals(df_result))
+
+    def test_transform_report1_compact_dtypes_rounding(self):
+        """
+        Tests that the compact dtype profile produces the same report as the default profile
+        for prices on a rounding boundary (5 at the third decimal)
+        """
+        # Test init
+        extract_date = '2021-04-17'
+        extract_date_list = ['2021-04-16', '2021-04-17', '2021-04-18', '2021-04-19']
+        prices = [0.015, 1.005, 2.675, 18.275, 20.215, 21.345, 23.585, 24.225, 22.215]
+        df_src = self.df_src.assign(StartPrice=prices, EndPrice=prices[::-1], MinPrice=prices, MaxPrice=prices)
+        for row, key in enumerate(sorted(obj.key for obj in self.src_bucket.objects.all())):
+            self.s3_bucket_src.write_df_to_s3(df_src.loc[row:row], key, 'csv')
+        reports = []
+        # Method execution
+        for dtype_profile in ['default', 'compact']:
+            with patch.object(MetaProcess, "return_date_list",
+            return_value=[extract_date, extract_date_list]):
+                xetra_etl = StockETL(self.s3_bucket_src, self.s3_bucket_trg, self.meta_key,
+                                     self.source_config._replace(src_dtype_profile=dtype_profile), self.target_config)
+                reports.append(xetra_etl.transform_report1(xetra_etl.extract()))
+        # Test after method execution
+        self.assertEqual(list(reports[0]['opening_price_eur']), [2.68, 20.22, 23.58])
+        self.assertTrue(reports[0].equals(reports[1]))
+
+    def test_transform_report1_parallel(self):
+        """
+        Tests the transform_report1 method running
+        on a process pool (partitioned by ISIN)
+        """
+        # Test init
+        extract_date = '2021-04-17'
+        extract_date_list = ['2021-04-16', '2021-04-17', '2021-04-18', '2021-04-19']
+        df_second_isin = self.df_src.loc[1:8].assign(ISIN='DE0005772206', StartPrice=lambda df: df.StartPrice * 2)
+        df_input = pd.concat([self.df_src.loc[1:8], df_second_isin], ignore_index=True)
+        # Method execution
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list]):
+            xetra_etl = StockETL(self.s3_bucket_src, self.s3_bucket_trg,
+                         self.meta_key, self.source_config, self.target_config)
+            df_exp = xetra_etl.transform_report1(df_input)
+            xetra_etl_parallel = StockETL(self.s3_bucket_src, self.s3_bucket_trg,
+                         self.meta_key, self.source_config, self.target_config,
+                         EtlRunConfig(transform_workers=3))
+            df_result = xetra_etl_parallel.transform_report1(df_input)
+            process_pool = xetra_etl_parallel._process_pool
+            df_result_second = xetra_etl_parallel.transform_report1(df_input)
+            # the worker processes are reused by the second transformation
+            self.assertIs(xetra_etl_parallel._process_pool, process_pool)
+            xetra_etl_parallel.close()
+        # Test after method execution
+        self.assertEqual(len(df_result), 6)
+        self.assertTrue(df_exp.equals(df_result))
+        self.assertTrue(df_exp.equals(df_result_second))
+        self.assertIsNone(xetra_etl_parallel._process_pool)
 
     def test_load(self):
         """
@@ -283,6 +467,406 @@ class IntTestStockETLMethods(unittest.TestCase):
             }
         )
 
+    def test_load_rerun(self):
+        """
+        Tests that loading the same window twice
+        overwrites one deterministic target key
+        """
+        # Expected results
+        key_exp = 'report1/xetra_daily_report1_20210417_000000_20210419_000000.parquet'
+        # Test init
+        extract_date = '2021-04-17'
+        extract_date_list = ['2021-04-16', '2021-04-17', '2021-04-18', '2021-04-19']
+        # Method execution
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list]):
+            xetra_etl = StockETL(self.s3_bucket_src, self.s3_bucket_trg,
+                         self.meta_key, self.source_config, self.target_config)
+            xetra_etl.load(self.df_report)
+            xetra_etl.load(self.df_report)
+        # Test after method execution
+        self.assertEqual(self.s3_bucket_trg.list_files_in_prefix(self.target_config.trg_key), [key_exp])
+
+    def test_load_empty(self):
+        """
+        Tests the load method for an empty report (no source files for the dates) with column order,
+        sorting, SQLite sink and leaderboards configured - nothing is written, the meta file is updated
+        """
+        # Test init
+        extract_date = '2021-04-17'
+        extract_date_list = ['2021-04-16', '2021-04-17']
+        target_config = self.target_config._replace(trg_column_order=list(self.df_report.columns),
+                                                    trg_sort_by=[self.source_config.src_col_isin,
+                                                                 self.source_config.src_col_date],
+                                                    trg_sqlite_key='report1.db',
+                                                    trg_leaderboard_key='leaderboard/xetra_leaderboard_')
+        # Method execution
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list]):
+            xetra_etl = StockETL(self.s3_bucket_src, self.s3_bucket_trg,
+                         self.meta_key, self.source_config, target_config)
+            self.assertTrue(xetra_etl.load(pd.DataFrame()))
+            xetra_etl.close()
+        # Test after method execution
+        self.assertEqual(self.s3_bucket_trg.list_files_in_prefix('report1/'), [])
+        self.assertEqual(self.s3_bucket_trg.list_files_in_prefix('leaderboard/'), [])
+        df_meta_result = self.s3_bucket_trg.read_csv_as_df(self.meta_key)
+        self.assertEqual(list(df_meta_result[MetaProcessFormat.META_FILE_DATE_COL.value]), ['2021-04-17'])
+
+    def test_load_parquet_options(self):
+        """
+        Tests the load method with parquet writer options,
+        column order and sorting before the write
+        """
+        # Test init
+        extract_date = '2021-04-17'
+        extract_date_list = ['2021-04-16', '2021-04-17', '2021-04-18', '2021-04-19']
+        column_order = list(self.df_report.columns[::-1])
+        target_config = self.target_config._replace(trg_parquet_compression='zstd', trg_parquet_row_group_size=2,
+                                                    trg_column_order=column_order,
+                                                    trg_sort_by=[self.source_config.src_col_date,
+                                                                 self.source_config.src_col_isin])
+        df_exp = self.df_report.sort_values(by=target_config.trg_sort_by, ignore_index=True).loc[:, column_order]
+        # Method execution
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list]):
+            xetra_etl = StockETL(self.s3_bucket_src, self.s3_bucket_trg,
+                         self.meta_key, self.source_config, target_config)
+            xetra_etl.load(self.df_report)
+        # Test after method execution
+        body = self.trg_bucket.Object(key=xetra_etl.target_key()).get().get('Body').read()
+        metadata = pq.ParquetFile(BytesIO(body)).metadata
+        self.assertEqual(metadata.num_row_groups, 2)
+        self.assertEqual(metadata.row_group(0).column(0).compression, 'ZSTD')
+        self.assertTrue(metadata.row_group(0).column(0).statistics.has_min_max)
+        self.assertTrue(df_exp.equals(pd.read_parquet(BytesIO(body))))
+
+    def test_is_sorted(self):
+        """
+        Tests the _is_sorted method - ordered data is not sorted again before the write
+        """
+        # Test init
+        df_input = pd.DataFrame({'ISIN': ['A', 'A', 'B', 'B'], 'Date': ['2021-04-17', '2021-04-18', '2021-04-16',
+                                                                        '2021-04-17']}, dtype='str')
+        # Method execution and tests
+        self.assertTrue(StockETL._is_sorted(df_input, ['ISIN', 'Date']))
+        self.assertFalse(StockETL._is_sorted(df_input, ['Date', 'ISIN']))
+        self.assertFalse(StockETL._is_sorted(df_input.iloc[[1, 0, 2, 3]], ['ISIN', 'Date']))
+        self.assertFalse(StockETL._is_sorted(df_input.assign(Date=[None, '1', '2', '3']), ['ISIN', 'Date']))
+        self.assertTrue(StockETL._is_sorted(df_input.iloc[:1], ['ISIN', 'Date']))
+        with patch.object(pd.DataFrame, 'sort_values') as sort_mock:
+            target_config = self.target_config._replace(trg_sort_by=['ISIN', 'Date'], trg_format='csv')
+            with patch.object(MetaProcess, "return_date_list", return_value=['2021-04-17', ['2021-04-17']]):
+                xetra_etl = StockETL(self.s3_bucket_src, self.s3_bucket_trg,
+                                     self.meta_key, self.source_config, target_config)
+            xetra_etl._write_target(self.df_report, 'report.csv')
+            sort_mock.assert_not_called()
+
+    def test_load_sqlite(self):
+        """
+        Tests the load method with the SQLite sink - the report rows
+        are upserted and the database is published to the target bucket
+        """
+        # Test init
+        extract_date = '2021-04-17'
+        extract_date_list = ['2021-04-16', '2021-04-17', '2021-04-18', '2021-04-19']
+        target_config = self.target_config._replace(trg_sqlite_key='sqlite/report1.sqlite')
+        # Method execution
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list]):
+            xetra_etl = StockETL(self.s3_bucket_src, self.s3_bucket_trg,
+                         self.meta_key, self.source_config, target_config)
+            xetra_etl.load(self.df_report)
+        # Test after method execution
+        self.assertEqual(self.s3_bucket_trg.list_files_in_prefix('sqlite/'), ['sqlite/report1.sqlite'])
+        df_result = xetra_etl._sqlite_sink.query('SELECT * FROM report1 ORDER BY "ISIN", "Date"')
+        local_path = xetra_etl._sqlite_sink._path
+        xetra_etl.close()
+        self.assertTrue(self.df_report.equals(df_result))
+        self.assertFalse(os.path.exists(local_path))
+
+    def test_load_leaderboards(self):
+        """
+        Tests the load method with leaderboards - one small object per date of the report
+        """
+        # Test init
+        extract_date = '2021-04-17'
+        extract_date_list = ['2021-04-16', '2021-04-17', '2021-04-18', '2021-04-19']
+        target_config = self.target_config._replace(trg_leaderboard_key='leaderboard/xetra_', trg_leaderboard_size=1)
+        # Method execution
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list]):
+            xetra_etl = StockETL(self.s3_bucket_src, self.s3_bucket_trg,
+                         self.meta_key, self.source_config, target_config)
+            xetra_etl.load(self.df_report)
+        # Test after method execution
+        keys = self.s3_bucket_trg.list_files_in_prefix('leaderboard/')
+        self.assertEqual(keys, [f'leaderboard/xetra_{date}.csv' for date in sorted(set(self.df_report['Date']))])
+        df_board = self.s3_bucket_trg.read_csv_as_df(keys[-1])
+        df_day = self.df_report[self.df_report['Date'] == self.df_report['Date'].max()]
+        self.assertEqual(list(df_board['board']), ['gainers', 'losers', 'volume_leaders'])
+        self.assertEqual(df_board['daily_traded_volume'].iloc[-1], df_day['daily_traded_volume'].max())
+
+    def test_etl_report1_worker(self):
+        """
+        Tests the etl_report1_worker method with two workers - each shard is processed
+        once, and the meta file is updated once after all shards are done
+        """
+        # Expected results
+        df_exp = self.df_report
+        keys_exp = ['report1/xetra_daily_report1_20210417_000000_20210418_000000.parquet',
+                    'report1/xetra_daily_report1_20210419_000000_20210419_000000.parquet']
+        # Test init
+        extract_date = '2021-04-17'
+        extract_date_list = ['2021-04-16', '2021-04-17', '2021-04-18', '2021-04-19']
+        run_config = EtlRunConfig(work_prefix='work/', shard_days=2, worker_poll_interval=0)
+        # Method execution
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list]):
+            worker_1 = StockETL(self.s3_bucket_src, self.s3_bucket_trg,
+                         self.meta_key, self.source_config, self.target_config, run_config)
+            worker_2 = StockETL(self.s3_bucket_src, self.s3_bucket_trg,
+                         self.meta_key, self.source_config, self.target_config, run_config)
+        self.assertEqual(list(worker_1.plan_shards(2)), ['2021-04-17_2021-04-18', '2021-04-19_2021-04-19'])
+        # worker 1 claims the first shard and crashes before writing it
+        with patch.object(StockETL, '_write_target', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                worker_1.etl_report1_worker('worker-1')
+        with patch.object(MetaProcess, 'update_meta_file') as meta_mock:
+            # the lease of worker 1 is expired -> worker 2 takes over the first shard and processes both
+            with patch('ETL_sc.common.work_queue.time.time', return_value=1e10):
+                dates_2 = worker_2.etl_report1_worker('worker-2')
+            # Test after method execution
+            self.assertEqual(meta_mock.call_count, 1)
+            self.assertEqual(meta_mock.call_args[0][0], ['2021-04-17', '2021-04-18', '2021-04-19'])
+        self.assertEqual(sorted(dates_2), ['2021-04-17', '2021-04-18', '2021-04-19'])
+        self.assertEqual(self.s3_bucket_trg.list_files_in_prefix(self.target_config.trg_key), keys_exp)
+        df_result = pd.concat([self.s3_bucket_trg.read_parquet_as_df(key) for key in keys_exp], ignore_index=True)
+        self.assertTrue(df_exp.equals(df_result))
+
+    def test_etl_report1_checkpoints(self):
+        """
+        Tests the etl_report1 method with file-level checkpoints -
+        a crashed run resumes with the source files that have no checkpoint
+        """
+        # Expected results
+        df_exp = self.df_report
+        # Test init
+        extract_date = '2021-04-17'
+        extract_date_list = ['2021-04-16', '2021-04-17', '2021-04-18', '2021-04-19']
+        run_config = EtlRunConfig(checkpoint_prefix='checkpoint/')
+        # Method execution
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list]):
+            xetra_etl = StockETL(self.s3_bucket_src, self.s3_bucket_trg,
+                         self.meta_key, self.source_config, self.target_config, run_config)
+            # run crashes during the load
+            with patch.object(StockETL, 'load', side_effect=RuntimeError):
+                with self.assertRaises(RuntimeError):
+                    xetra_etl.etl_report1()
+            checkpoints = self.s3_bucket_trg.list_files_in_prefix('checkpoint/')
+            # checkpoint of one file lost -> only this file is read again
+            self.trg_bucket.Object(checkpoints[-1]).delete()
+            with patch.object(self.s3_bucket_src, 'read_csv_as_df', wraps=self.s3_bucket_src.read_csv_as_df) as read_mock:
+                df_partials = xetra_etl.extract_partials()
+                self.assertEqual(read_mock.call_count, 1)
+            df_result = xetra_etl.transform_report1_partials(df_partials)
+            xetra_etl.etl_report1()
+        # Test after method execution
+        self.assertEqual(len(checkpoints), 8)
+        self.assertTrue(df_exp.equals(df_result))
+        self.assertEqual(self.s3_bucket_trg.list_files_in_prefix('checkpoint/'), [])
+
+    def test_etl_report1_checkpoints_date_rollover(self):
+        """
+        Tests the etl_report1 method with file-level checkpoints - a crashed run restarted on the next day
+        finds its checkpoints, and the complete run removes also checkpoints left by other runs
+        """
+        # Test init
+        extract_date = '2021-04-17'
+        extract_date_list = ['2021-04-16', '2021-04-17', '2021-04-18', '2021-04-19']
+        run_config = EtlRunConfig(checkpoint_prefix='checkpoint/')
+        self.s3_bucket_trg.write_bytes('checkpoint/2021-04-01/orphan.csv.parquet', b'orphan')
+        # Method execution
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list]):
+            xetra_etl = StockETL(self.s3_bucket_src, self.s3_bucket_trg,
+                         self.meta_key, self.source_config, self.target_config, run_config)
+            with patch.object(StockETL, 'load', side_effect=RuntimeError):
+                with self.assertRaises(RuntimeError):
+                    xetra_etl.etl_report1()
+        # restart on the next day
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list + ['2021-04-20']]):
+            xetra_etl = StockETL(self.s3_bucket_src, self.s3_bucket_trg,
+                         self.meta_key, self.source_config, self.target_config, run_config)
+            with patch.object(self.s3_bucket_src, 'read_csv_as_df', wraps=self.s3_bucket_src.read_csv_as_df) as read_mock:
+                xetra_etl.etl_report1()
+        # Test after method execution
+        self.assertEqual(read_mock.call_count, 0)
+        self.assertEqual(self.s3_bucket_trg.list_files_in_prefix('checkpoint/'), [])
+
+    def test_etl_report1_incremental(self):
+        """
+        Tests the etl_report1_incremental method - a second run
+        only reads the new source file and writes the affected day
+        """
+        # Expected results
+        df_exp = self.df_report
+        key_exp = 'report1/xetra_daily_report1_20210419_000000_20210419_000000.parquet'
+        # Test init
+        extract_date = '2021-04-17'
+        extract_date_list = ['2021-04-16', '2021-04-17', '2021-04-18', '2021-04-19']
+        run_config = EtlRunConfig(state_prefix='state/')
+        df_new = pd.DataFrame([['AT0000A0E9W5', 'SANT', '2021-04-19', '10:00', 22.21, 20.00, 20.00, 22.21, 14]],
+                              columns=self.df_src.columns)
+        # Method execution
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list]):
+            xetra_etl = StockETL(self.s3_bucket_src, self.s3_bucket_trg,
+                         self.meta_key, self.source_config, self.target_config, run_config)
+            dates_first_run = xetra_etl.etl_report1_incremental()
+            df_day_result = pd.read_parquet(BytesIO(self.trg_bucket.Object(key=key_exp).get().get('Body').read()))
+            self.s3_bucket_src.write_df_to_s3(df_new, '2021-04-19/2021-04-19_BINS_XETR10.csv', 'csv')
+            with patch.object(self.s3_bucket_src, 'read_csv_as_df', wraps=self.s3_bucket_src.read_csv_as_df) as read_mock:
+                dates_second_run = xetra_etl.etl_report1_incremental()
+                self.assertEqual(read_mock.call_count, 1)
+            df_day_result_new = pd.read_parquet(BytesIO(self.trg_bucket.Object(key=key_exp).get().get('Body').read()))
+        # Test after method execution
+        self.assertEqual(dates_first_run, ['2021-04-17', '2021-04-18', '2021-04-19'])
+        self.assertEqual(dates_second_run, ['2021-04-19'])
+        self.assertTrue(df_exp.loc[2:2].reset_index(drop=True).equals(df_day_result))
+        self.assertEqual(df_day_result_new['closing_price_eur'][0], 22.21)
+        self.assertEqual(df_day_result_new['daily_traded_volume'][0], 3600)
+
+    def test_etl_report1_incremental_meta_file(self):
+        """
+        Tests that repeated incremental runs (new instances, e.g. cron) write every date once to the
+        meta-file, and today's date not before the day is over
+        """
+        # Expected results
+        meta_exp = ['2021-04-17', '2021-04-18', '2021-04-19']
+        # Test init
+        extract_date = '2021-04-17'
+        extract_date_list = ['2021-04-16', '2021-04-17', '2021-04-18', '2021-04-19']
+        run_config = EtlRunConfig(state_prefix='state/')
+        today = datetime.today().strftime(MetaProcessFormat.META_FILE_DATE_FORMAT.value)
+        self.s3_bucket_src.write_df_to_s3(self.df_src.loc[8:8].assign(Date=today),
+                                          f'{today}/{today}_BINS_XETR09.csv', 'csv')
+        # Method execution
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list]):
+            dates_results = []
+            for _ in range(2):
+                xetra_etl = StockETL(self.s3_bucket_src, self.s3_bucket_trg,
+                             self.meta_key, self.source_config, self.target_config, run_config)
+                dates_results.append(xetra_etl.etl_report1_incremental())
+        # Test after method execution
+        self.assertEqual(dates_results, [meta_exp + [today], []])
+        df_meta_result = self.s3_bucket_trg.read_csv_as_df(self.meta_key)
+        self.assertEqual(list(df_meta_result[MetaProcessFormat.META_FILE_DATE_COL.value]), meta_exp)
+
+    def test_etl_report1_incremental_republished(self):
+        """
+        Tests that a republished source file of an already processed day is found by
+        changed_dates and that the day and the following day are written again
+        """
+        # Test init
+        extract_date = '2021-04-17'
+        extract_date_list = ['2021-04-16', '2021-04-17', '2021-04-18', '2021-04-19']
+        run_config = EtlRunConfig(state_prefix='state/')
+        df_republished = self.df_src.loc[5:5].assign(StartPrice=20.00)
+        # Method execution
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list]):
+            xetra_etl = StockETL(self.s3_bucket_src, self.s3_bucket_trg,
+                         self.meta_key, self.source_config, self.target_config, run_config)
+            xetra_etl.etl_report1_incremental()
+            changed_before = xetra_etl.changed_dates()
+            self.s3_bucket_src.write_df_to_s3(df_republished, '2021-04-18/2021-04-18_BINS_XETR08.csv', 'csv')
+            changed_after = xetra_etl.changed_dates()
+            # planned dates already processed and today's date without files
+            xetra_etl.extract_date_list = []
+            dates_result = xetra_etl.etl_report1_incremental()
+        # Test after method execution
+        self.assertEqual(changed_before, [])
+        self.assertEqual(changed_after, ['2021-04-18'])
+        self.assertEqual(dates_result, ['2021-04-18', '2021-04-19'])
+        day_key = 'report1/xetra_daily_report1_20210418_000000_20210418_000000.parquet'
+        df_day_result = pd.read_parquet(BytesIO(self.trg_bucket.Object(key=day_key).get().get('Body').read()))
+        self.assertEqual(df_day_result['closing_price_eur'][0], 20.00)
+
+    def test_watch(self):
+        """
+        Tests the watch method - the first run processes the planned dates,
+        the following runs only check yesterday and today
+        """
+        # Test init
+        extract_date = '2021-04-17'
+        extract_date_list = ['2021-04-16', '2021-04-17', '2021-04-18', '2021-04-19']
+        run_config = EtlRunConfig(state_prefix='state/', watch_interval=0)
+        # Method execution
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list]):
+            xetra_etl = StockETL(self.s3_bucket_src, self.s3_bucket_trg,
+                         self.meta_key, self.source_config, self.target_config, run_config)
+            with patch.object(xetra_etl, 'etl_report1_incremental',
+                              wraps=xetra_etl.etl_report1_incremental) as run_mock:
+                runs = xetra_etl.watch(0, max_runs=2)
+        # Test after method execution
+        self.assertEqual(runs, 2)
+        self.assertIsNone(run_mock.call_args_list[0].args[0])
+        self.assertEqual(len(run_mock.call_args_list[1].args[0]), 2)
+        self.assertEqual(len(self.s3_bucket_trg.list_files_in_prefix(self.target_config.trg_key)), 3)
+
+    def test_watch_stop(self):
+        """
+        Tests the watch method - a set stop event ends the watch after the current run, without the wait
+        """
+        # Test init
+        extract_date = '2021-04-17'
+        extract_date_list = ['2021-04-16', '2021-04-17', '2021-04-18', '2021-04-19']
+        run_config = EtlRunConfig(state_prefix='state/', watch_interval=3600)
+        stop = threading.Event()
+        # Method execution
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list]):
+            xetra_etl = StockETL(self.s3_bucket_src, self.s3_bucket_trg,
+                         self.meta_key, self.source_config, self.target_config, run_config)
+            run_incremental = xetra_etl.etl_report1_incremental
+            def run_and_stop(dates):
+                stop.set()
+                return run_incremental(dates)
+            with patch.object(xetra_etl, 'etl_report1_incremental', side_effect=run_and_stop):
+                runs = xetra_etl.watch(run_config.watch_interval, stop=stop)
+        # Test after method execution
+        self.assertEqual(runs, 1)
+
+    def test_watch_changed_dates(self):
+        """
+        Tests the watch method - the following runs also check for changed source files of older dates
+        """
+        # Test init
+        extract_date = '2021-04-17'
+        extract_date_list = ['2021-04-16', '2021-04-17', '2021-04-18', '2021-04-19']
+        run_config = EtlRunConfig(state_prefix='state/', watch_interval=0)
+        # Method execution
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list]):
+            xetra_etl = StockETL(self.s3_bucket_src, self.s3_bucket_trg,
+                         self.meta_key, self.source_config, self.target_config, run_config)
+            run_incremental = xetra_etl.etl_report1_incremental
+            def run_and_republish(dates):
+                result = run_incremental(dates)
+                # a republished file of an older date after the first run
+                self.s3_bucket_src.write_df_to_s3(self.df_src.loc[4:4].assign(EndPrice=30.0),
+                                                  '2021-04-18/2021-04-18_BINS_XETR07.csv', 'csv')
+                return result
+            with patch.object(xetra_etl, 'etl_report1_incremental', side_effect=run_and_republish) as run_mock:
+                xetra_etl.watch(0, max_runs=2, changed_check_interval=0)
+        # Test after method execution
+        self.assertIn('2021-04-18', run_mock.call_args_list[1].args[0])
+
     def test_etl_report1(self):
         """
         Tests the etl_report1 method
@@ -327,5 +911,146 @@ class IntTestStockETLMethods(unittest.TestCase):
             }
         )
 
+    def test_etl_report1_venue(self):
+        """
+        Tests the etl_report1 method for another venue with its own column mapping
+        """
+        # Expected results
+        log1_exp = 'Eurex target data successfully written.'
+        log2_exp = 'Eurex meta file successfully updated.'
+        df_exp = self.df_report.rename(columns={'daily_traded_volume': 'daily_traded_contracts'})
+        # Test init
+        extract_date = '2021-04-17'
+        extract_date_list = ['2021-04-16', '2021-04-17', '2021-04-18', '2021-04-19']
+        source_config = self.source_config._replace(src_venue='Eurex')
+        target_config = self.target_config._replace(trg_key='report1/eurex_daily_report1_',
+                                                    trg_col_dail_trade_vol='daily_traded_contracts')
+        # Method execution
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=[extract_date, extract_date_list]):
+            eurex_etl = StockETL(self.s3_bucket_src, self.s3_bucket_trg,
+                         self.meta_key, source_config, target_config)
+            with self.assertLogs() as logm:
+                eurex_etl.etl_report1()
+        # Test after method execution
+        self.assertTrue(any(log1_exp in line for line in logm.output))
+        self.assertTrue(any(log2_exp in line for line in logm.output))
+        trg_file = self.s3_bucket_trg.list_files_in_prefix(target_config.trg_key)[0]
+        df_result = pd.read_parquet(BytesIO(self.trg_bucket.Object(key=trg_file).get().get('Body').read()))
+        self.assertTrue(df_exp.equals(df_result))
+
+
+@unittest.skipIf(async_s3.get_session is None, 'aiobotocore is not installed')
+@unittest.skipIf(ThreadedMotoServer is None, 'the moto server is not installed')
+class TestStockETLAsync(unittest.TestCase):
+    """
+        Testing the StockETL class with the asyncio source connector against a local moto server.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """Starts the moto server once for all tests"""
+        cls.server = ThreadedMotoServer(port=5124, verbose=False)
+        cls.server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Stops the moto server"""
+        cls.server.stop()
+
+    def setUp(self):
+        """
+        Setting up the environment - the source files in a bucket of the moto server and as local directory
+        """
+        self.s3_access_key = 'AWS_ACCESS_KEY_ID'
+        self.s3_secret_key = 'AWS_SECRET_ACCESS_KEY'
+        self.s3_endpoint_url = 'http://127.0.0.1:5124'
+        # the moto server shares the state of the mocked s3 of the process, buckets of other tests may remain
+        self.s3_bucket_name_src = 'async-src-bucket'
+        self.meta_key = 'meta_key'
+        os.environ[self.s3_access_key] = 'KEY1'
+        os.environ[self.s3_secret_key] = 'KEY2'
+        os.environ.setdefault('AWS_DEFAULT_REGION', 'eu-central-1')
+        self.s3 = boto3.resource(service_name='s3', endpoint_url=self.s3_endpoint_url,
+                                 aws_access_key_id='KEY1', aws_secret_access_key='KEY2')
+        self.s3.create_bucket(Bucket=self.s3_bucket_name_src,
+                              CreateBucketConfiguration={'LocationConstraint': 'eu-central-1'})
+        self.src_bucket = self.s3.Bucket(self.s3_bucket_name_src)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.local_bucket_src = LocalBucketConnector(os.path.join(self.tmp_dir.name, 'src'))
+
+        self.source_config = EtlSourceConfig(
+            src_first_extract_date='2021-04-01',
+            src_columns=['ISIN', 'Mnemonic', 'Date', 'Time', 'StartPrice', 'EndPrice', 'MinPrice', 'MaxPrice',
+                         'TradedVolume'],
+            src_col_date='Date', src_col_isin='ISIN', src_col_time='Time', src_col_start_price='StartPrice',
+            src_col_min_price='MinPrice', src_col_max_price='MaxPrice', src_col_traded_vol='TradedVolume')
+        self.target_config = EtlTargetConfig(
+            trg_col_isin='isin', trg_col_date='date', trg_col_op_price='opening_price_eur',
+            trg_col_clos_price='closing_price_eur', trg_col_min_price='minimum_price_eur',
+            trg_col_max_price='maximum_price_eur', trg_col_dail_trade_vol='daily_traded_volume',
+            trg_col_ch_prev_clos='change_prev_closing_%', trg_key='report1/xetra_daily_report1_',
+            trg_key_date_format='%Y%m%d_%H%M%S', trg_format='parquet')
+
+        columns_src = ['ISIN', 'Mnemonic', 'Date', 'Time', 'StartPrice',
+        'EndPrice', 'MinPrice', 'MaxPrice', 'TradedVolume']
+        data = [['AT0000A0E9W5', 'SANT', '2021-04-16', '15:00', 18.27, 21.19, 18.27, 21.34, 987],
+                ['AT0000A0E9W5', 'SANT', '2021-04-17', '13:00', 20.21, 18.27, 18.21, 20.42, 633],
+                ['AT0000A0E9W5', 'SANT', '2021-04-17', '14:00', 18.27, 21.19, 18.27, 21.34, 455],
+                ['AT0000A0E9W5', 'SANT', '2021-04-18', '07:00', 20.58, 19.27, 18.89, 20.58, 9066],
+                ['AT0000A0E9W5', 'SANT', '2021-04-18', '08:00', 19.27, 21.14, 19.27, 21.14, 1220]]
+        df_src = pd.DataFrame(data, columns=columns_src)
+        for row in range(len(df_src)):
+            date, hour = df_src['Date'][row], df_src['Time'][row][:2]
+            key = f'{date}/{date}_BINS_XETR{hour}.csv'
+            self.src_bucket.put_object(Body=df_src.loc[row:row].to_csv(index=False), Key=key)
+            self.local_bucket_src.write_df_to_s3(df_src.loc[row:row], key, 'csv')
+
+    def tearDown(self):
+        """Ran each time after the unit tests have been done."""
+        self.src_bucket.objects.all().delete()
+        self.src_bucket.delete()
+        self.tmp_dir.cleanup()
+
+    def run_report1(self, s3_bucket_src, trg_dir: str):
+        """Runs report 1 with the source connector, sync or async, and a local target directory
+
+        Returns:
+            tuple: the report and the dates of the meta-file
+        """
+        s3_bucket_trg = LocalBucketConnector(os.path.join(self.tmp_dir.name, trg_dir))
+        with patch.object(MetaProcess, "return_date_list",
+        return_value=['2021-04-17', ['2021-04-16', '2021-04-17', '2021-04-18']]):
+            xetra_etl = StockETL(s3_bucket_src, s3_bucket_trg,
+                         self.meta_key, self.source_config, self.target_config)
+        if isinstance(s3_bucket_src, AsyncS3BucketConnector):
+            async def run():
+                async with s3_bucket_src:
+                    return await xetra_etl.etl_report1_async()
+            self.assertTrue(asyncio.run(run()))
+        else:
+            xetra_etl.etl_report1()
+        trg_file = s3_bucket_trg.list_files_in_prefix(self.target_config.trg_key)[0]
+        df_meta = s3_bucket_trg.read_csv_as_df(self.meta_key)
+        return (s3_bucket_trg.read_parquet_as_df(trg_file),
+                list(df_meta[MetaProcessFormat.META_FILE_DATE_COL.value]))
+
+    def test_etl_report1_async(self):
+        """
+        Tests the etl_report1_async method - the same report and meta-file as etl_report1
+        """
+        # Expected results
+        df_exp, meta_exp = self.run_report1(self.local_bucket_src, 'trg_sync')
+        # Method execution
+        df_result, meta_result = self.run_report1(
+            AsyncS3BucketConnector(self.s3_access_key, self.s3_secret_key, self.s3_endpoint_url,
+                                   self.s3_bucket_name_src, max_concurrency=2), 'trg_async')
+        # Test after method execution
+        self.assertEqual(len(df_result), 2)
+        self.assertTrue(df_exp.equals(df_result))
+        self.assertEqual(meta_result, meta_exp)
+        self.assertEqual(meta_result, ['2021-04-17', '2021-04-18'])
+
+
 if __name__ == "__main__":
     unittest.main(); #Calls Setup> all tests > tear-down
@@ -0,0 +1,75 @@
+"""Test leaderboard methods"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from ETL_sc.common.constants import Leaderboard
+from ETL_sc.transformers.etl_transformer import EtlSourceConfig, EtlTargetConfig
+from ETL_sc.transformers.leaderboard import leaderboards, top_n_positions
+
+
+class TestLeaderboardMethods(unittest.TestCase):
+    """Testing the leaderboard methods"""
+
+    def setUp(self):
+        """
+        Setting up the environment
+        """
+        self.source_config = EtlSourceConfig(
+            src_first_extract_date='2021-04-01',
+            src_columns=['ISIN', 'Mnemonic', 'Date', 'Time',
+            'StartPrice', 'EndPrice', 'MinPrice', 'MaxPrice', 'TradedVolume'],
+            src_col_date='Date', src_col_isin='ISIN', src_col_time='Time',
+            src_col_start_price='StartPrice', src_col_min_price='MinPrice',
+            src_col_max_price='MaxPrice', src_col_traded_vol='TradedVolume')
+        self.target_config = EtlTargetConfig(
+            trg_col_isin='isin', trg_col_date='date', trg_col_op_price='opening_price_eur',
+            trg_col_clos_price='closing_price_eur', trg_col_min_price='minimum_price_eur',
+            trg_col_max_price='maximum_price_eur', trg_col_dail_trade_vol='daily_traded_volume',
+            trg_col_ch_prev_clos='change_prev_closing_%', trg_key='report1/xetra_daily_report1_',
+            trg_key_date_format='%Y%m%d', trg_format='parquet')
+
+    def test_top_n_positions(self):
+        """
+        Tests the top_n_positions method - ranked, without NaN, also with less values than n
+        """
+        values = np.array([3.0, np.nan, -1.0, 7.0, 0.5, 5.0])
+        self.assertEqual(list(top_n_positions(values, 3)), [3, 5, 0])
+        self.assertEqual(list(top_n_positions(values, 2, largest=False)), [2, 4])
+        self.assertEqual(list(top_n_positions(values, 10)), [3, 5, 0, 4, 2])
+        self.assertEqual(list(top_n_positions(np.array([np.nan]), 3)), [])
+
+    def test_leaderboards(self):
+        """
+        Tests the leaderboards method against a full sort per date
+        """
+        # Test init
+        rng = np.random.default_rng(0)
+        n_isins = 200
+        report = pd.DataFrame({
+            'ISIN': [f'DE{i:010d}' for i in range(n_isins)] * 2,
+            'Date': ['2021-04-16'] * n_isins + ['2021-04-17'] * n_isins,
+            'opening_price_eur': 10.0, 'closing_price_eur': rng.random(2 * n_isins).round(2),
+            'minimum_price_eur': 9.0, 'maximum_price_eur': 11.0,
+            'daily_traded_volume': rng.permutation(2 * n_isins),
+            'change_prev_closing_%': np.concatenate([np.full(n_isins, np.nan), rng.permutation(n_isins) - 100.0])})
+        # Method execution
+        boards = leaderboards(report.sample(frac=1, random_state=1), self.source_config, self.target_config, 5)
+        # Test after method execution
+        self.assertEqual(list(boards), ['2021-04-16', '2021-04-17'])
+        board = boards['2021-04-17']
+        day = report[report['Date'] == '2021-04-17']
+        for name, column, ascending in [(Leaderboard.GAINERS.value, 'change_prev_closing_%', False),
+                                        (Leaderboard.LOSERS.value, 'change_prev_closing_%', True),
+                                        (Leaderboard.VOLUME_LEADERS.value, 'daily_traded_volume', False)]:
+            rows = board[board[Leaderboard.BOARD_COL.value] == name]
+            self.assertEqual(list(rows[Leaderboard.RANK_COL.value]), [1, 2, 3, 4, 5])
+            self.assertEqual(list(rows['ISIN']), list(day.sort_values(column, ascending=ascending)['ISIN'][:5]))
+        # no change to the previous closing price on the first date -> only volume leaders
+        self.assertEqual(set(boards['2021-04-16'][Leaderboard.BOARD_COL.value]), {Leaderboard.VOLUME_LEADERS.value})
+
+
+if __name__ == "__main__":
+    unittest.main()
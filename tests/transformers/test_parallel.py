@@ -0,0 +1,42 @@
+"""Test parallel methods"""
+
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from ETL_sc.transformers.parallel import run_partitioned
+
+
+def _count_rows(data_frame: pd.DataFrame, col: str):
+    """Test kernel: number of rows per value of col"""
+    return data_frame.groupby(col, as_index=False).size()
+
+
+class TestParallelMethods(unittest.TestCase):
+    """Testing the parallel methods"""
+
+    def test_run_partitioned(self):
+        """
+        Tests that run_partitioned keeps all rows of a partition value
+        in the same partition and returns the results of all partitions
+        """
+        # Expected results
+        counts_exp = {'A': 3, 'B': 1, 'C': 2, 'D': 1}
+        # Test init
+        df_input = pd.DataFrame({'ISIN': ['A', 'B', 'A', 'C', 'D', 'C', 'A'],
+                                 'val': [1, 2, 3, 4, 5, 6, 7]})
+        # Method execution
+        with ProcessPoolExecutor(max_workers=3) as executor:
+            results = run_partitioned(executor, df_input, 'ISIN', 3, _count_rows, 'ISIN')
+            # the pool is owned by the caller and reused by the next run
+            results_arrow = run_partitioned(executor, df_input.astype({'ISIN': 'string[pyarrow]'}),
+                                            'ISIN', 3, _count_rows, 'ISIN')
+        # Test after method execution
+        for result in (results, results_arrow):
+            df_result = pd.concat(result, ignore_index=True)
+            self.assertEqual(dict(zip(df_result['ISIN'], df_result['size'])), counts_exp)
+
+
+if __name__ == "__main__":
+    unittest.main()
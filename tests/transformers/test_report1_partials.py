@@ -0,0 +1,52 @@
+"""Test report1_partials methods"""
+
+import unittest
+
+import pandas as pd
+
+from ETL_sc.transformers.etl_transformer import EtlSourceConfig, EtlTargetConfig
+from ETL_sc.transformers.report1_partials import merge_partials, partial_columns
+
+
+class TestReport1PartialsMethods(unittest.TestCase):
+    """Testing the report1_partials methods"""
+
+    def setUp(self):
+        """
+        Setting up the environment
+        """
+        self.source_config = EtlSourceConfig(
+            src_first_extract_date='2021-04-01',
+            src_columns=['ISIN', 'Mnemonic', 'Date', 'Time',
+            'StartPrice', 'EndPrice', 'MinPrice', 'MaxPrice', 'TradedVolume'],
+            src_col_date='Date', src_col_isin='ISIN', src_col_time='Time',
+            src_col_start_price='StartPrice', src_col_min_price='MinPrice',
+            src_col_max_price='MaxPrice', src_col_traded_vol='TradedVolume')
+        self.target_config = EtlTargetConfig(
+            trg_col_isin='isin', trg_col_date='date', trg_col_op_price='opening_price_eur',
+            trg_col_clos_price='closing_price_eur', trg_col_min_price='minimum_price_eur',
+            trg_col_max_price='maximum_price_eur', trg_col_dail_trade_vol='daily_traded_volume',
+            trg_col_ch_prev_clos='change_prev_closing_%', trg_key='report1/xetra_daily_report1_',
+            trg_key_date_format='%Y%m%d', trg_format='parquet')
+
+    def test_merge_partials(self):
+        """
+        Tests the merge_partials method with partial aggregates
+        of two files (given in reverse time order) for the same ISIN and day
+        """
+        # Expected results
+        row_exp = ['AT0000A0E9W5', 18734, 100, 20.21, 500, 18.27, 18.21, 21.34, 1088]
+        # Test init
+        columns = partial_columns(self.source_config, self.target_config)
+        df_partials = pd.DataFrame([
+            ['AT0000A0E9W5', 18734, 400, 18.27, 500, 18.27, 18.27, 21.34, 455],
+            ['AT0000A0E9W5', 18734, 100, 20.21, 200, 20.10, 18.21, 20.42, 633]], columns=columns)
+        # Method execution
+        df_result = merge_partials(df_partials, self.source_config, self.target_config)
+        # Test after method execution
+        self.assertEqual(list(df_result.columns), columns)
+        self.assertEqual(df_result.values.tolist(), [row_exp])
+
+
+if __name__ == "__main__":
+    unittest.main()